@@ -0,0 +1,210 @@
+# backend/Machine_Learning_Model/batch_predict.py
+"""
+Vectorised scoring for /predict/batch.
+
+Rows are validated column-wise with the same rules as `RentalInput`, valid rows
+are turned into one sparse feature matrix via the training manifest, and the
+model is called once. Invalid rows keep their position and carry an inline error.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearModel, is_linear
+from Machine_Learning_Model.rental_price_model import get_model_suburb_columns_from_data
+
+INPUT_FIELDS = ["bedrooms", "bathrooms", "floor_area", "suburb"]
+MAX_BATCH_ROWS = 50_000
+STREAM_CHUNK_ROWS = 1_000
+
+
+@dataclass
+class BatchResult:
+    inputs: pd.DataFrame            # normalised inputs (bedrooms/bathrooms int, floor_area float, suburb str)
+    predictions: np.ndarray         # float, NaN where the row failed
+    errors: List[str | None]        # None for rows that were scored
+
+    @property
+    def ok_mask(self) -> np.ndarray:
+        return np.array([e is None for e in self.errors], dtype=bool)
+
+
+# ---------- Loading ----------
+def rows_from_json(payload: Any) -> pd.DataFrame:
+    """Accept a JSON array of RentalInput-shaped objects."""
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON array of rows.")
+    if len(payload) > MAX_BATCH_ROWS:
+        raise OverflowError(f"Batch too large: {len(payload)} rows (max {MAX_BATCH_ROWS}).")
+    records = [r if isinstance(r, dict) else {} for r in payload]
+    return pd.DataFrame.from_records(records, columns=INPUT_FIELDS) if records else pd.DataFrame(columns=INPUT_FIELDS)
+
+
+def rows_from_csv(raw: bytes) -> pd.DataFrame:
+    """Accept an uploaded CSV with bedrooms, bathrooms, floor_area, suburb columns."""
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        text = raw.decode("latin-1")
+    df = pd.read_csv(io.StringIO(text), dtype=object, nrows=MAX_BATCH_ROWS + 1)
+    if len(df) > MAX_BATCH_ROWS:
+        raise OverflowError(f"Batch too large: more than {MAX_BATCH_ROWS} rows.")
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df.reindex(columns=INPUT_FIELDS)
+
+
+# ---------- Validation (bulk, same rules as RentalInput) ----------
+def validate_rows(df: pd.DataFrame, allowed_suburbs: Iterable[str]) -> tuple[pd.DataFrame, List[str | None]]:
+    """
+    Return (normalised inputs, per-row error message or None).
+    """
+    n = len(df)
+    problems: List[List[str]] = [[] for _ in range(n)]
+
+    def flag(mask: np.ndarray, msg: str):
+        for i in np.flatnonzero(mask):
+            problems[i].append(msg)
+
+    out = pd.DataFrame(index=range(n))
+    for col, minimum, integer in (("bedrooms", 0, True), ("bathrooms", 0, True), ("floor_area", 10, False)):
+        raw = df[col] if col in df.columns else pd.Series([None] * n)
+        raw = raw.reset_index(drop=True)
+        missing = raw.isna().to_numpy()
+        num = pd.to_numeric(raw, errors="coerce").to_numpy(dtype=float)
+        invalid = ~missing & ~np.isfinite(num)
+        if integer:
+            invalid |= ~missing & ~invalid & (num != np.round(num))
+        flag(missing, f"{col}: field required")
+        flag(invalid, f"{col}: must be {'an integer' if integer else 'a number'}")
+        ok = ~missing & ~invalid
+        flag(ok & ~(num > minimum), f"{col}: must be greater than {minimum}")
+        out[col] = num
+
+    allowed = {str(s).strip() for s in allowed_suburbs}
+    raw = df["suburb"] if "suburb" in df.columns else pd.Series([None] * n)
+    raw = raw.reset_index(drop=True)
+    missing = raw.isna().to_numpy()
+    sub = raw.where(~raw.isna(), "").astype(str).str.strip()
+    flag(missing, "suburb: field required")
+    flag(~missing & (sub == "").to_numpy(), "suburb: Suburb cannot be empty.")
+    flag(~missing & sub.str.isdigit().to_numpy() & (sub != "").to_numpy(), "suburb: Suburb cannot be a number.")
+    flag(~missing & (sub != "").to_numpy() & ~sub.str.isdigit().to_numpy() & ~sub.isin(allowed).to_numpy(),
+         "suburb: Invalid suburb.")
+    out["suburb"] = sub
+
+    errors = ["; ".join(p) if p else None for p in problems]
+    ok = np.array([e is None for e in errors], dtype=bool)
+    for col in ("bedrooms", "bathrooms"):
+        out[col] = np.where(ok, out[col].fillna(0), 0).astype(int)
+    return out, errors
+
+
+# ---------- Scoring ----------
+def build_feature_matrix(inputs: pd.DataFrame, manifest: FeatureManifest) -> tuple[sp.csr_matrix, np.ndarray]:
+    """
+    One sparse (CSR) matrix for all rows. Returns (X, known_mask) where
+    known_mask is False for rows whose suburb the model was not trained on.
+    """
+    return manifest.encode(inputs)
+
+
+def model_input(model: Any, X: sp.csr_matrix, manifest: FeatureManifest) -> Any:
+    """The encoded rows in the form the model was fitted on."""
+    if isinstance(model, LinearModel) or getattr(model, "feature_names_in_", None) is None:
+        return X  # fitted on the sparse encoder output (or a saved linear artifact)
+    if is_linear(model):
+        return pd.DataFrame.sparse.from_spmatrix(X, columns=manifest.columns)
+    return pd.DataFrame(X.toarray(), columns=manifest.columns)  # older models fitted on dense frames
+
+
+def _manifest_for(snapshot) -> FeatureManifest:
+    if snapshot.manifest is not None:
+        return snapshot.manifest
+    # legacy model without a manifest: rebuild the column list from the dataset
+    return FeatureManifest.from_columns(
+        ["bedrooms", "bathrooms", "floor_area"] + get_model_suburb_columns_from_data()
+    )
+
+
+def predict_rows(df: pd.DataFrame, snapshot, allowed_suburbs: Iterable[str]) -> BatchResult:
+    inputs, errors = validate_rows(df, allowed_suburbs)
+    predictions = np.full(len(inputs), np.nan)
+
+    ok = np.array([e is None for e in errors], dtype=bool)
+    if ok.any():
+        manifest = _manifest_for(snapshot)  # once per batch
+        X, known = build_feature_matrix(inputs[ok], manifest)
+        for pos in np.flatnonzero(ok)[~known]:
+            errors[pos] = f"suburb: Suburb '{inputs.at[pos, 'suburb']}' was not seen during training."
+        if known.any():
+            predictions[np.flatnonzero(ok)[known]] = snapshot.model.predict(
+                model_input(snapshot.model, X[known], manifest)
+            )
+
+    return BatchResult(inputs=inputs, predictions=predictions, errors=errors)
+
+
+def score_rows(snapshot, rows: List[Dict[str, Any]]) -> List[float | Exception]:
+    """
+    Score already-validated RentalInput rows with one model call.
+    Rows whose suburb the model does not know get a ValueError in their slot.
+    """
+    manifest = _manifest_for(snapshot)
+    inputs = pd.DataFrame.from_records(rows, columns=INPUT_FIELDS)
+    X, known = build_feature_matrix(inputs, manifest)
+    out: List[float | Exception] = [
+        ValueError(f"Suburb '{s}' was not seen during training.") for s in inputs["suburb"]
+    ]
+    if known.any():
+        preds = snapshot.model.predict(model_input(snapshot.model, X[known], manifest))
+        for pos, pred in zip(np.flatnonzero(known), preds):
+            out[pos] = float(pred)
+    return out
+
+
+def predict_one(snapshot, row: Dict[str, Any]) -> float:
+    """Score one validated RentalInput row; ValueError if its suburb was not trained on."""
+    result = score_rows(snapshot, [row])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+# ---------- Streaming encoders ----------
+def iter_ndjson(result: BatchResult) -> Iterator[str]:
+    lines: List[str] = []
+    for i, (pred, err) in enumerate(zip(result.predictions, result.errors)):
+        item: Dict[str, Any] = {"index": i}
+        if err is None:
+            item["predicted_rent"] = round(float(pred), 2)
+        else:
+            item["error"] = err
+        lines.append(json.dumps(item))
+        if len(lines) >= STREAM_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_csv(result: BatchResult) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(["index", "predicted_rent", "error"])
+    for i, (pred, err) in enumerate(zip(result.predictions, result.errors)):
+        writer.writerow([i, "" if err is not None else round(float(pred), 2), err or ""])
+        if (i + 1) % STREAM_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    if buf.getvalue():
+        yield buf.getvalue()
@@ -0,0 +1,121 @@
+# backend/Machine_Learning_Model/batch_scheduler.py
+"""
+Opt-in dynamic micro-batching for concurrent /predict calls.
+
+Requests arriving within `window_ms` of each other (or until `max_batch` are
+waiting) are scored together in one vectorised call on a worker thread, and each
+caller gets its own result back. Enable with PREDICT_MICROBATCH=1.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+ENABLED = os.getenv("PREDICT_MICROBATCH", "0") == "1"
+WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+MAX_BATCH = int(os.getenv("PREDICT_BATCH_MAX", "64"))
+
+# Upper bounds of the batch-size / queue-depth histogram buckets
+_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _histogram() -> Dict[str, int]:
+    return {**{f"<={b}": 0 for b in _BUCKETS}, f">{_BUCKETS[-1]}": 0}
+
+
+def _observe(hist: Dict[str, int], value: int) -> None:
+    for b in _BUCKETS:
+        if value <= b:
+            hist[f"<={b}"] += 1
+            return
+    hist[f">{_BUCKETS[-1]}"] += 1
+
+
+class MicroBatchScheduler:
+    def __init__(self, score_batch: Callable[[Any, List[dict]], List[Any]], *,
+                 window_ms: float = WINDOW_MS, max_batch: int = MAX_BATCH, workers: int = 2):
+        self.score_batch = score_batch
+        self.window = window_ms / 1000.0
+        self.max_batch = max_batch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="predict-batch")
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._pending: List[Tuple[Any, dict, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set = set()
+
+        self.batches = 0
+        self.rows = 0
+        self.max_queue_depth = 0
+        self.batch_sizes = _histogram()
+        self.queue_depths = _histogram()
+
+    async def submit(self, snapshot: Any, row: dict) -> float:
+        """Queue one validated row and wait for its prediction."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # a new event loop (e.g. a fresh test client): start with clean state
+            self._loop, self._pending, self._timer = loop, [], None
+
+        fut = loop.create_future()
+        self._pending.append((snapshot, row, fut))
+        depth = len(self._pending)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        _observe(self.queue_depths, depth)
+
+        if depth >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await fut
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.batches += 1
+        self.rows += len(batch)
+        _observe(self.batch_sizes, len(batch))
+        task = self._loop.create_task(self._score(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _score(self, batch: List[Tuple[Any, dict, asyncio.Future]]) -> None:
+        # A hot swap can land mid-window: score each model version separately
+        groups: Dict[str, List[Tuple[Any, dict, asyncio.Future]]] = {}
+        for item in batch:
+            groups.setdefault(item[0].version, []).append(item)
+
+        for items in groups.values():
+            snapshot = items[0][0]
+            try:
+                results = await self._loop.run_in_executor(
+                    self._executor, self.score_batch, snapshot, [row for _, row, _ in items]
+                )
+            except Exception as e:
+                results = [e] * len(items)
+            for (_, _, fut), res in zip(items, results):
+                if fut.done():
+                    continue  # caller went away
+                if isinstance(res, Exception):
+                    fut.set_exception(res)
+                else:
+                    fut.set_result(res)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": True,
+            "window_ms": self.window * 1000.0,
+            "max_batch": self.max_batch,
+            "queue_depth": len(self._pending),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "rows": self.rows,
+            "avg_batch_size": round(self.rows / self.batches, 2) if self.batches else 0.0,
+            "batch_size_histogram": dict(self.batch_sizes),
+            "queue_depth_histogram": dict(self.queue_depths),
+        }
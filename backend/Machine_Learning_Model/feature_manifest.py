@@ -0,0 +1,153 @@
+# backend/Machine_Learning_Model/feature_manifest.py
+"""
+Training-time feature manifest, saved next to rental_model.pkl.
+
+Holds the exact column order the model was fitted on plus a suburb -> column
+index map, so inference can build the input vector with a dict lookup instead
+of re-reading MockData and re-running get_dummies on every request.
+
+It is also the fitted one-hot encoder: fit() learns the suburb columns from the
+training rows and training_matrix()/encode() produce scipy CSR matrices (the
+numerics plus a single 1 per row), so nothing ever materialises the
+rows x suburbs dense block.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+NUMERIC_FEATURES = ["bedrooms", "bathrooms", "floor_area"]
+SUBURB_PREFIX = "suburb_"
+
+# floor_area the training scripts fill in when the dataset has none; inference uses it for missing inputs
+DEFAULT_FLOOR_AREA = 100
+
+# Values cleaner.prepare_features treats as "no suburb"
+INVALID_SUBURBS = {"", "String", "??", "N/A", "Na", "Null", "None", "Unknown"}
+
+
+def normalize_suburb(name: Any) -> str:
+    """Same normalisation as cleaner.prepare_features (strip + title-case)."""
+    return str(name).strip().title()
+
+
+@dataclass
+class FeatureManifest:
+    columns: List[str]                                  # exact training column order
+    suburb_index: Dict[str, int] = field(default_factory=dict)
+    numeric: List[str] = field(default_factory=lambda: list(NUMERIC_FEATURES))
+    model_version: str | None = None                    # version of the model it was saved with
+
+    @classmethod
+    def from_columns(cls, columns: List[str]) -> "FeatureManifest":
+        columns = [str(c) for c in columns]
+        suburb_index: Dict[str, int] = {}
+        for i, col in enumerate(columns):
+            if col.startswith(SUBURB_PREFIX):
+                # first column wins if two raw spellings normalise to the same suburb
+                suburb_index.setdefault(normalize_suburb(col[len(SUBURB_PREFIX):]), i)
+        numeric = [c for c in columns if not c.startswith(SUBURB_PREFIX)]
+        return cls(columns=columns, suburb_index=suburb_index, numeric=numeric)
+
+    @classmethod
+    def from_model(cls, model: Any) -> "FeatureManifest | None":
+        """Derive the manifest from a fitted sklearn estimator (feature_names_in_)."""
+        names = getattr(model, "feature_names_in_", None)
+        if names is None:
+            return None
+        return cls.from_columns(list(names))
+
+    @classmethod
+    def fit(cls, suburbs: Iterable[Any]) -> "FeatureManifest":
+        """Encoder for training rows: numerics, then one column per distinct suburb label, sorted like get_dummies."""
+        labels = sorted(pd.unique(pd.Series(list(suburbs), dtype=object).astype(str)))
+        return cls.from_columns(list(NUMERIC_FEATURES) + [f"{SUBURB_PREFIX}{s}" for s in labels])
+
+    @property
+    def suburbs(self) -> List[str]:
+        return list(self.suburb_index)
+
+    def suburb_position(self, name: Any) -> int | None:
+        """Column index of the suburb's one-hot flag, or None if it was not trained on."""
+        suburb = normalize_suburb(name)
+        if suburb in INVALID_SUBURBS:
+            return None
+        return self.suburb_index.get(suburb)
+
+    @staticmethod
+    def numeric_default(col: str) -> float:
+        """Value used for a numeric feature the input lacks (DEFAULT_FLOOR_AREA for floor_area, else 0)."""
+        return float(DEFAULT_FLOOR_AREA) if col == "floor_area" else 0.0
+
+    @classmethod
+    def numeric_value(cls, row: Mapping[str, Any], col: str) -> float:
+        """The row's value of a numeric feature, or numeric_default() if it has none."""
+        return float(row.get(col, cls.numeric_default(col)))
+
+    @cached_property
+    def numeric_index(self) -> Dict[str, int]:
+        """Position of each numeric feature in `columns`."""
+        return {c: i for i, c in enumerate(self.columns) if c in self.numeric}
+
+    # ---------- Encoding ----------
+    def training_matrix(self, rows: pd.DataFrame) -> sp.csr_matrix:
+        """CSR matrix for training rows; suburb labels must match the fitted columns exactly."""
+        exact = {c[len(SUBURB_PREFIX):]: i for i, c in enumerate(self.columns) if c.startswith(SUBURB_PREFIX)}
+        idx = rows["suburb"].astype(str).map(exact).fillna(-1).to_numpy(dtype=int)
+        return self._csr(rows, idx)
+
+    def suburb_positions(self, suburbs: Iterable[Any]) -> np.ndarray:
+        """Index representation of the suburbs at inference (-1 = not trained on), matched like suburb_position()."""
+        return np.array([-1 if (i := self.suburb_position(s)) is None else i for s in suburbs], dtype=int)
+
+    def encode(self, inputs: pd.DataFrame) -> Tuple[sp.csr_matrix, np.ndarray]:
+        """
+        Inference rows (bedrooms, bathrooms, floor_area, suburb) -> (CSR matrix,
+        known mask). Rows with an unknown suburb get no suburb flag.
+        """
+        idx = self.suburb_positions(inputs["suburb"])
+        return self._csr(inputs, idx), idx >= 0
+
+    def _csr(self, frame: pd.DataFrame, idx: np.ndarray) -> sp.csr_matrix:
+        n = len(frame)
+        positions = list(self.numeric_index.values())
+        values = np.empty((n, len(positions)), dtype=float)
+        for j, col in enumerate(self.numeric_index):
+            if col in frame.columns:
+                values[:, j] = frame[col].to_numpy(dtype=float)
+            else:
+                values[:, j] = self.numeric_default(col)
+        known = idx >= 0
+        row_ids = np.concatenate([np.repeat(np.arange(n), len(positions)), np.flatnonzero(known)])
+        col_ids = np.concatenate([np.tile(np.asarray(positions, dtype=int), n), idx[known]])
+        data = np.concatenate([values.ravel(), np.ones(int(known.sum()))])
+        return sp.csr_matrix((data, (row_ids, col_ids)), shape=(n, len(self.columns)))
+
+    # ---------- Persistence ----------
+    def to_json(self) -> str:
+        return json.dumps({
+            "model_version": self.model_version,
+            "numeric": self.numeric,
+            "columns": self.columns,
+            "suburb_index": self.suburb_index,
+        }, indent=2)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "FeatureManifest | None":
+        path = Path(path)
+        if not path.exists():
+            return None
+        raw = json.loads(path.read_text(encoding="utf-8"))
+        return cls(
+            columns=raw["columns"],
+            suburb_index={k: int(v) for k, v in raw.get("suburb_index", {}).items()},
+            numeric=raw.get("numeric", list(NUMERIC_FEATURES)),
+            model_version=raw.get("model_version"),
+        )
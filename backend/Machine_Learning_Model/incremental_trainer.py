@@ -0,0 +1,318 @@
+# backend/Machine_Learning_Model/incremental_trainer.py
+"""
+Incremental training for the linear rent model from sufficient statistics.
+
+Every training batch is reduced to ZᵀZ and Zᵀy (Z = [1, bedrooms, bathrooms,
+floor_area, suburb one-hots]), ∑y² and its row count, over the suburbs that
+batch actually contains. The global statistics are the sum of the batches, so:
+
+- adding a batch costs O(rows in the batch), not O(all rows)
+- a batch with a new suburb simply grows the global matrices
+- a bad batch can be removed again (the global sums are rebuilt from the rest)
+
+solve() gives the same answer as LinearRegression().fit on all rows: the
+minimum-norm solution of the centred normal equations, as sklearn returns when
+columns are collinear (one-hot suburbs, a constant floor_area). Batches are
+reduced from a sparse Z, and the solve uses the diagonal suburb block
+(O(suburbs), see _solve_arrowhead) with a pseudo-inverse as the fallback. The rows of file batches are also kept on disk so the
+full refit stays available as a verification path (batches streamed from the
+database are only kept as statistics).
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import shutil
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from Machine_Learning_Model.feature_manifest import NUMERIC_FEATURES, SUBURB_PREFIX, FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearModel
+from Machine_Learning_Model.model_artifacts import atomic_write_bytes
+
+STATS_PATH = Path(__file__).with_name("rental_model.stats.npz")
+BATCH_DIR = Path(__file__).with_name("training_batches")
+TARGET = "rent_price"
+TRAINING_COLUMNS = NUMERIC_FEATURES + ["suburb", TARGET]
+
+# Relative cut-off for the pseudo-inverse: drops the exactly collinear
+# directions (one-hot sum vs intercept) that survive as round-off.
+RCOND = 1e-10
+
+
+@dataclass
+class BatchStats:
+    batch_id: str
+    suburbs: List[str]        # suburb labels in this batch, in matrix order after the numerics
+    ztz: np.ndarray           # (1 + numerics + suburbs) square
+    zty: np.ndarray
+    yty: float
+    n: int
+    source: str = ""
+    added_at: str = field(default_factory=lambda: datetime.utcnow().isoformat(timespec="seconds"))
+
+    @classmethod
+    def from_rows(cls, batch_id: str, rows: pd.DataFrame, source: str = "") -> "BatchStats":
+        labels = rows["suburb"].astype(str)
+        suburbs = sorted(labels.unique())
+        # Z = [1, numerics, one-hots] as CSR: k + 1 non-zeros per row, whatever the suburb count
+        n = len(rows)
+        Z = sp.hstack([
+            np.ones((n, 1)),
+            rows[NUMERIC_FEATURES].to_numpy(dtype=float),
+            sp.csr_matrix(
+                (np.ones(n), (np.arange(n), pd.Categorical(labels, categories=suburbs).codes)),
+                shape=(n, len(suburbs)),
+            ),
+        ], format="csr")
+        y = rows[TARGET].to_numpy(dtype=float)
+        return cls(
+            batch_id=batch_id, suburbs=suburbs, ztz=(Z.T @ Z).toarray(), zty=np.asarray(Z.T @ y).ravel(),
+            yty=float(y @ y), n=n, source=source,
+        )
+
+    def merge(self, other: "BatchStats") -> "BatchStats":
+        """Statistics of both row sets together (used to fold streamed chunks into one batch)."""
+        suburbs = sorted(set(self.suburbs) | set(other.suburbs))
+        k = 1 + len(NUMERIC_FEATURES)
+        pos = {s: k + i for i, s in enumerate(suburbs)}
+        ztz = np.zeros((k + len(suburbs), k + len(suburbs)))
+        zty = np.zeros(k + len(suburbs))
+        for part in (self, other):
+            idx = np.array(list(range(k)) + [pos[s] for s in part.suburbs])
+            ztz[np.ix_(idx, idx)] += part.ztz
+            zty[idx] += part.zty
+        return BatchStats(
+            batch_id=self.batch_id, suburbs=suburbs, ztz=ztz, zty=zty,
+            yty=self.yty + other.yty, n=self.n + other.n, source=self.source, added_at=self.added_at,
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "batch_id": self.batch_id,
+            "rows": self.n,
+            "suburbs": len(self.suburbs),
+            "source": self.source,
+            "added_at": self.added_at,
+        }
+
+
+def _solve_arrowhead(cov: np.ndarray, cross: np.ndarray, counts: np.ndarray, n: float) -> np.ndarray | None:
+    """
+    Minimum-norm solution of the centred normal equations in O(suburbs), using
+    their structure: the suburb block is diag(counts) - counts countsᵀ / n.
+
+    Its only null direction is "all suburb coefficients + c" (the one-hots sum
+    to the intercept). Adding tau * 11ᵀ to that block removes it and forces
+    sum(suburb coefficients) = 0, which is exactly the minimum-norm solution.
+    The block is then diagonal + rank 2, so it is inverted with the Woodbury
+    identity, and only a numerics-sized Schur complement is solved densely.
+    Numeric columns with no variance get coefficient 0 (as the pseudo-inverse
+    gives them). Returns None if the system has any other degeneracy
+    (e.g. bedrooms determined by suburb); the caller then uses pinv.
+    """
+    q = len(NUMERIC_FEATURES)
+    A, B, r_x, r_o = cov[:q, :q], cov[:q, q:], cross[:q], cross[q:]
+    scale = max(float(np.abs(np.diag(cov)).max(initial=0.0)), 1.0)
+    live = np.diag(A) > RCOND * scale
+    A, B, r_x = A[np.ix_(live, live)], B[live], r_x[live]
+
+    tau = n / len(counts)
+    U = np.column_stack([counts, np.ones_like(counts)])
+    Du = U / counts[:, None]
+    core = np.diag([-n, 1.0 / tau]) + U.T @ Du
+
+    def e_inv(V: np.ndarray) -> np.ndarray:
+        # (diag(counts) - counts countsᵀ/n + tau 11ᵀ)⁻¹ V
+        DV = V / (counts[:, None] if V.ndim == 2 else counts)
+        return DV - Du @ np.linalg.solve(core, U.T @ DV)
+
+    Ei_Bt = e_inv(B.T)
+    Ei_r = e_inv(r_o)
+    schur = A - B @ Ei_Bt
+    if schur.size:
+        eig = np.linalg.eigvalsh(schur)
+        if eig.min() <= RCOND * scale * 1e3:
+            return None
+        beta = np.linalg.solve(schur, r_x - B @ Ei_r)
+    else:
+        beta = np.zeros(0)
+    coef = np.zeros(len(cross))
+    coef[:q][live] = beta
+    coef[q:] = Ei_r - Ei_Bt @ beta
+    return coef
+
+
+def batch_id_for(rows: pd.DataFrame) -> str:
+    """Content-derived id, so uploading the same rows twice is detected."""
+    data = rows[TRAINING_COLUMNS].to_csv(index=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+class IncrementalTrainer:
+    def __init__(self, path: str | Path = STATS_PATH, batch_dir: str | Path = BATCH_DIR):
+        self.path = Path(path)
+        self.batch_dir = Path(batch_dir)
+        self.batches: Dict[str, BatchStats] = {}
+        self._rebuild()
+
+    # ---------- Global statistics ----------
+    def _rebuild(self) -> None:
+        self.suburbs: List[str] = []
+        self._pos: Dict[str, int] = {}
+        k = 1 + len(NUMERIC_FEATURES)
+        self.ztz = np.zeros((k, k))
+        self.zty = np.zeros(k)
+        self.yty = 0.0
+        self.n = 0
+        for batch in self.batches.values():
+            self._accumulate(batch)
+
+    def _grow(self, suburbs: List[str]) -> None:
+        new = [s for s in suburbs if s not in self._pos]
+        if not new:
+            return
+        for s in new:
+            self._pos[s] = len(self.suburbs)
+            self.suburbs.append(s)
+        size = self.ztz.shape[0] + len(new)
+        ztz = np.zeros((size, size))
+        ztz[: self.ztz.shape[0], : self.ztz.shape[0]] = self.ztz
+        self.ztz = ztz
+        self.zty = np.concatenate([self.zty, np.zeros(len(new))])
+
+    def _accumulate(self, batch: BatchStats) -> None:
+        self._grow(batch.suburbs)
+        k = 1 + len(NUMERIC_FEATURES)
+        idx = np.array(list(range(k)) + [k + self._pos[s] for s in batch.suburbs])
+        self.ztz[np.ix_(idx, idx)] += batch.ztz
+        self.zty[idx] += batch.zty
+        self.yty += batch.yty
+        self.n += batch.n
+
+    # ---------- Batches ----------
+    def add_batch(self, rows: pd.DataFrame, batch_id: str | None = None, source: str = "") -> BatchStats:
+        """Fold prepared training rows (see TRAINING_COLUMNS) into the statistics."""
+        if rows.empty:
+            raise ValueError("No usable training rows in this batch.")
+        batch = self.add_stats(BatchStats.from_rows(batch_id or batch_id_for(rows), rows, source))
+        self.batch_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self._rows_path(batch.batch_id), rows[TRAINING_COLUMNS].to_csv(index=False).encode("utf-8"))
+        return batch
+
+    def add_stats(self, batch: BatchStats) -> BatchStats:
+        """
+        Fold precomputed statistics in without storing rows (e.g. a batch streamed
+        from the database). Such batches cannot be checked by a full refit.
+        """
+        if batch.batch_id in self.batches:
+            raise ValueError(f"Batch '{batch.batch_id}' has already been added.")
+        self._accumulate(batch)
+        self.batches[batch.batch_id] = batch
+        return batch
+
+    def remove_batch(self, batch_id: str) -> BatchStats:
+        """Drop a batch; the global sums are rebuilt from the remaining batches (no drift)."""
+        batch = self.batches.pop(batch_id)  # KeyError for unknown ids
+        self._rebuild()
+        self._rows_path(batch_id).unlink(missing_ok=True)
+        return batch
+
+    def reset(self) -> None:
+        self.batches.clear()
+        self._rebuild()
+        shutil.rmtree(self.batch_dir, ignore_errors=True)
+
+    def _rows_path(self, batch_id: str) -> Path:
+        return self.batch_dir / f"{batch_id}.csv"
+
+    def has_rows(self, batch_id: str) -> bool:
+        return self._rows_path(batch_id).exists()
+
+    def batch_rows(self, batch_id: str) -> pd.DataFrame:
+        return pd.read_csv(self._rows_path(batch_id), dtype={"suburb": str})
+
+    # ---------- Solving ----------
+    def solve(self) -> Tuple[LinearModel, FeatureManifest, float]:
+        """
+        Return (model, manifest, training MSE). Columns follow the full-refit
+        order: numerics, then suburb one-hots sorted by label.
+        """
+        if self.n == 0:
+            raise ValueError("No training rows: add a batch first.")
+        k = 1 + len(NUMERIC_FEATURES)
+        active = sorted(s for s in self.suburbs if self.ztz[0, k + self._pos[s]] > 0)
+        idx = np.array(list(range(k)) + [k + self._pos[s] for s in active])
+        ztz = self.ztz[np.ix_(idx, idx)]
+        zty = self.zty[idx]
+
+        n = ztz[0, 0]
+        mean_x = ztz[0, 1:] / n
+        mean_y = zty[0] / n
+        cov = ztz[1:, 1:] - n * np.outer(mean_x, mean_x)
+        cross = zty[1:] - n * mean_x * mean_y
+        coef = _solve_arrowhead(cov, cross, ztz[0, k:], n)
+        if coef is None:
+            coef = np.linalg.pinv(cov, rcond=RCOND, hermitian=True) @ cross
+        intercept = float(mean_y - mean_x @ coef)
+
+        columns = list(NUMERIC_FEATURES) + [f"{SUBURB_PREFIX}{s}" for s in active]
+        model = LinearModel(coef, intercept, columns, estimator="sklearn.linear_model.LinearRegression")
+
+        w = np.concatenate([[intercept], coef])
+        sse = self.yty - 2.0 * (w @ zty) + w @ ztz @ w
+        return model, FeatureManifest.from_columns(columns), max(float(sse), 0.0) / n
+
+    # ---------- Persistence ----------
+    def save(self) -> None:
+        arrays: Dict[str, Any] = {}
+        meta = []
+        for i, batch in enumerate(self.batches.values()):
+            arrays[f"b{i}_ztz"] = batch.ztz
+            arrays[f"b{i}_zty"] = batch.zty
+            meta.append({
+                "batch_id": batch.batch_id, "suburbs": batch.suburbs, "yty": batch.yty,
+                "n": batch.n, "source": batch.source, "added_at": batch.added_at,
+            })
+        arrays["meta"] = np.array(json.dumps({"numeric": NUMERIC_FEATURES, "batches": meta}))
+        buf = io.BytesIO()
+        np.savez(buf, **arrays)
+        atomic_write_bytes(self.path, buf.getvalue())
+
+    @classmethod
+    def load(cls, path: str | Path = STATS_PATH, batch_dir: str | Path = BATCH_DIR) -> "IncrementalTrainer":
+        """Load persisted statistics; a missing file gives an empty trainer."""
+        trainer = cls(path, batch_dir)
+        if not trainer.path.exists():
+            return trainer
+        with np.load(trainer.path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("numeric") != NUMERIC_FEATURES:
+                raise ValueError("Saved training statistics use a different feature layout.")
+            for i, m in enumerate(meta["batches"]):
+                trainer.batches[m["batch_id"]] = BatchStats(
+                    batch_id=m["batch_id"], suburbs=list(m["suburbs"]),
+                    ztz=data[f"b{i}_ztz"], zty=data[f"b{i}_zty"], yty=float(m["yty"]),
+                    n=int(m["n"]), source=m.get("source", ""), added_at=m.get("added_at", ""),
+                )
+        trainer._rebuild()
+        return trainer
+
+    def fingerprint(self) -> str:
+        """Identifies the training data behind the current statistics."""
+        parts = sorted((b.batch_id, b.n, repr(b.yty)) for b in self.batches.values())
+        return hashlib.sha256(json.dumps(parts).encode("utf-8")).hexdigest()[:16]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "rows": self.n,
+            "suburbs": len(self.suburbs),
+            "batches": [b.summary() for b in self.batches.values()],
+        }
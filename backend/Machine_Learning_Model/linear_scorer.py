@@ -0,0 +1,94 @@
+# backend/Machine_Learning_Model/linear_scorer.py
+"""
+Pandas-free fast path for linear models.
+
+At load time the fitted coef_/intercept_ are split into per-feature weights and
+a suburb -> coefficient table, so a prediction is a few multiply-adds plus one
+dict lookup. Non-linear estimators get no scorer and use the normal path.
+
+LinearModel is the sklearn-compatible predictor rebuilt from a saved artifact
+(coefficients may be a read-only memmap shared between workers); it accepts
+dense or scipy sparse input.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Mapping, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest, INVALID_SUBURBS, normalize_suburb
+
+
+class LinearModel:
+    """Minimal stand-in for a fitted sklearn linear regressor: predict(X) = X @ coef + intercept."""
+
+    def __init__(self, coef: np.ndarray, intercept: float, feature_names: List[str] | None = None,
+                 estimator: str = "LinearModel"):
+        self.coef_ = coef
+        self.intercept_ = float(intercept)
+        self.n_features_in_ = int(coef.shape[0])
+        if feature_names is not None:
+            self.feature_names_in_ = np.array(feature_names, dtype=object)
+        self.estimator = estimator          # class the coefficients were fitted with
+
+    def predict(self, X: Any) -> np.ndarray:
+        names = getattr(self, "feature_names_in_", None)
+        if names is not None and hasattr(X, "columns") and list(X.columns) != list(names):
+            raise ValueError("The feature names should match those that were passed during fit.")
+        if sp.issparse(X):
+            if X.shape[1] != self.n_features_in_:
+                raise ValueError(f"X has {X.shape[1]} features, but the model expects {self.n_features_in_}.")
+            return np.asarray(X @ self.coef_, dtype=float).ravel() + self.intercept_
+        X = np.asarray(X, dtype=float)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but the model expects {self.n_features_in_}.")
+        return X @ self.coef_ + self.intercept_
+
+
+def is_linear(model: Any) -> bool:
+    return isinstance(model, LinearModel) or type(model).__module__.startswith("sklearn.linear_model")
+
+
+class LinearScorer:
+    __slots__ = ("intercept", "weights", "suburb_offsets", "manifest")
+
+    def __init__(self, intercept: float, weights: Tuple[Tuple[str, float], ...],
+                 suburb_offsets: Dict[str, float], manifest: FeatureManifest):
+        self.intercept = intercept
+        self.weights = weights                  # ((feature, coef), ...) for numeric features
+        self.suburb_offsets = suburb_offsets    # normalised suburb -> its one-hot coefficient
+        self.manifest = manifest
+
+    @classmethod
+    def from_arrays(cls, coef: np.ndarray, intercept: float, manifest: FeatureManifest) -> "LinearScorer":
+        coef = np.asarray(coef, dtype=float).ravel()
+        weights = tuple((col, float(coef[i])) for col, i in manifest.numeric_index.items())
+        offsets = {name: float(coef[i]) for name, i in manifest.suburb_index.items()}
+        return cls(float(intercept), weights, offsets, manifest)
+
+    @classmethod
+    def from_model(cls, model: Any, manifest: FeatureManifest | None) -> "LinearScorer | None":
+        """Compile a scorer for sklearn linear models; None means 'use model.predict'."""
+        if manifest is None or not is_linear(model):
+            return None
+        coef = getattr(model, "coef_", None)
+        intercept = getattr(model, "intercept_", None)
+        if coef is None or intercept is None:
+            return None
+        coef = np.asarray(coef, dtype=float)
+        intercept = np.asarray(intercept, dtype=float)
+        if coef.ndim != 1 or coef.shape[0] != len(manifest.columns) or intercept.size != 1:
+            return None
+        return cls.from_arrays(coef, float(intercept.ravel()[0]), manifest)
+
+    def score(self, row: Mapping[str, Any]) -> float:
+        """Predict rent for one input row (bedrooms, bathrooms, floor_area, suburb)."""
+        suburb = normalize_suburb(row.get("suburb", ""))
+        offset = self.suburb_offsets.get(suburb)
+        if offset is None or suburb in INVALID_SUBURBS:
+            raise ValueError(f"Suburb '{suburb}' was not seen during training.")
+        total = self.intercept + offset
+        for col, w in self.weights:
+            total += w * FeatureManifest.numeric_value(row, col)
+        return total
@@ -0,0 +1,218 @@
+# backend/Machine_Learning_Model/model_artifacts.py
+"""
+Versioned on-disk model artifacts.
+
+    artifacts/
+        CURRENT                 <- name of the version being served (atomic replace)
+        <version>/manifest.json <- features, kind, intercept, metrics, training data hash, timestamps
+        <version>/coef.npy      <- linear models: float64 coefficients, memory-mapped on load
+        <version>/model.joblib  <- any other estimator (pickle, needs its library to load)
+
+Linear models load without unpickling or importing scikit-learn, and every
+worker maps the same coef.npy pages from the OS cache. A version directory is
+written under a temp name and renamed into place, so readers only ever see
+complete versions. The newest `keep` versions stay on disk; rollback() just
+repoints CURRENT.
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearModel, is_linear
+
+ARTIFACTS_DIR = Path(__file__).with_name("artifacts")
+KEEP_VERSIONS = int(os.getenv("MODEL_ARTIFACTS_KEEP", "5"))
+FORMAT_VERSION = 1
+POINTER = "CURRENT"
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> None:
+    """Write bytes to a temp file in the same directory, fsync, then os.replace()."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _linear_parts(model: Any) -> Tuple[np.ndarray, float] | None:
+    if not is_linear(model):
+        return None
+    coef = getattr(model, "coef_", None)
+    intercept = getattr(model, "intercept_", None)
+    if coef is None or intercept is None:
+        return None
+    coef = np.asarray(coef, dtype=float)
+    intercept = np.asarray(intercept, dtype=float)
+    if coef.ndim != 1 or intercept.size != 1:
+        return None
+    return coef, float(intercept.ravel()[0])
+
+
+class ArtifactStore:
+    def __init__(self, root: str | Path = ARTIFACTS_DIR, keep: int = KEEP_VERSIONS):
+        self.root = Path(root)
+        self.keep = keep
+
+    @property
+    def pointer_path(self) -> Path:
+        return self.root / POINTER
+
+    # ---------- Writing ----------
+    def save(self, model: Any, manifest: FeatureManifest | None = None, *,
+             metrics: Dict[str, Any] | None = None, training_data_hash: str | None = None) -> str:
+        """
+        Write a new version (if not already on disk), point CURRENT at it and prune. Returns the version.
+        Saving a version that exists with other metrics or training data hash updates its manifest.json
+        (values not given are kept).
+        """
+        files: Dict[str, bytes] = {}
+        meta: Dict[str, Any] = {
+            "format_version": FORMAT_VERSION,
+            "estimator": getattr(model, "estimator", None) or f"{type(model).__module__}.{type(model).__name__}",
+            "features": list(manifest.columns) if manifest is not None else None,
+        }
+        parts = _linear_parts(model)
+        if parts is not None:
+            coef, intercept = parts
+            buf = io.BytesIO()
+            np.save(buf, np.ascontiguousarray(coef, dtype="<f8"))
+            files["coef.npy"] = buf.getvalue()
+            meta.update(kind="linear", intercept=intercept)
+        else:
+            import joblib
+            buf = io.BytesIO()
+            joblib.dump(model, buf)
+            files["model.joblib"] = buf.getvalue()
+            meta["kind"] = "pickle"
+
+        # Version = content hash of what determines predictions (not metrics/timestamps)
+        h = hashlib.sha256(json.dumps(meta, sort_keys=True).encode("utf-8"))
+        for name in sorted(files):
+            h.update(name.encode("utf-8"))
+            h.update(files[name])
+        version = h.hexdigest()[:16]
+
+        target = self.root / version
+        if not (target / "manifest.json").exists():
+            meta.update(
+                version=version,
+                created_at=datetime.utcnow().isoformat(timespec="microseconds"),
+                metrics=metrics or {},
+                training_data_hash=training_data_hash,
+            )
+            files["manifest.json"] = json.dumps(meta, indent=2).encode("utf-8")
+            self._write_version_dir(target, files)
+        else:
+            self._update_meta(version, metrics, training_data_hash)
+
+        self.set_current(version)
+        self.prune()
+        return version
+
+    def _update_meta(self, version: str, metrics: Dict[str, Any] | None, training_data_hash: str | None) -> None:
+        """Same model saved again: rewrite manifest.json (atomically) if the metrics or data hash given differ."""
+        meta = self.read_meta(version)
+        given = {"metrics": metrics, "training_data_hash": training_data_hash}
+        fresh = json.loads(json.dumps({k: v for k, v in given.items() if v is not None}))
+        if all(meta.get(k) == v for k, v in fresh.items()):
+            return
+        meta.update(fresh, updated_at=datetime.utcnow().isoformat(timespec="microseconds"))
+        atomic_write_bytes(self.root / version / "manifest.json", json.dumps(meta, indent=2).encode("utf-8"))
+
+    def _write_version_dir(self, target: Path, files: Dict[str, bytes]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.root, prefix=f".{target.name}.", suffix=".tmp"))
+        try:
+            for name, data in files.items():
+                with open(tmp / name, "wb") as fh:
+                    fh.write(data)
+                    fh.flush()
+                    os.fsync(fh.fileno())
+            try:
+                os.rename(tmp, target)
+            except OSError:
+                if not (target / "manifest.json").exists():
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)  # another publisher wrote the same version
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def set_current(self, version: str) -> None:
+        atomic_write_bytes(self.pointer_path, version.encode("utf-8"))
+
+    def rollback(self, version: str) -> None:
+        """Serve an older version again. KeyError if it is not on disk."""
+        if not (self.root / version / "manifest.json").exists():
+            raise KeyError(version)
+        self.set_current(version)
+
+    def prune(self) -> None:
+        """Keep the newest `keep` versions (and always the current one)."""
+        if self.keep <= 0:
+            return
+        current = self.current_version()
+        for meta in self.versions()[self.keep:]:
+            if meta["version"] != current:
+                shutil.rmtree(self.root / meta["version"], ignore_errors=True)
+
+    # ---------- Reading ----------
+    def current_version(self) -> str | None:
+        try:
+            return self.pointer_path.read_text(encoding="utf-8").strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read_meta(self, version: str) -> Dict[str, Any]:
+        return json.loads((self.root / version / "manifest.json").read_text(encoding="utf-8"))
+
+    def load(self, version: str) -> Tuple[Any, FeatureManifest | None, Dict[str, Any]]:
+        """Return (model, feature manifest, metadata) for a saved version."""
+        directory = self.root / version
+        meta = self.read_meta(version)
+        manifest = None
+        if meta.get("features"):
+            manifest = FeatureManifest.from_columns(meta["features"])
+            manifest.model_version = version
+        if meta["kind"] == "linear":
+            coef = np.load(directory / "coef.npy", mmap_mode="r")
+            model = LinearModel(coef, meta["intercept"], meta.get("features"), estimator=meta.get("estimator"))
+        else:
+            import joblib
+            model = joblib.load(directory / "model.joblib")
+        return model, manifest, meta
+
+    def versions(self) -> List[Dict[str, Any]]:
+        """Metadata of every saved version, newest first."""
+        if not self.root.exists():
+            return []
+        out = []
+        for d in self.root.iterdir():
+            if d.is_dir() and not d.name.startswith(".") and (d / "manifest.json").exists():
+                try:
+                    out.append(self.read_meta(d.name))
+                except (OSError, ValueError):
+                    continue
+        return sorted(out, key=lambda m: m.get("created_at", ""), reverse=True)
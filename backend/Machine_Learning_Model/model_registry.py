@@ -0,0 +1,215 @@
+# backend/Machine_Learning_Model/model_registry.py
+"""
+In-process registry for the trained rental price model.
+
+- Models live in the versioned artifact store (artifacts/<version>/, see
+  model_artifacts); the CURRENT pointer names the version to serve. Linear
+  models load from a memory-mapped coef.npy, so workers share the pages and
+  never unpickle anything.
+- A legacy rental_model.pkl is still served when no artifact has been
+  published yet (its manifest is rental_model.features.json, trusted only when
+  saved for the same model version).
+- current() hands out an immutable snapshot; a request keeps using the snapshot
+  it started with, so in-flight predictions finish on the old model.
+- Changes made by other processes (retrain worker, other API workers, a
+  rollback) are picked up by a cheap os.stat() of the pointer, throttled by
+  `check_interval`.
+- If CURRENT names a version that cannot be loaded (missing, pruned), the
+  loaded snapshot keeps being served; the legacy pickle only when none is.
+- Linear models also get a compiled LinearScorer (pandas-free fast path).
+- subscribe() registers callbacks run after every swap (e.g. cache invalidation).
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearScorer
+from Machine_Learning_Model.model_artifacts import ArtifactStore, atomic_write_bytes  # noqa: F401 (re-exported)
+
+logger = logging.getLogger(__name__)
+
+# Legacy model path (pickles written before the artifact store existed)
+MODEL_PATH = Path(__file__).with_name("rental_model.pkl")
+
+
+@dataclass(frozen=True)
+class ModelSnapshot:
+    model: Any
+    version: str                      # first 16 hex chars of the artifact's sha256
+    path: Path
+    manifest: FeatureManifest | None = None
+    scorer: LinearScorer | None = None   # None for non-linear models
+    metadata: Dict[str, Any] = field(default_factory=dict)   # artifact manifest.json (empty for legacy pickles)
+    loaded_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def _content_version(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def _make_snapshot(model: Any, version: str, path: Path, manifest: FeatureManifest | None,
+                   metadata: Dict[str, Any] | None = None) -> ModelSnapshot:
+    return ModelSnapshot(
+        model=model, version=version, path=path, manifest=manifest,
+        scorer=LinearScorer.from_model(model, manifest), metadata=metadata or {},
+    )
+
+
+class ModelRegistry:
+    def __init__(self, path: str | Path = MODEL_PATH, *, artifacts: ArtifactStore | None = None,
+                 check_interval: float = 1.0):
+        self.path = Path(path)
+        self.manifest_path = self.path.with_suffix(".features.json")
+        self.artifacts = artifacts or ArtifactStore(self.path.parent / "artifacts")
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: ModelSnapshot | None = None
+        self._stat_key: Tuple | None = None
+        self._last_check = 0.0
+        self._listeners: List[Callable[[ModelSnapshot], None]] = []
+
+    def subscribe(self, callback: Callable[[ModelSnapshot], None]) -> None:
+        """Call `callback(new_snapshot)` whenever a different model version is swapped in."""
+        self._listeners.append(callback)
+
+    def _notify(self, previous: ModelSnapshot | None, snapshot: ModelSnapshot | None) -> None:
+        if snapshot is None or (previous is not None and previous.version == snapshot.version):
+            return
+        for callback in list(self._listeners):
+            callback(snapshot)
+
+    # ---------- Reading ----------
+    def current(self) -> ModelSnapshot | None:
+        """
+        Return the snapshot to serve. Reloads only when the CURRENT pointer (or
+        legacy pickle) has changed since the last load (checked at most every
+        `check_interval` seconds).
+        """
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._last_check < self.check_interval:
+            return self._snapshot
+
+        with self._lock:
+            previous = self._snapshot
+            self._last_check = now
+            key = self._source_key()
+            if key is None:
+                return self._snapshot
+            if self._snapshot is None or key != self._stat_key:
+                self._load_locked()
+            snapshot = self._snapshot
+        self._notify(previous, snapshot)
+        return snapshot
+
+    def refresh(self) -> ModelSnapshot | None:
+        """Re-check the artifact now, ignoring the throttle (e.g. after a worker process published)."""
+        self._last_check = float("-inf")
+        return self.current()
+
+    def _source_key(self) -> Tuple | None:
+        for kind, path in (("artifact", self.artifacts.pointer_path), ("pickle", self.path)):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return (kind, st.st_ino, st.st_size, st.st_mtime_ns)
+        return None
+
+    def _load_locked(self) -> None:
+        # Read from one open handle so the bytes and the stat key belong to the
+        # same inode, even if a publisher replaces the path meanwhile.
+        try:
+            with open(self.artifacts.pointer_path, "rb") as fh:
+                st = os.fstat(fh.fileno())
+                version = fh.read().decode("utf-8").strip()
+        except FileNotFoundError:
+            self._load_legacy_locked()
+            return
+        self._stat_key = ("artifact", st.st_ino, st.st_size, st.st_mtime_ns)
+        if self._snapshot is not None and self._snapshot.version == version:
+            return  # pointer rewritten with the same version: keep the loaded object
+        try:
+            model, manifest, meta = self.artifacts.load(version)
+        except Exception:
+            # Missing or pruned version: keep serving what is loaded (retried when the pointer changes)
+            logger.exception("[MODEL] Cannot load version %s named by CURRENT", version)
+            if self._snapshot is None and self.path.exists():
+                key = self._stat_key
+                self._load_legacy_locked()
+                self._stat_key = key
+            return
+        self._snapshot = _make_snapshot(model, version, self.artifacts.root / version, manifest, meta)
+
+    def _load_legacy_locked(self) -> None:
+        import joblib
+
+        with open(self.path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            data = fh.read()
+        version = _content_version(data)
+        self._stat_key = ("pickle", st.st_ino, st.st_size, st.st_mtime_ns)
+        if self._snapshot is not None and self._snapshot.version == version:
+            return  # touched but identical content: keep the loaded object
+        model = joblib.load(io.BytesIO(data))
+        self._snapshot = _make_snapshot(model, version, self.path, self._load_manifest(model, version))
+
+    def _load_manifest(self, model: Any, version: str) -> FeatureManifest | None:
+        try:
+            manifest = FeatureManifest.load(self.manifest_path)
+        except (OSError, ValueError, KeyError):
+            manifest = None
+        if manifest is None or manifest.model_version != version:
+            # Missing or stale (e.g. legacy pickle): fall back to the fitted column names
+            manifest = FeatureManifest.from_model(model)
+            if manifest is not None:
+                manifest.model_version = version
+        return manifest
+
+    # ---------- Writing ----------
+    def publish(self, model: Any, manifest: FeatureManifest | None = None, *,
+                metrics: Dict[str, Any] | None = None, training_data_hash: str | None = None) -> ModelSnapshot:
+        """
+        Save a newly trained model as a new artifact version, point CURRENT at
+        it and start serving it. The served object is loaded back from the
+        artifact, so this process runs exactly what other workers will map.
+        """
+        manifest = manifest or FeatureManifest.from_model(model)
+        with self._lock:
+            previous = self._snapshot
+            version = self.artifacts.save(model, manifest, metrics=metrics, training_data_hash=training_data_hash)
+            self._swap_locked(version)
+            snapshot = self._snapshot
+        self._notify(previous, snapshot)
+        return snapshot
+
+    def rollback(self, version: str) -> ModelSnapshot:
+        """Serve a previously published version again (KeyError if it was pruned)."""
+        with self._lock:
+            previous = self._snapshot
+            self.artifacts.rollback(version)
+            self._swap_locked(version)
+            snapshot = self._snapshot
+        self._notify(previous, snapshot)
+        return snapshot
+
+    def _swap_locked(self, version: str) -> None:
+        st = os.stat(self.artifacts.pointer_path)
+        self._stat_key = ("artifact", st.st_ino, st.st_size, st.st_mtime_ns)
+        if self._snapshot is None or self._snapshot.version != version:
+            model, manifest, meta = self.artifacts.load(version)
+            self._snapshot = _make_snapshot(model, version, self.artifacts.root / version, manifest, meta)
+        self._last_check = time.monotonic()
+
+
+# Shared instance used by the API and the retrain flow
+registry = ModelRegistry()
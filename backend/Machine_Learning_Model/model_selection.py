@@ -0,0 +1,206 @@
+# backend/Machine_Learning_Model/model_selection.py
+"""
+Model selection for full retrains.
+
+- Every candidate estimator is cross-validated (K folds) on the training split;
+  all (candidate, fold) fits, plus one fit per candidate on the whole split,
+  run in parallel across cores (joblib).
+- Inference latency is then measured one candidate at a time (nothing else
+  running) on the path the API would use: LinearScorer.score for linear models,
+  encoding the row and calling model.predict otherwise, plus one batch predict.
+- The candidate with the lowest CV MSE whose single-row p99 fits the budget is
+  promoted; if none fits, the fastest one is. The comparison table is returned
+  so it can be stored in the artifact's metrics.
+"""
+from __future__ import annotations
+
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import Lasso, LinearRegression, Ridge
+from sklearn.metrics import mean_squared_error
+from sklearn.model_selection import KFold
+from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from Machine_Learning_Model.feature_manifest import SUBURB_PREFIX, FeatureManifest
+from Machine_Learning_Model.batch_predict import predict_one
+from Machine_Learning_Model.linear_scorer import LinearScorer
+
+P99_BUDGET_MS = float(os.getenv("MODEL_SELECTION_P99_MS", "5"))
+CV_FOLDS = int(os.getenv("MODEL_SELECTION_FOLDS", "5"))
+N_JOBS = int(os.getenv("MODEL_SELECTION_JOBS", "-1"))
+# lsqr tolerance for LinearRegression on sparse input: the 1e-6 default stops
+# far from the least-squares solution once there are thousands of one-hot columns
+LINEAR_TOL = 1e-12
+LATENCY_SAMPLES = 200     # timed single-row predictions per candidate
+BATCH_ROWS = 1000         # rows in the timed batch predict
+
+
+def default_candidates() -> Dict[str, Any]:
+    return {
+        "linear": LinearRegression(tol=LINEAR_TOL),
+        "ridge": Ridge(alpha=1.0),
+        "lasso": Lasso(alpha=0.1, max_iter=10000),
+        "gradient_boosting": GradientBoostingRegressor(random_state=42),
+        # distances need comparable scales (floor_area vs one-hots); no centring keeps X sparse
+        "knn": make_pipeline(StandardScaler(with_mean=False), KNeighborsRegressor(n_neighbors=5)),
+    }
+
+
+def _take(X: Any, idx) -> Any:
+    """Rows of a DataFrame or a scipy sparse matrix by position."""
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+
+def _estimator_name(estimator: Any) -> str:
+    """Class of the estimator that predicts: the last step of a pipeline (scaler + KNN -> KNeighborsRegressor)."""
+    steps = getattr(estimator, "steps", None)
+    return type(steps[-1][1] if steps else estimator).__name__
+
+
+def _fit(name: str, estimator: Any, X: Any, y: np.ndarray, train_idx, test_idx):
+    """One parallel task: a CV fold (returns its MSE) or, with test_idx None, the final fit."""
+    try:
+        model = clone(estimator).fit(_take(X, train_idx), y[train_idx])
+        if test_idx is None:
+            return name, None, model, None
+        return name, float(mean_squared_error(y[test_idx], model.predict(_take(X, test_idx)))), None, None
+    except Exception as e:
+        return name, None, None, f"{type(e).__name__}: {e}"
+
+
+def _row_dicts(X: Any, manifest: FeatureManifest) -> List[Dict[str, Any]]:
+    """API-style inputs (bedrooms, bathrooms, floor_area, suburb) for the encoded rows."""
+    X = sp.csr_matrix(X.to_numpy(dtype=float) if hasattr(X, "iloc") else X)
+    suburb_pos = [i for i, c in enumerate(manifest.columns) if c.startswith(SUBURB_PREFIX)]
+    numeric = X[:, list(manifest.numeric_index.values())].toarray()
+    if suburb_pos:
+        labels = np.asarray(X[:, suburb_pos].argmax(axis=1)).ravel()
+    else:
+        labels = np.zeros(X.shape[0], dtype=int)
+    return [
+        {**dict(zip(manifest.numeric_index, values)),
+         "suburb": manifest.columns[suburb_pos[label]][len(SUBURB_PREFIX):] if suburb_pos else ""}
+        for values, label in zip(numeric.tolist(), labels)
+    ]
+
+
+def _percentile_ms(samples_ns: List[int], q: float) -> float:
+    return float(np.percentile(samples_ns, q)) / 1e6
+
+
+def measure_latency(model: Any, X: Any, manifest: FeatureManifest,
+                    samples: int = LATENCY_SAMPLES, batch_rows: int = BATCH_ROWS) -> Dict[str, Any]:
+    """Single-row p50/p99 (ms) on the serving path, and batch time for `batch_rows` rows."""
+    n = X.shape[0]
+    scorer = LinearScorer.from_model(model, manifest)
+    inputs = _row_dicts(_take(X, np.arange(samples) % n), manifest)
+    if scorer is not None:
+        call: Callable[[int], Any] = lambda i: scorer.score(inputs[i])
+        path = "scorer"
+    else:
+        # what /predict does for other models: encode the row, predict on it
+        snapshot = SimpleNamespace(model=model, manifest=manifest)
+        call = lambda i: predict_one(snapshot, inputs[i])
+        path = "predict"
+
+    call(0)  # warm-up
+    timings = []
+    for i in range(samples):
+        t0 = time.perf_counter_ns()
+        call(i)
+        timings.append(time.perf_counter_ns() - t0)
+
+    batch = _take(X, np.arange(batch_rows) % n)
+    batch_ns = []
+    for _ in range(3):
+        t0 = time.perf_counter_ns()
+        model.predict(batch)
+        batch_ns.append(time.perf_counter_ns() - t0)
+    batch_ms = min(batch_ns) / 1e6
+
+    return {
+        "path": path,
+        "single_p50_ms": round(_percentile_ms(timings, 50), 4),
+        "single_p99_ms": round(_percentile_ms(timings, 99), 4),
+        "batch_rows": batch_rows,
+        "batch_ms": round(batch_ms, 3),
+        "batch_us_per_row": round(1000 * batch_ms / batch_rows, 3),
+    }
+
+
+def select_model(X: Any, y: Any, manifest: FeatureManifest, *,
+                 candidates: Dict[str, Any] | None = None, budget_ms: float = P99_BUDGET_MS,
+                 folds: int = CV_FOLDS, n_jobs: int = N_JOBS,
+                 progress: Callable[[str], None] | None = None) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Compare `candidates` on (X, y) and return (winner fitted on all of X, selection report).
+    X is the encoded training matrix (scipy sparse, or a DataFrame with the manifest's columns).
+    Candidates that fail to fit are listed with their error and never promoted.
+    """
+    candidates = candidates or default_candidates()
+    if hasattr(X, "iloc"):
+        X = X.reset_index(drop=True)
+    y = np.asarray(y, dtype=float)
+    n = X.shape[0]
+    splits = list(KFold(n_splits=max(2, min(folds, n)), shuffle=True, random_state=42).split(np.arange(n)))
+    everything = np.arange(n)
+
+    if progress is not None:
+        progress(f"cross-validating {len(candidates)} candidates")
+    tasks = [delayed(_fit)(name, est, X, y, tr, te) for name, est in candidates.items() for tr, te in splits]
+    tasks += [delayed(_fit)(name, est, X, y, everything, None) for name, est in candidates.items()]
+    results = Parallel(n_jobs=n_jobs)(tasks)
+
+    fold_mse: Dict[str, List[float]] = {name: [] for name in candidates}
+    fitted: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for name, mse, model, error in results:
+        if error is not None:
+            errors.setdefault(name, error)
+        elif model is not None:
+            fitted[name] = model
+        else:
+            fold_mse[name].append(mse)
+
+    if progress is not None:
+        progress("measuring inference latency")
+    table = []
+    for name in candidates:
+        if name in errors or name not in fitted:
+            table.append({"name": name, "error": errors.get(name, "not fitted")})
+            continue
+        table.append({
+            "name": name,
+            "estimator": _estimator_name(candidates[name]),
+            "cv_mse": round(float(np.mean(fold_mse[name])), 4),
+            "cv_mse_std": round(float(np.std(fold_mse[name])), 4),
+            **measure_latency(fitted[name], X, manifest),
+        })
+
+    usable = [row for row in table if "error" not in row]
+    if not usable:
+        raise ValueError("No candidate model could be fitted: " + "; ".join(f"{k}: {v}" for k, v in errors.items()))
+    within = [row for row in usable if row["single_p99_ms"] <= budget_ms]
+    winner = min(within, key=lambda r: r["cv_mse"]) if within else min(usable, key=lambda r: r["single_p99_ms"])
+    for row in table:
+        row["within_budget"] = "error" not in row and row["single_p99_ms"] <= budget_ms
+        row["selected"] = row["name"] == winner["name"]
+
+    report = {
+        "selected": winner["name"],
+        "budget_p99_ms": budget_ms,
+        "budget_met": bool(within),
+        "folds": len(splits),
+        "candidates": table,
+    }
+    return fitted[winner["name"]], report
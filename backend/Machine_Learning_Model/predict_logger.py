@@ -1,34 +1,259 @@
+import atexit
 import csv
+import glob
+import gzip
+import io
+import logging
 import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # File where predictions will be stored and saved
 LOG_FILE = os.path.join(os.path.dirname(__file__), "prediction_logs.csv")
 
-def log_prediction(input_data: dict, prediction: float, user_id: str = "anonymous"):
+# Fixed column layout (same order /predict has always written)
+FIELDNAMES = ["timestamp", "user_id", "bedrooms", "bathrooms", "floor_area", "suburb", "prediction"]
+
+# Tunables (env overrides so they can be changed per deployment)
+BATCH_SIZE = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", "256"))
+FLUSH_INTERVAL = float(os.getenv("PREDICTION_LOG_FLUSH_SECONDS", "1.0"))
+MAX_BYTES = int(os.getenv("PREDICTION_LOG_MAX_BYTES", str(50 * 1024 * 1024)))
+SEGMENT_FORMAT = os.getenv("PREDICTION_LOG_SEGMENTS", "csv")  # csv | csv.gz | parquet
+SEGMENT_GRACE = float(os.getenv("PREDICTION_LOG_SEGMENT_GRACE_SECONDS", "60"))
+
+
+class PredictionLogWriter:
     """
-    Logs prediction input, result, timestamp, and user ID to a CSV file.
+    Background writer for the prediction audit log.
+
+    - log calls only enqueue rows, so request handlers never touch the disk
+    - a worker thread flushes in batches (every `batch_size` rows or `flush_interval` seconds)
+    - each batch is one O_APPEND write, so rows from concurrent workers never interleave
+    - the active file rolls over by size or at the first write of a new day; rolled
+      segments are named after their first entry's timestamp and stay CSV or are
+      compressed to csv.gz / parquet (parquet needs pyarrow)
+    - a segment is compressed at a later rotation, once it is no longer the newest and
+      has not been written for `segment_grace` seconds: another process may have opened
+      the active file just before the rename and still append to it
+    - close() drains everything still queued (also registered with atexit)
     """
-    timestamp = datetime.now().isoformat()
 
-    # Create one full row for logging
-    log_entry = {
-        "timestamp": timestamp,
-        "user_id": user_id,
-        **input_data,
-        "prediction": prediction
-    }
+    _STOP = object()
+
+    def __init__(self, path=LOG_FILE, *, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_bytes=MAX_BYTES, segment_format=SEGMENT_FORMAT, segment_grace=SEGMENT_GRACE):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.segment_format = segment_format
+        self.segment_grace = segment_grace
+        if segment_format == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                logger.warning("[PREDICT-LOG] pyarrow not installed; rolled segments will be csv.gz")
+                self.segment_format = "csv.gz"
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.rows_written = 0
+
+    # ---------- Producer side ----------
+    def submit(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        if self._closed:
+            self._write(rows)  # after shutdown: write inline rather than lose rows
+            return
+        self._ensure_started()
+        self._queue.put(rows)
+
+    def flush(self, timeout: float | None = None) -> None:
+        """Block until everything queued so far is on disk."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self, timeout: float | None = 10.0) -> None:
+        """Drain the queue and stop the worker thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+                self._thread.start()
+
+    # ---------- Worker thread ----------
+    def _run(self) -> None:
+        pending: list[dict] = []
+        deadline = None
+        while True:
+            timeout = self.flush_interval if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is self._STOP:
+                self._write(pending)
+                return
+            if isinstance(item, threading.Event):
+                self._write(pending)
+                pending, deadline = [], None
+                item.set()
+                continue
+            if item:
+                pending.extend(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if pending and (len(pending) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(pending)
+                pending, deadline = [], None
+
+    def _write(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        try:
+            self._maybe_rotate()
+            buf = io.StringIO()
+            writer = csv.DictWriter(buf, fieldnames=FIELDNAMES, extrasaction="ignore")
+            writer.writerows(rows)
+            body = buf.getvalue().encode("utf-8")
 
-    # Check if log file already exists
-    file_exists = os.path.isfile(LOG_FILE)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            try:
+                # Only the process that creates the file writes the header
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o644)
+                header = io.StringIO()
+                csv.DictWriter(header, fieldnames=FIELDNAMES).writeheader()
+                body = header.getvalue().encode("utf-8") + body
+            except FileExistsError:
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND)
+            try:
+                os.write(fd, body)
+            finally:
+                os.close(fd)
+            self.rows_written += len(rows)
+        except Exception:
+            logger.exception("[PREDICT-LOG] Failed to write %d prediction log rows", len(rows))
 
-    # Open log file and write row
-    with open(LOG_FILE, mode="a", newline="") as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=log_entry.keys())
+    # ---------- Rotation ----------
+    def _maybe_rotate(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        last_write = datetime.fromtimestamp(st.st_mtime).date()
+        if st.st_size < self.max_bytes and last_write == datetime.now().date():
+            return
 
-        # Write header only once (if file is new)
-        if not file_exists:
-            writer.writeheader()
+        # Named after the first entry it holds, so a log rolled just after midnight is filed under its own day
+        root, ext = os.path.splitext(self.path)
+        stem = f"{root}-{self._first_entry_time(st).strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        rolled, n = f"{stem}{ext}", 0
+        while any(os.path.exists(p) for p in (rolled, rolled + ".gz", os.path.splitext(rolled)[0] + ".parquet")):
+            n += 1
+            rolled = f"{stem}-{n}{ext}"
+        try:
+            os.rename(self.path, rolled)
+        except FileNotFoundError:
+            return  # another worker rotated it first
+        self._compress_segments(latest=rolled)
+
+    def _first_entry_time(self, st: os.stat_result) -> datetime:
+        """Timestamp of the active file's first row, or its mtime if that cannot be read."""
+        try:
+            with open(self.path, newline="", encoding="utf-8") as fh:
+                first = next(csv.DictReader(fh), None)
+            if first and first.get("timestamp"):
+                return datetime.fromisoformat(first["timestamp"])
+        except (OSError, ValueError, csv.Error):
+            pass
+        return datetime.fromtimestamp(st.st_mtime)
+
+    def _compress_segments(self, latest: str) -> None:
+        """Compress the CSV segments other than `latest` that are past the grace period."""
+        if self.segment_format == "csv":
+            return
+        root, ext = os.path.splitext(self.path)
+        cutoff = time.time() - self.segment_grace
+        for segment in glob.glob(f"{glob.escape(root)}-*{ext}"):
+            if segment == latest:
+                continue
+            claimed = segment + ".compressing"
+            try:
+                if os.path.getmtime(segment) > cutoff:
+                    continue
+                os.rename(segment, claimed)  # one worker wins the segment
+            except FileNotFoundError:
+                continue  # compressed by another worker
+            self._compress_segment(claimed, segment)
+
+    def _compress_segment(self, claimed: str, segment: str) -> None:
+        try:
+            if self.segment_format == "csv.gz":
+                with open(claimed, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+            elif self.segment_format == "parquet":
+                import pandas as pd
+                pd.read_csv(claimed).to_parquet(os.path.splitext(segment)[0] + ".parquet", compression="zstd")
+            os.remove(claimed)
+        except Exception:
+            logger.exception("[PREDICT-LOG] Could not compress rolled segment %s", segment)
+            os.replace(claimed, segment)  # keep it as CSV; retried at the next rotation
+
+
+# Shared writer used by /predict and /predict/batch
+_writer = PredictionLogWriter()
+atexit.register(_writer.close)
+
+
+def get_writer() -> PredictionLogWriter:
+    return _writer
+
+
+def log_prediction(input_data: dict, prediction: float, user_id: str = "anonymous"):
+    """
+    Logs prediction input, result, timestamp, and user ID to a CSV file.
+    Non-blocking: the row is queued for the background writer.
+    """
+    log_predictions([input_data], [prediction], user_id)
+
+
+def log_predictions(inputs: list[dict], predictions, user_id: str = "anonymous"):
+    """
+    Batched version of log_prediction: same row layout, queued as one unit
+    (used by /predict/batch).
+    """
+    timestamp = datetime.now().isoformat()
 
-        # Write the actual row
-        writer.writerow(log_entry)
+    # Create one full row per prediction
+    log_entries = [
+        {
+            "timestamp": timestamp,
+            "user_id": user_id,
+            **input_data,
+            "prediction": prediction
+        }
+        for input_data, prediction in zip(inputs, predictions)
+    ]
+    _writer.submit(log_entries)
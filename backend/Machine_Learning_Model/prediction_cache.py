@@ -0,0 +1,94 @@
+# backend/Machine_Learning_Model/prediction_cache.py
+"""
+Bounded LRU + TTL cache in front of /predict scoring.
+
+Keys are the normalised input plus the model version, so a newly published
+model can never serve a stale answer; the registry also clears the cache on
+every swap to free the memory straight away.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Tuple
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest, normalize_suburb
+
+DEFAULT_MAXSIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+DEFAULT_TTL_SECONDS = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+
+
+class PredictionCache:
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    @staticmethod
+    def make_key(version: str, row: Mapping[str, Any]) -> Tuple:
+        return (
+            version,
+            int(row["bedrooms"]),
+            int(row["bathrooms"]),
+            round(FeatureManifest.numeric_value(row, "floor_area"), 4),
+            normalize_suburb(row["suburb"]),
+        )
+
+    def get(self, key: Hashable) -> float | None:
+        if self.maxsize <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at < now:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: float) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, *_: Any) -> None:
+        """Drop every entry (called by the model registry when a new model is swapped in)."""
+        with self._lock:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared instance used by /predict
+prediction_cache = PredictionCache()
@@ -0,0 +1,82 @@
+# backend/Machine_Learning_Model/properties_source.py
+"""
+Training source backed by the `properties` table.
+
+Rows are streamed with a server-side cursor (stream_results / yield_per) and
+each chunk is reduced straight to sufficient statistics, so memory stays at
+one chunk no matter how many listings have been ingested.
+"""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Iterator
+
+import pandas as pd
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from Machine_Learning_Model.feature_manifest import DEFAULT_FLOOR_AREA
+from Machine_Learning_Model.incremental_trainer import BatchStats, TRAINING_COLUMNS
+
+CHUNK_ROWS = int(os.getenv("TRAINING_CHUNK_ROWS", "50000"))
+
+
+@dataclass
+class PropertyFilter:
+    source: str | None = None          # Property.source (provider), exact match
+    since: datetime | None = None      # created_at >= since
+    until: datetime | None = None      # created_at < until
+
+    def describe(self) -> str:
+        parts = [f"{k}={v}" for k, v in (("source", self.source), ("since", self.since), ("until", self.until)) if v]
+        return "properties" + (f" ({', '.join(parts)})" if parts else "")
+
+
+def iter_property_chunks(engine: Engine, filters: PropertyFilter | None = None,
+                         chunk_size: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Yield training rows (TRAINING_COLUMNS) from `properties`, `chunk_size` rows at a time."""
+    try:
+        from models import Property
+    except ModuleNotFoundError:
+        from backend.models import Property
+
+    filters = filters or PropertyFilter()
+    stmt = (
+        select(Property.bedrooms, Property.bathrooms, Property.floor_area, Property.suburb, Property.rent_weekly)
+        .where(Property.rent_weekly.is_not(None), Property.suburb.is_not(None))
+    )
+    if filters.source:
+        stmt = stmt.where(Property.source == filters.source)
+    if filters.since:
+        stmt = stmt.where(Property.created_at >= filters.since)
+    if filters.until:
+        stmt = stmt.where(Property.created_at < filters.until)
+
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_size).execute(stmt)
+        for part in result.partitions():
+            df = pd.DataFrame.from_records(part, columns=TRAINING_COLUMNS)
+            # Numeric columns arrive as Decimal; missing floor_area gets the same default as inference
+            numeric = ["bedrooms", "bathrooms", "floor_area", "rent_price"]
+            df[numeric] = df[numeric].astype(float)
+            df["floor_area"] = df["floor_area"].fillna(DEFAULT_FLOOR_AREA)
+            df["suburb"] = df["suburb"].astype(str).str.strip()
+            yield df[df["suburb"] != ""]
+
+
+def stats_from_properties(engine: Engine, filters: PropertyFilter | None = None,
+                          chunk_size: int = CHUNK_ROWS, batch_id: str = "base",
+                          progress: Callable[[str], None] | None = None) -> BatchStats | None:
+    """Reduce the (filtered) table to one BatchStats; None if no rows matched."""
+    filters = filters or PropertyFilter()
+    stats: BatchStats | None = None
+    for chunk in iter_property_chunks(engine, filters, chunk_size):
+        if chunk.empty:
+            continue
+        part = BatchStats.from_rows(batch_id, chunk, filters.describe())
+        stats = part if stats is None else stats.merge(part)
+        if progress is not None:
+            progress(f"streaming properties ({stats.n} rows)")
+    return stats
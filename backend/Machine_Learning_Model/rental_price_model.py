@@ -1,57 +1,24 @@
-import os
-import joblib
+import numpy as np
 import pandas as pd
-from pathlib import Path
 
 from data_processing.cleaner import prepare_features
+from data_processing.dataset_cache import read_current_dataset
+from Machine_Learning_Model.model_registry import registry
+from Machine_Learning_Model.feature_manifest import DEFAULT_FLOOR_AREA, FeatureManifest, normalize_suburb
 
-# Trained model path
-MODEL_PATH = os.path.join("Machine_Learning_Model", "rental_model.pkl")
 
-
-def _pick_dataset_path() -> Path | None:
-    """
-    Choose MockData.xlsx or MockData.csv from data_processing (prefer the most
-    recently modified file). This keeps prediction in sync with retraining.
-    """
-    data_dir = Path("data_processing")
-    xlsx = data_dir / "MockData.xlsx"
-    csvp = data_dir / "MockData.csv"
-
-    if xlsx.exists() and csvp.exists():
-        return xlsx if xlsx.stat().st_mtime >= csvp.stat().st_mtime else csvp
-    if xlsx.exists():
-        return xlsx
-    if csvp.exists():
-        return csvp
-    return None
-
-
-def _read_dataset(path: Path) -> pd.DataFrame:
-    ext = path.suffix.lower()
-    if ext == ".xlsx":
-        return pd.read_excel(path)
-    if ext == ".csv":
-        return pd.read_csv(path)
-    raise ValueError(f"Unsupported dataset extension: {ext}")
-
-
-# Load the trained model from disk
+# Return the in-memory model (loaded once by the registry, reloaded on publish)
 def load_model():
-    if not os.path.exists(MODEL_PATH):
-        return None
-    return joblib.load(MODEL_PATH)
+    snapshot = registry.current()
+    return snapshot.model if snapshot else None
 
 
-# Dynamically extract the suburb one-hot columns used during training
+# Legacy fallback: rebuild the suburb one-hot columns from the current dataset.
+# Only used when the served model has no feature manifest.
 def get_model_suburb_columns_from_data():
     try:
-        ds = _pick_dataset_path()
-        if not ds:
-            return []
-
-        df = _read_dataset(ds)
-        if "Suburb" not in df.columns:
+        _, df = read_current_dataset()
+        if df is None or "Suburb" not in df.columns:
             return []
 
         # Clean & normalize suburb names before building dummies
@@ -66,12 +33,18 @@ def get_model_suburb_columns_from_data():
 
 
 # Convert incoming input into a model-compatible DataFrame
-def prepare_input_dataframe(input_data):
+def prepare_input_dataframe(input_data, manifest: FeatureManifest | None = None):
+    if manifest is None:
+        snapshot = registry.current()
+        manifest = snapshot.manifest if snapshot else None
+    if manifest is not None:
+        return _input_from_manifest(input_data.dict(), manifest)
+
     df = pd.DataFrame([input_data.dict()])
 
     # Assign default floor_area if missing
     if "floor_area" not in df.columns:
-        df["floor_area"] = 100
+        df["floor_area"] = DEFAULT_FLOOR_AREA
 
     # Columns used during training, derived from current dataset (csv/xlsx)
     all_suburb_columns = get_model_suburb_columns_from_data()
@@ -85,3 +58,19 @@ def prepare_input_dataframe(input_data):
     df = df.reindex(columns=expected_columns, fill_value=0)
 
     return df
+
+
+def _input_from_manifest(row: dict, manifest: FeatureManifest) -> pd.DataFrame:
+    """
+    Build the one-row model input from the training manifest: numeric values go
+    in their columns and the suburb flag is set via a dict lookup (no file I/O).
+    """
+    idx = manifest.suburb_position(row.get("suburb", ""))
+    if idx is None:
+        raise ValueError(f"Suburb '{normalize_suburb(row.get('suburb', ''))}' was not seen during training.")
+
+    values = np.zeros(len(manifest.columns), dtype=float)
+    for col, i in manifest.numeric_index.items():
+        values[i] = manifest.numeric_value(row, col)
+    values[idx] = 1.0
+    return pd.DataFrame([values], columns=manifest.columns)
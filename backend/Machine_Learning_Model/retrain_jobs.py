@@ -0,0 +1,262 @@
+# backend/Machine_Learning_Model/retrain_jobs.py
+"""
+Background retraining jobs for /retrain-model and /upload-data.
+
+- trigger() returns a job id straight away; training runs in one worker process
+  (ProcessPoolExecutor, max_workers=1), so requests never wait for the Excel
+  parse / fit and two retrains can never overlap.
+- Triggers that arrive while a job is running are merged into a single queued
+  follow-up job: a full refit absorbs further full-refit triggers, and
+  incremental uploads are collected and solved/published once.
+- Job state is a small JSON file per job (retrain_jobs/<id>.json, atomic writes),
+  so any API worker can answer status queries; the worker process updates
+  `stage` as training progresses.
+- The worker publishes the model through the registry (atomic replace); the API
+  process re-checks the registry as soon as the job finishes.
+"""
+from __future__ import annotations
+
+import io
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = Path(__file__).with_name("retrain_jobs")
+KEEP_JOBS = int(os.getenv("RETRAIN_JOBS_KEEP", "200"))
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def _job_path(jobs_dir: Path, job_id: str) -> Path:
+    return Path(jobs_dir) / f"{job_id}.json"
+
+
+def read_job(jobs_dir: Path, job_id: str) -> Dict[str, Any] | None:
+    try:
+        return json.loads(_job_path(jobs_dir, job_id).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_job(jobs_dir: Path, state: Dict[str, Any]) -> None:
+    from Machine_Learning_Model.model_registry import atomic_write_bytes
+    atomic_write_bytes(_job_path(jobs_dir, state["job_id"]), json.dumps(state, indent=2).encode("utf-8"))
+
+
+# ---------- Worker process ----------
+def _read_upload(filename: str, raw: bytes):
+    import pandas as pd
+    if filename.lower().endswith(".xlsx"):
+        return pd.read_excel(io.BytesIO(raw))
+    return pd.read_csv(io.BytesIO(raw))
+
+
+def run_retrain(jobs_dir: str, job_id: str, full: bool, uploads: List[Tuple[str, bytes]],
+                properties: Dict[str, Any] | None = None, select: bool = False) -> Dict[str, Any]:
+    """
+    Job body, executed in the worker process. Never raises: returns
+    {"metrics": {...}, "rejected": [...], "error": str | None}.
+    A full refit reads MockData, or streams the properties table when
+    `properties` (filters + chunk_size) is given. `select` runs model selection
+    on a MockData refit.
+    """
+    from Machine_Learning_Model.retrain_model import (
+        REQUIRED_COLUMNS, MISSING_COLUMNS_ERROR, train_from_properties, train_full, train_incremental,
+    )
+    from Machine_Learning_Model.properties_source import PropertyFilter
+
+    def progress(stage: str) -> None:
+        state = read_job(Path(jobs_dir), job_id)
+        if state is not None:
+            state["stage"] = stage
+            _write_job(Path(jobs_dir), state)
+
+    result: Dict[str, Any] = {"metrics": {}, "rejected": [], "error": None}
+    try:
+        if full and properties is not None:
+            filters = PropertyFilter(
+                source=properties.get("source"),
+                since=datetime.fromisoformat(properties["since"]) if properties.get("since") else None,
+                until=datetime.fromisoformat(properties["until"]) if properties.get("until") else None,
+            )
+            result["metrics"]["full"] = train_from_properties(filters, properties.get("chunk_size"), progress=progress)
+        elif full:
+            result["metrics"]["full"] = train_full(progress, select=select)
+
+        batches = []
+        if uploads:
+            progress("reading uploads")
+        for filename, raw in uploads:
+            try:
+                df = _read_upload(filename, raw)
+            except Exception as e:
+                result["rejected"].append({"filename": filename, "error": f"Could not read file: {e}"})
+                continue
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
+                result["rejected"].append({"filename": filename, "error": MISSING_COLUMNS_ERROR})
+                continue
+            batches.append((df, None, filename))
+        if batches:
+            result["metrics"]["incremental"] = train_incremental(batches, progress)
+    except Exception as e:
+        logger.exception("[RETRAIN] Job %s failed", job_id)
+        result["error"] = str(e)
+    return result
+
+
+# ---------- API process ----------
+@dataclass
+class _Job:
+    job_id: str
+    full: bool = False
+    properties: Dict[str, Any] | None = None   # full refit from the properties table (filters)
+    select: bool = False                       # full refit with model selection
+    uploads: List[Tuple[str, bytes]] = field(default_factory=list)
+    triggers: int = 1
+    created_at: str = field(default_factory=_now)
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def state(self, status: str, **extra: Any) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": status,
+            "stage": extra.pop("stage", status),
+            "full": self.full,
+            "training_source": ("properties" if self.properties is not None else "mockdata") if self.full else None,
+            "properties": self.properties,
+            "model_selection": self.select,
+            "uploads": [{"filename": name, "bytes": len(raw)} for name, raw in self.uploads],
+            "triggers": self.triggers,
+            "created_at": self.created_at,
+            **extra,
+        }
+
+
+class RetrainJobManager:
+    def __init__(self, jobs_dir: str | Path = JOBS_DIR, *, executor: Executor | None = None,
+                 runner: Callable[..., Dict[str, Any]] = run_retrain,
+                 on_finished: Callable[[Dict[str, Any]], None] | None = None):
+        self.jobs_dir = Path(jobs_dir)
+        self._executor = executor
+        self._runner = runner
+        self._on_finished = on_finished
+        # re-entrant: a future that is already done runs its callback inside submit's caller
+        self._lock = threading.RLock()
+        self._running: _Job | None = None
+        self._pending: _Job | None = None
+        self._jobs: Dict[str, _Job] = {}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            # spawn: the API process has threads (log writer, thread pool); forking them is unsafe
+            self._executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def trigger(self, full: bool = False, upload: Tuple[str, bytes] | None = None,
+                properties: Dict[str, Any] | None = None, select: bool = False) -> Tuple[Dict[str, Any], bool]:
+        """
+        Queue a retrain. Returns (job state, merged) where merged is True when the
+        trigger was folded into an already queued follow-up job. `properties`
+        makes a full refit stream the properties table with those filters;
+        `select` makes it compare candidate estimators.
+        """
+        with self._lock:
+            if self._running is None:
+                job = self._new_job(full, upload, properties, select)
+                self._start_locked(job)
+                return self.get(job.job_id), False
+
+            if self._pending is None:
+                self._pending = self._new_job(full, upload, properties, select)
+                _write_job(self.jobs_dir, self._pending.state("queued"))
+                return self.get(self._pending.job_id), False
+
+            job = self._pending
+            if full:
+                # the latest full-refit trigger decides the training source and mode
+                job.full, job.properties, job.select = True, properties, select
+            if upload is not None:
+                job.uploads.append(upload)
+            job.triggers += 1
+            _write_job(self.jobs_dir, job.state("queued"))
+            return self.get(job.job_id), True
+
+    def _new_job(self, full: bool, upload: Tuple[str, bytes] | None, properties: Dict[str, Any] | None,
+                 select: bool) -> _Job:
+        job = _Job(job_id=uuid.uuid4().hex[:12], full=full, properties=properties if full else None,
+                   select=select and full, uploads=[upload] if upload else [])
+        self._jobs[job.job_id] = job
+        return job
+
+    def _start_locked(self, job: _Job) -> None:
+        self._running = job
+        started_at = _now()
+        _write_job(self.jobs_dir, job.state("running", started_at=started_at))
+        future = self._get_executor().submit(
+            self._runner, str(self.jobs_dir), job.job_id, job.full, list(job.uploads), job.properties, job.select,
+        )
+        future.add_done_callback(lambda f: self._finished(job, started_at, f))
+
+    def _finished(self, job: _Job, started_at: str, future: Future) -> None:
+        try:
+            result = future.result()
+        except Exception as e:  # worker crashed (e.g. BrokenProcessPool)
+            result = {"metrics": {}, "rejected": [], "error": f"Retrain worker failed: {e}"}
+
+        status = "failed" if result.get("error") else "succeeded"
+        state = job.state(
+            status, started_at=started_at, finished_at=_now(),
+            metrics=result.get("metrics", {}), rejected=result.get("rejected", []), error=result.get("error"),
+        )
+        job.uploads = []  # release the upload bytes
+        _write_job(self.jobs_dir, state)
+        logger.info("[RETRAIN] Job %s %s", job.job_id, status)
+
+        if self._on_finished is not None:
+            try:
+                self._on_finished(state)
+            except Exception:
+                logger.exception("[RETRAIN] on_finished callback failed for job %s", job.job_id)
+
+        with self._lock:
+            self._running = None
+            self._jobs.pop(job.job_id, None)
+            job.done.set()
+            if self._pending is not None:
+                follow_up, self._pending = self._pending, None
+                self._start_locked(follow_up)
+        self._prune()
+
+    def get(self, job_id: str) -> Dict[str, Any] | None:
+        return read_job(self.jobs_dir, job_id)
+
+    def wait(self, job_id: str, timeout: float | None = None) -> Dict[str, Any] | None:
+        """Block until the job has finished (or timeout) and return its state."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return self.get(job_id)
+
+    def _prune(self) -> None:
+        try:
+            files = sorted(self.jobs_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for old in files[:-KEEP_JOBS] if KEEP_JOBS > 0 else []:
+                old.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
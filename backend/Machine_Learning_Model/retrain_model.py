@@ -1,111 +1,328 @@
 # backend/Machine_Learning_Model/retrain_model.py
 import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+import numpy as np
 import pandas as pd
-import joblib
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
 
+from data_processing.dataset_cache import pick_dataset_path, read_dataset
+from Machine_Learning_Model.model_registry import registry
+from Machine_Learning_Model.model_selection import LINEAR_TOL, select_model
+from Machine_Learning_Model.feature_manifest import DEFAULT_FLOOR_AREA, FeatureManifest
+from Machine_Learning_Model.incremental_trainer import IncrementalTrainer, STATS_PATH, TRAINING_COLUMNS, batch_id_for
+from Machine_Learning_Model.properties_source import CHUNK_ROWS as PROPERTIES_CHUNK_ROWS, stats_from_properties
 
-def _pick_dataset_path() -> Path | None:
+try:
+    import fcntl  # POSIX only; on Windows the in-process lock is all we get
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+REQUIRED_COLUMNS = ['Bedrooms', 'Bathrooms', 'Suburb', 'Weekly Rent ($NZD)']
+MISSING_COLUMNS_ERROR = (
+    "Error: One or more required columns are missing from the dataset. "
+    "Expected: Bedrooms, Bathrooms, Suburb, Weekly Rent ($NZD)."
+)
+
+# Serialises changes to the incremental training statistics, across threads and
+# processes (retraining runs in a worker process while the API can remove batches)
+STATS_LOCK_PATH = STATS_PATH.with_suffix(".lock")
+_stats_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _stats_lock():
+    with _stats_thread_lock:
+        STATS_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(STATS_LOCK_PATH, "a") as fh:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            yield
+
+
+def prepare_training_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Standardise a raw dataset into training rows
+    (bedrooms, bathrooms, floor_area, suburb, rent_price).
+    """
+    df = df.copy()
+    df.rename(
+        columns={
+            'Bedrooms': 'bedrooms',
+            'Bathrooms': 'bathrooms',
+            'Suburb': 'suburb',
+            'Weekly Rent ($NZD)': 'rent_price',
+        },
+        inplace=True,
+    )
+
+    # Clean rows
+    df.dropna(subset=['bedrooms', 'bathrooms', 'rent_price', 'suburb'], inplace=True)
+
+    # Provide default floor_area if missing
+    if 'floor_area' not in df.columns:
+        df['floor_area'] = DEFAULT_FLOOR_AREA
+
+    return df[TRAINING_COLUMNS]
+
+
+def encode_training_matrix(rows: pd.DataFrame):
     """
-    Look for MockData.xlsx or MockData.csv under backend/data_processing.
-    If both exist, use the one most recently modified.
+    Fit the suburb encoder on the rows and return (X as scipy CSR, y, manifest).
+    Column order is the same as encode_training_rows.
     """
-    data_dir = Path("data_processing")
-    xlsx = data_dir / "MockData.xlsx"
-    csvp = data_dir / "MockData.csv"
+    manifest = FeatureManifest.fit(rows['suburb'])
+    return manifest.training_matrix(rows), rows['rent_price'].to_numpy(dtype=float), manifest
 
-    if xlsx.exists() and csvp.exists():
-        return xlsx if xlsx.stat().st_mtime >= csvp.stat().st_mtime else csvp
-    if xlsx.exists():
-        return xlsx
-    if csvp.exists():
-        return csvp
-    return None
 
+def encode_training_rows(rows: pd.DataFrame):
+    """Dense one-hot encoding (reference path for verification). Returns (X, y, feature_cols)."""
+    df = pd.get_dummies(rows, columns=['suburb'])
+    feature_cols = ['bedrooms', 'bathrooms', 'floor_area'] + [
+        c for c in df.columns if c.startswith('suburb_')
+    ]
+    return df[feature_cols], df['rent_price'], feature_cols
 
-def _load_dataset(path: Path) -> pd.DataFrame:
+
+class TrainingDataError(ValueError):
+    """The dataset cannot be trained on (missing file/columns); message is user-facing."""
+
+
+def _report(progress, stage: str) -> None:
+    if progress is not None:
+        progress(stage)
+
+
+def train_full(progress=None, select: bool = False) -> dict:
     """
-    Load the dataset from CSV or XLSX based on the file extension.
+    Full refit on the most recent MockData.(xlsx|csv). Publishes the model and
+    returns the training metrics. Raises TrainingDataError for unusable data.
+    With `select`, several estimators are cross-validated and the best one
+    within the inference latency budget is published (see model_selection).
     """
-    ext = path.suffix.lower()
-    if ext == ".csv":
-        return pd.read_csv(path)
-    if ext == ".xlsx":
-        return pd.read_excel(path)  # openpyxl is auto-picked
-    raise ValueError(f"Unsupported dataset extension: {ext}")
+    _report(progress, "loading")
+    src_path = pick_dataset_path()
+    if not src_path:
+        raise TrainingDataError("Error: Neither MockData.xlsx nor MockData.csv found in data_processing/.")
+
+    # Load dataset (parsed once per file content, then served from the columnar cache)
+    df = read_dataset(src_path)
+
+    # Required columns
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise TrainingDataError(MISSING_COLUMNS_ERROR)
+
+    rows = prepare_training_rows(df)
+    X, y, manifest = encode_training_matrix(rows)
+    feature_cols = manifest.columns
+
+    # Train/test split (on row positions: X is a sparse matrix)
+    train_idx, test_idx = train_test_split(np.arange(len(rows)), test_size=0.2, random_state=42)
+    X_train, X_test, y_train, y_test = X[train_idx], X[test_idx], y[train_idx], y[test_idx]
+
+    # Train model (the linear solvers work on the sparse matrix directly)
+    selection = None
+    if select:
+        model, selection = select_model(X_train, y_train, manifest, progress=progress)
+    else:
+        _report(progress, "fitting")
+        model = LinearRegression(tol=LINEAR_TOL)
+        model.fit(X_train, y_train)
+
+    # Evaluate
+    predictions = model.predict(X_test)
+    mse = mean_squared_error(y_test, predictions)
+
+    metrics = {
+        "mode": "full",
+        "mse": float(mse),
+        "source": src_path.name,
+        "rows": len(rows),
+        "train_rows": len(train_idx),
+        "test_rows": len(test_idx),
+        "features": len(feature_cols),
+    }
+    if selection is not None:
+        metrics["model_selection"] = selection
+
+    # Save as a new artifact version (atomic + hot swap for the running API)
+    _report(progress, "publishing")
+    train_rows = rows.iloc[train_idx]
+    snapshot = registry.publish(
+        model, manifest,
+        metrics=metrics, training_data_hash=batch_id_for(train_rows),
+    )
+
+    # Start a new incremental lineage from exactly the rows this model was fitted on
+    # (incremental updates always solve the linear model, whichever one was selected here)
+    with _stats_lock():
+        trainer = IncrementalTrainer()
+        trainer.reset()
+        trainer.add_batch(train_rows, batch_id="base", source=src_path.name)
+        trainer.save()
+
+    return {**metrics, "version": snapshot.version}
+
+
+def train_from_properties(filters=None, chunk_size: int | None = None, engine=None, progress=None) -> dict:
+    """
+    Full refit on listings from the `properties` table, streamed in chunks into
+    sufficient statistics (never one big DataFrame). Publishes the model and
+    starts a new incremental lineage from it. Reports in-sample training MSE.
+    """
+    if engine is None:
+        try:
+            from db import engine
+        except ModuleNotFoundError:
+            from backend.db import engine
+
+    _report(progress, "streaming properties")
+    stats = stats_from_properties(engine, filters, chunk_size or PROPERTIES_CHUNK_ROWS, progress=progress)
+    if stats is None:
+        raise TrainingDataError("Error: No properties with a suburb and weekly rent match the training filters.")
+
+    _report(progress, "fitting")
+    with _stats_lock():
+        trainer = IncrementalTrainer()
+        trainer.reset()
+        trainer.add_stats(stats)
+        model, manifest, mse = trainer.solve()
+        metrics = {
+            "mode": "full",
+            "training_mse": float(mse),
+            "source": stats.source,
+            "rows": stats.n,
+            "features": len(manifest.columns),
+        }
+        _report(progress, "publishing")
+        snapshot = registry.publish(model, manifest, metrics=metrics, training_data_hash=trainer.fingerprint())
+        trainer.save()
+
+    return {**metrics, "version": snapshot.version}
 
 
 def retrain_rent_model():
     """
     Retrain the rental price model using the most recent MockData.(xlsx|csv).
     Accepts either format without changing the upload flow.
+    The incremental training statistics are reset to this model's training rows.
     """
     try:
-        src_path = _pick_dataset_path()
-        if not src_path:
-            return "Error: Neither MockData.xlsx nor MockData.csv found in data_processing/."
-
-        # Load dataset
-        df = _load_dataset(src_path)
-
-        # Required columns
-        required_cols = ['Bedrooms', 'Bathrooms', 'Suburb', 'Weekly Rent ($NZD)']
-        if not all(col in df.columns for col in required_cols):
-            return (
-                "Error: One or more required columns are missing from the dataset. "
-                "Expected: Bedrooms, Bathrooms, Suburb, Weekly Rent ($NZD)."
-            )
-
-        # Standardize column names
-        df = df.copy()
-        df.rename(
-            columns={
-                'Bedrooms': 'bedrooms',
-                'Bathrooms': 'bathrooms',
-                'Suburb': 'suburb',
-                'Weekly Rent ($NZD)': 'rent_price',
-            },
-            inplace=True,
+        m = train_full()
+        return (
+            f"Model retrained and saved successfully! MSE: {m['mse']:.2f} "
+            f"(source: {m['source']}, version: {m['version']})"
         )
+    except TrainingDataError as e:
+        return str(e)
+    except Exception as e:
+        return f"Retraining failed: {str(e)}"
 
-        # Clean rows
-        df.dropna(subset=['bedrooms', 'bathrooms', 'rent_price', 'suburb'], inplace=True)
 
-        # Provide default floor_area if missing
-        if 'floor_area' not in df.columns:
-            df['floor_area'] = 100
+def train_incremental(batches, progress=None) -> dict:
+    """
+    Fold one or more batches of raw rows into the saved training statistics,
+    then solve and publish once. `batches` is a list of (DataFrame, batch_id | None, source).
+    Work is proportional to the new rows only.
+    """
+    prepared = []
+    for df, batch_id, source in batches:
+        if not all(col in df.columns for col in REQUIRED_COLUMNS):
+            raise TrainingDataError(MISSING_COLUMNS_ERROR)
+        prepared.append((prepare_training_rows(df), batch_id, source))
+
+    with _stats_lock():
+        trainer = IncrementalTrainer.load()
+    if not trainer.batches:
+        # No statistics yet (first run / legacy model): bootstrap from the full dataset
+        train_full(progress)
 
-        # One-hot encode suburbs dynamically
-        df = pd.get_dummies(df, columns=['suburb'])
+    _report(progress, "updating statistics")
+    with _stats_lock():
+        trainer = IncrementalTrainer.load()
+        known = set(trainer.suburbs)
+        added = [trainer.add_batch(rows, batch_id=batch_id, source=source) for rows, batch_id, source in prepared]
+        model, manifest, mse = trainer.solve()
+        metrics = {
+            "mode": "incremental",
+            "training_mse": float(mse),
+            "batches": [b.summary() for b in added],
+            "total_rows": trainer.n,
+            "suburbs_added": sorted(set(trainer.suburbs) - known),
+            "features": len(manifest.columns),
+        }
+        _report(progress, "publishing")
+        snapshot = registry.publish(model, manifest, metrics=metrics, training_data_hash=trainer.fingerprint())
+        trainer.save()
 
-        # Features and target
-        feature_cols = ['bedrooms', 'bathrooms', 'floor_area'] + [
-            c for c in df.columns if c.startswith('suburb_')
-        ]
-        X = df[feature_cols]
-        y = df['rent_price']
+    return {**metrics, "version": snapshot.version}
 
-        # Train/test split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
+
+def retrain_incremental(df: pd.DataFrame, batch_id: str | None = None, source: str = "upload"):
+    """
+    Fold a new batch of rows into the saved training statistics and publish the
+    updated linear model.
+    """
+    try:
+        m = train_incremental([(df, batch_id, source)])
+        batch = m["batches"][0]
+        return (
+            f"Model updated incrementally! Training MSE: {m['training_mse']:.2f} "
+            f"(batch: {batch['batch_id']}, rows: {batch['rows']}, total rows: {m['total_rows']}, "
+            f"version: {m['version']})"
         )
+    except TrainingDataError as e:
+        return str(e)
+    except Exception as e:
+        return f"Incremental retraining failed: {str(e)}"
 
-        # Train model
-        model = LinearRegression()
-        model.fit(X_train, y_train)
 
-        # Evaluate
-        predictions = model.predict(X_test)
-        mse = mean_squared_error(y_test, predictions)
+def remove_training_batch(batch_id: str):
+    """Remove a previously added batch and publish the model without it."""
+    with _stats_lock():
+        trainer = IncrementalTrainer.load()
+        if batch_id not in trainer.batches:
+            raise KeyError(batch_id)
+        if len(trainer.batches) == 1:
+            raise ValueError("Cannot remove the only training batch.")
+        trainer.remove_batch(batch_id)
+        model, manifest, mse = trainer.solve()
+        snapshot = registry.publish(
+            model, manifest, training_data_hash=trainer.fingerprint(),
+            metrics={"mode": "remove_batch", "removed": batch_id, "training_mse": float(mse), "total_rows": trainer.n},
+        )
+        trainer.save()
+    return {"removed": batch_id, "training_mse": round(mse, 4), "version": snapshot.version, **trainer.summary()}
 
-        # Save model
-        model_path = Path(__file__).with_name("rental_model.pkl")
-        joblib.dump(model, model_path)
 
-        return f"Model retrained and saved successfully! MSE: {mse:.2f} (source: {src_path.name})"
+def verify_incremental(tolerance: float = 1e-6):
+    """
+    Verification path: refit LinearRegression from scratch on every stored batch
+    and compare its predictions with the incrementally solved model.
+    """
+    with _stats_lock():
+        trainer = IncrementalTrainer.load()
+    if not trainer.batches:
+        raise ValueError("No incremental training statistics saved yet.")
 
-    except Exception as e:
-        return f"Retraining failed: {str(e)}"
+    no_rows = [b for b in trainer.batches if not trainer.has_rows(b)]
+    if no_rows:
+        raise ValueError(f"Batches without stored rows cannot be refit: {', '.join(no_rows)}.")
+
+    rows = pd.concat([trainer.batch_rows(b) for b in trainer.batches], ignore_index=True)
+    X, y, feature_cols = encode_training_rows(rows)
+    full = LinearRegression().fit(X, y)
+    incremental, manifest, _ = trainer.solve()
+
+    diff = np.abs(full.predict(X) - incremental.predict(X[manifest.columns]))
+    max_diff = float(diff.max()) if len(diff) else 0.0
+    return {
+        "rows": len(rows),
+        "columns_match": feature_cols == manifest.columns,
+        "max_abs_diff": max_diff,
+        "ok": feature_cols == manifest.columns and max_diff <= tolerance * max(1.0, float(np.abs(y).max())),
+    }
@@ -1,28 +1,21 @@
 import os
+import sys
 from pathlib import Path
 import pandas as pd
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error
-import joblib
-
-def _pick_dataset_path() -> Path | None:
-    data_dir = Path("data_processing")
-    xlsx = data_dir / "MockData.xlsx"
-    csvp = data_dir / "MockData.csv"
-    if xlsx.exists() and csvp.exists():
-        return xlsx if xlsx.stat().st_mtime >= csvp.stat().st_mtime else csvp
-    if xlsx.exists():
-        return xlsx
-    if csvp.exists():
-        return csvp
-    return None
-
-src = _pick_dataset_path()
+
+from data_processing.dataset_cache import pick_dataset_path, read_dataset
+from Machine_Learning_Model.model_registry import registry
+from Machine_Learning_Model.feature_manifest import DEFAULT_FLOOR_AREA, FeatureManifest
+from Machine_Learning_Model.model_selection import LINEAR_TOL, select_model
+
+src = pick_dataset_path()
 if not src:
     raise SystemExit("No MockData.xlsx or MockData.csv found in data_processing/")
 
-df = pd.read_excel(src) if src.suffix.lower() == ".xlsx" else pd.read_csv(src)
+df = read_dataset(src)
 
 # Rename columns as used in training
 df = df.rename(columns={
@@ -35,20 +28,27 @@ df = df.rename(columns={
 # Basic cleaning
 df = df.dropna(subset=["bedrooms", "bathrooms", "rent_price", "suburb"]).copy()
 if "floor_area" not in df.columns:
-    df["floor_area"] = 100
+    df["floor_area"] = DEFAULT_FLOOR_AREA
 
-# One-hot suburbs
-df = pd.get_dummies(df, columns=["suburb"])
-
-X = df[["bedrooms", "bathrooms", "floor_area"] + [c for c in df.columns if c.startswith("suburb_")]]
-y = df["rent_price"]
+# One-hot suburbs (sparse; the fitted encoder is saved with the model)
+manifest = FeatureManifest.fit(df["suburb"])
+X = manifest.training_matrix(df)
+y = df["rent_price"].to_numpy(dtype=float)
 
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-model = LinearRegression().fit(X_train, y_train)
+metrics = {"mode": "full", "source": src.name, "train_rows": X_train.shape[0], "test_rows": X_test.shape[0]}
+
+# --select: cross-validate the candidate estimators and keep the best one within the latency budget
+if "--select" in sys.argv[1:]:
+    model, metrics["model_selection"] = select_model(X_train, y_train, manifest)
+    for row in metrics["model_selection"]["candidates"]:
+        print(row)
+else:
+    model = LinearRegression(tol=LINEAR_TOL).fit(X_train, y_train)
 mse = mean_squared_error(y_test, model.predict(X_test))
-print(f"Model trained. MSE: {mse:.2f} (source: {src.name})")
+metrics["mse"] = float(mse)
+print(f"Model trained ({type(model).__name__}). MSE: {mse:.2f} (source: {src.name})")
 
-model_path = os.path.join("Machine_Learning_Model", "rental_model.pkl")
-joblib.dump(model, model_path)
-print(f"Model saved to {model_path}")
+snapshot = registry.publish(model, manifest, metrics=metrics)
+print(f"Model saved to {snapshot.path} (version: {snapshot.version})")
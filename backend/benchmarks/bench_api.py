@@ -0,0 +1,289 @@
+# backend/benchmarks/bench_api.py
+"""
+In-process performance benchmark for the MJ Home API.
+
+Runs the FastAPI app through httpx's ASGI transport against throwaway SQLite
+databases, drives the main endpoints at a configurable concurrency / payload size
+and reports throughput and latency percentiles as JSON. A response counts as an
+error when its status is >= 400 or, for /ingest/pipeline, when not every
+transformed row was stored.
+
+Usage (from backend/):
+    python -m benchmarks.bench_api --requests 200 --concurrency 16 --output bench.json
+    python -m benchmarks.bench_api --baseline bench_baseline.json --tolerance 0.25
+
+With --baseline the run exits with status 1 when any scenario's p95 latency or
+throughput regresses past the tolerance.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+SCENARIOS = ["predict", "predict_batch", "properties", "data", "ingest_file", "ingest_pipeline"]
+
+
+# ---------- App bootstrap ----------
+def _boot_app(workdir: Path):
+    """
+    Import the app with DATABASE_URL pointed at a temp SQLite file. The pipeline
+    loader gets a file of its own: its `properties` table has the upload's
+    columns, not the ORM model's.
+    """
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+    os.chdir(BACKEND_DIR)  # the app resolves data_processing/ and static/ relative to backend/
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+
+    import main  # noqa: E402
+    from data_processing import loader
+    from routers import ingest
+    from data_processing.upload_ledger import upload_ledger
+    from Machine_Learning_Model import predict_logger
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)  # one line per request otherwise
+
+    # keep benchmark side effects out of the repo
+    loader.DATABASE_URL = f"sqlite:///{workdir / 'pipeline.db'}"
+    ingest.REPORTS_DIR = workdir / "reports"
+    upload_ledger.directory = workdir / "upload_ledger"
+    predict_logger.get_writer().path = str(workdir / "prediction_logs.csv")
+    return main
+
+
+# ---------- Payloads ----------
+def _listing_rows(n: int, suburbs: List[str], rng: random.Random, first: int = 0) -> List[Dict[str, Any]]:
+    return [
+        {
+            "Property ID": f"B{i:07d}",
+            "Address": f"{i} Bench St",
+            "Suburb": rng.choice(suburbs),
+            "Bedrooms": rng.randint(1, 6),
+            "Bathrooms": rng.randint(1, 3),
+            "Weekly Rent ($NZD)": 300 + i / 100,    # unique -> no duplicates in or across uploads
+            "Days on Market": rng.randint(0, 120),
+        }
+        for i in range(first, first + n)
+    ]
+
+
+def _csv_bytes(rows: List[Dict[str, Any]]) -> bytes:
+    import pandas as pd
+    return pd.DataFrame(rows).to_csv(index=False).encode("utf-8")
+
+
+def _predict_row(suburbs: List[str], rng: random.Random) -> Dict[str, Any]:
+    return {
+        "bedrooms": rng.randint(1, 6),
+        "bathrooms": rng.randint(1, 3),
+        "floor_area": round(rng.uniform(40, 250), 1),
+        "suburb": rng.choice(suburbs),
+    }
+
+
+def _seed_properties(main, n: int, suburbs: List[str], rng: random.Random) -> None:
+    """Seed the ORM properties table (/properties) and the pipeline's (/data) with `n` rows each."""
+    import pandas as pd
+    from data_processing.loader import save_to_db
+    from models import Property
+    now = datetime.now(timezone.utc)
+    with main.SessionLocal.begin() as s:
+        s.query(Property).delete()
+        s.add_all([
+            Property(address=f"{i} Seed Rd", suburb=rng.choice(suburbs), bedrooms=rng.randint(1, 5),
+                     bathrooms=rng.randint(1, 3), floor_area=rng.uniform(40, 250),
+                     rent_weekly=rng.uniform(300, 1200), property_type="House",
+                     created_at=now, updated_at=now)
+            for i in range(n)
+        ])
+    # listing rows 0..n-1; uploads start after them (see _build_requests)
+    if not save_to_db(pd.DataFrame(_listing_rows(n, suburbs, rng)), mode="replace"):
+        raise RuntimeError("Could not seed the pipeline's properties table")
+
+
+def _build_requests(name: str, main, payload_rows: int, rng: random.Random) -> Callable:
+    """Return `make(i) -> (method, url, kwargs)` for a scenario."""
+    suburbs = list(main.ALLOWED_SUBURBS) or ["Manurewa"]
+    limit = max(1, min(payload_rows, 500))
+
+    if name == "predict":
+        return lambda i: ("POST", "/predict", {"json": _predict_row(suburbs, rng)})
+    if name == "predict_batch":
+        body = [_predict_row(suburbs, rng) for _ in range(payload_rows)]
+        return lambda i: ("POST", "/predict/batch", {"json": body})
+    if name == "properties":
+        return lambda i: ("GET", f"/properties?limit={limit}", {})
+    if name == "data":
+        return lambda i: ("GET", f"/data?limit={limit}", {})
+    if name in ("ingest_file", "ingest_pipeline"):
+        # New rows (and bytes) per request, after the seeded ones, so neither the upload
+        # ledger nor the duplicate index answers in place of validating (and, for the
+        # pipeline, storing) them
+        url = "/ingest/file" if name == "ingest_file" else "/ingest/pipeline"
+        return lambda i: ("POST", url, {"files": {
+            "file": ("bench.csv", _csv_bytes(_listing_rows(payload_rows, suburbs, rng, first=(i + 1) * payload_rows)),
+                     "text/csv")
+        }})
+    raise ValueError(f"Unknown scenario: {name}")
+
+
+# ---------- Runner ----------
+def _percentile(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    k = (len(sorted_ms) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(sorted_ms) - 1)
+    return sorted_ms[lo] + (sorted_ms[hi] - sorted_ms[lo]) * (k - lo)
+
+
+def _failed(response) -> bool:
+    """HTTP error, or a pipeline run that did not store every transformed row."""
+    if response.status_code >= 400:
+        return True
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return False
+    body = response.json()
+    if not isinstance(body, dict) or "stage_counts" not in body or "store_error" not in body:
+        return False
+    counts = body["stage_counts"]
+    return body["store_error"] is not None or counts["stored"] != counts["transformed_ok"]
+
+
+async def _run_scenario(app, make, requests: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        async def one(i: int):
+            method, url, kwargs = make(i)
+            t0 = time.perf_counter()
+            r = await client.request(method, url, **kwargs)
+            await r.aread()
+            return (time.perf_counter() - t0) * 1000.0, _failed(r)
+
+        for i in range(warmup):
+            await one(i)
+
+        latencies: List[float] = []
+        errors = 0
+        sem = asyncio.Semaphore(concurrency)
+
+        async def worker(i: int):
+            nonlocal errors
+            async with sem:
+                ms, failed = await one(i)
+                latencies.append(ms)
+                errors += failed
+
+        start = time.perf_counter()
+        # numbered after the warmup requests, so uploads never repeat a warmup payload
+        await asyncio.gather(*(worker(warmup + i) for i in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    lat = sorted(latencies)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "duration_seconds": round(elapsed, 4),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(lat) / len(lat), 3) if lat else 0.0,
+            "p50": round(_percentile(lat, 0.50), 3),
+            "p95": round(_percentile(lat, 0.95), 3),
+            "p99": round(_percentile(lat, 0.99), 3),
+            "max": round(lat[-1], 3) if lat else 0.0,
+        },
+    }
+
+
+def compare_to_baseline(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return human-readable regressions (empty list = pass)."""
+    problems = []
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if cur["latency_ms"]["p95"] > base["latency_ms"]["p95"] * (1 + tolerance):
+            problems.append(f"{name}: p95 {cur['latency_ms']['p95']}ms > baseline {base['latency_ms']['p95']}ms")
+        if cur["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            problems.append(f"{name}: throughput {cur['throughput_rps']} rps < baseline {base['throughput_rps']} rps")
+        if cur["errors"] > base.get("errors", 0):
+            problems.append(f"{name}: {cur['errors']} errors (baseline {base.get('errors', 0)})")
+    return problems
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="In-process MJ Home API benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma-separated subset of: " + ", ".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--payload-rows", type=int, default=100, help="Rows per upload/batch and rows seeded into properties")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression vs baseline (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    # relative to where the command was run, not backend/ (the app chdirs there)
+    output = Path(args.output).resolve() if args.output else None
+    baseline_path = Path(args.baseline).resolve() if args.baseline else None
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory(prefix="mjhome-bench-") as tmp:
+        app_module = _boot_app(Path(tmp))
+        _seed_properties(app_module, args.payload_rows, list(app_module.ALLOWED_SUBURBS) or ["Manurewa"], rng)
+
+        results: Dict[str, Any] = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "payload_rows": args.payload_rows,
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            make = _build_requests(name, app_module, args.payload_rows, rng)
+            results["scenarios"][name] = asyncio.run(
+                _run_scenario(app_module.app, make, args.requests, args.concurrency, args.warmup)
+            )
+            s = results["scenarios"][name]
+            print(f"{name:<16} {s['throughput_rps']:>9} rps  p50={s['latency_ms']['p50']}ms  "
+                  f"p95={s['latency_ms']['p95']}ms  p99={s['latency_ms']['p99']}ms  errors={s['errors']}")
+
+        # write queued prediction logs before the temp dir goes away
+        from Machine_Learning_Model import predict_logger
+        predict_logger.get_writer().flush()
+
+    text = json.dumps(results, indent=2)
+    if output:
+        output.write_text(text, encoding="utf-8")
+
+    if baseline_path:
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        problems = compare_to_baseline(results, baseline, args.tolerance)
+        if problems:
+            print("REGRESSIONS:\n  " + "\n  ".join(problems))
+            return 1
+        print("No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_encoding.py
+"""
+Dense vs sparse suburb encoding for training, as the number of suburbs grows.
+
+For each suburb count the same synthetic rows are trained three ways:
+- dense:       pd.get_dummies + LinearRegression on the DataFrame (the old path)
+- sparse:      FeatureManifest.fit/training_matrix (CSR) + LinearRegression (lsqr)
+- incremental: BatchStats.from_rows (sparse Z) + IncrementalTrainer.solve
+
+and the report gives encode/fit seconds, the size of the training matrix and
+the peak traced allocation, plus the max prediction difference against dense.
+
+Usage (from backend/):
+    python -m benchmarks.bench_encoding --rows 20000 --suburbs 50,200,1000,2000 --output enc.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.linear_model import LinearRegression  # noqa: E402
+
+from Machine_Learning_Model.incremental_trainer import BatchStats, IncrementalTrainer  # noqa: E402
+from Machine_Learning_Model.model_selection import LINEAR_TOL  # noqa: E402
+from Machine_Learning_Model.retrain_model import encode_training_matrix, encode_training_rows  # noqa: E402
+
+
+def _rows(n: int, suburbs: int, rng: np.random.Generator) -> pd.DataFrame:
+    labels = np.array([f"Suburb {i:04d}" for i in range(suburbs)])
+    df = pd.DataFrame({
+        "bedrooms": rng.integers(1, 6, n).astype(float),
+        "bathrooms": rng.integers(1, 4, n).astype(float),
+        "floor_area": rng.uniform(40, 250, n),
+        "suburb": labels[rng.integers(0, suburbs, n)],
+    })
+    offsets = rng.normal(0, 80, suburbs)
+    df["rent_price"] = (250 + 90 * df["bedrooms"] + 35 * df["bathrooms"] + 0.5 * df["floor_area"]
+                        + offsets[rng.integers(0, suburbs, n)] + rng.normal(0, 25, n))
+    return df
+
+
+def _matrix_bytes(X: Any) -> int:
+    if hasattr(X, "memory_usage"):
+        return int(X.memory_usage(index=False, deep=True).sum())
+    return int(X.data.nbytes + X.indices.nbytes + X.indptr.nbytes)
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float, int]:
+    """(result, seconds, peak traced bytes)"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    out = fn()
+    seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return out, seconds, peak
+
+
+def run_case(n: int, suburbs: int, seed: int) -> Dict[str, Any]:
+    rows = _rows(n, suburbs, np.random.default_rng(seed))
+    result: Dict[str, Any] = {"rows": n, "suburbs": suburbs}
+
+    (Xd, yd, cols), enc_d, _ = _timed(lambda: encode_training_rows(rows))
+    dense, fit_d, peak_d = _timed(lambda: LinearRegression().fit(Xd, yd))
+    result["dense"] = {"encode_s": round(enc_d, 4), "fit_s": round(fit_d, 4),
+                       "matrix_mb": round(_matrix_bytes(Xd) / 1e6, 2), "fit_peak_mb": round(peak_d / 1e6, 2)}
+
+    (Xs, ys, manifest), enc_s, _ = _timed(lambda: encode_training_matrix(rows))
+    sparse, fit_s, peak_s = _timed(lambda: LinearRegression(tol=LINEAR_TOL).fit(Xs, ys))
+    result["sparse"] = {"encode_s": round(enc_s, 4), "fit_s": round(fit_s, 4),
+                        "matrix_mb": round(_matrix_bytes(Xs) / 1e6, 2), "fit_peak_mb": round(peak_s / 1e6, 2)}
+
+    def incremental():
+        trainer = IncrementalTrainer(Path("/nonexistent/stats.npz"), Path("/nonexistent/batches"))
+        trainer.add_stats(BatchStats.from_rows("bench", rows))
+        return trainer.solve()[0]
+
+    inc, fit_i, peak_i = _timed(incremental)
+    result["incremental"] = {"fit_s": round(fit_i, 4), "fit_peak_mb": round(peak_i / 1e6, 2)}
+
+    reference = dense.predict(Xd)
+    scale = float(np.abs(reference).max())
+    result["max_rel_diff"] = {
+        "sparse": float(np.abs(sparse.predict(Xs) - reference).max() / scale),
+        "incremental": float(np.abs(inc.predict(Xs) - reference).max() / scale),
+    }
+    assert cols == manifest.columns
+    return result
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Dense vs sparse suburb encoding benchmark")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--suburbs", default="50,200,1000,2000", help="Comma-separated suburb counts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for suburbs in [int(s) for s in args.suburbs.split(",") if s.strip()]:
+        r = run_case(args.rows, suburbs, args.seed)
+        results.append(r)
+        print(f"suburbs={suburbs:<5} dense fit {r['dense']['fit_s']:>8}s {r['dense']['matrix_mb']:>8}MB | "
+              f"sparse fit {r['sparse']['fit_s']:>7}s {r['sparse']['matrix_mb']:>6}MB | "
+              f"incremental {r['incremental']['fit_s']:>7}s | "
+              f"max rel diff {r['max_rel_diff']['sparse']:.1e}/{r['max_rel_diff']['incremental']:.1e}")
+
+    text = json.dumps({"rows": args.rows, "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
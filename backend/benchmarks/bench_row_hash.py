@@ -0,0 +1,96 @@
+# backend/benchmarks/bench_row_hash.py
+"""
+Upload row hashing: version 1 (to_dict + json.dumps + sha256 per row) against
+version 2 (column-wise canonical encoding + sha256 per row, data_processing/row_hash.py).
+
+Each case hashes the same synthetic cleaned upload (text, int, float with blanks,
+bool and free-text columns) both ways and reports seconds, rows/s and speedup.
+
+Usage (from backend/):
+    python -m benchmarks.bench_row_hash --rows 10000,100000,500000 --output hash.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data_processing.row_hash import legacy_record_hash, row_hashes  # noqa: E402
+
+
+def _frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    rent = rng.uniform(300, 1200, n).round(2)
+    rent[rng.random(n) < 0.1] = np.nan
+    return pd.DataFrame({
+        "suburb": rng.choice(["Epsom", "Albany", "Manurewa", "Ponsonby", "Mt Eden"], n).astype(object),
+        "bedrooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n),
+        "floor_area": rng.uniform(40, 250, n).round(1),
+        "weekly_rent": rent,
+        "furnished": rng.random(n) < 0.3,
+        "address": [f"{i} Example Street" for i in range(n)],
+    })
+
+
+def v1_hashes(df: pd.DataFrame) -> List[str]:
+    return [legacy_record_hash(r) for r in df.to_dict(orient="records")]
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_case(n: int, seed: int, repeat: int) -> Dict[str, Any]:
+    df = _frame(n, np.random.default_rng(seed))
+    v1 = _best(lambda: v1_hashes(df), repeat)
+    v2 = _best(lambda: row_hashes(df), repeat)
+    return {
+        "rows": n,
+        "v1_s": round(v1, 4),
+        "v2_s": round(v2, 4),
+        "v1_rows_per_s": int(n / v1),
+        "v2_rows_per_s": int(n / v2),
+        "speedup": round(v1 / v2, 2),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Upload row hashing benchmark (v1 JSON vs v2 column-wise)")
+    parser.add_argument("--rows", default="10000,100000,500000", help="Comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per case")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in [int(s) for s in args.rows.split(",") if s.strip()]:
+        r = run_case(n, args.seed, args.repeat)
+        results.append(r)
+        print(f"rows={n:<8} v1 {r['v1_s']:>8}s ({r['v1_rows_per_s']:>8} rows/s) | "
+              f"v2 {r['v2_s']:>8}s ({r['v2_rows_per_s']:>8} rows/s) | x{r['speedup']}")
+
+    text = json.dumps({"results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# backend/benchmarks/bench_validate.py
+"""
+validate_dataframe: the row-wise reference engine (iterrows) against the
+column-wise engine (data_processing/validate_properties.py).
+
+Each case validates the same synthetic register both ways: text suburbs,
+rents as numbers and "1,200" strings, blank and unparsable cells, fractional
+bedrooms, out-of-range values and repeated rows. It checks that both produce
+the same issues and summary, and reports seconds, rows/s and speedup.
+
+Usage (from backend/):
+    python -m benchmarks.bench_validate --rows 10000,100000,1000000 --output validate.json
+    python -m benchmarks.bench_validate --rows 1000000 --reference-max 100000   # skip the slow engine
+    python -m benchmarks.bench_validate --rows 2000000,5000000 --reference-max 0 --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data_processing.validate_properties import _validate_dataframe_reference, validate_dataframe  # noqa: E402
+
+
+def _frame(n: int, rng: np.random.Generator) -> pd.DataFrame:
+    rent = rng.integers(250, 1500, n).astype(object)
+    commas = rng.random(n) < 0.2
+    rent[commas] = [f"{v:,}" for v in rng.integers(1000, 3000, int(commas.sum()))]
+    rent[rng.random(n) < 0.01] = "call agent"
+    days = rng.integers(0, 120, n).astype(float)
+    days[rng.random(n) < 0.02] = np.nan
+    days[rng.random(n) < 0.005] = 9999
+    beds = rng.integers(1, 6, n).astype(float)
+    beds[rng.random(n) < 0.01] = 2.5
+    suburbs = rng.choice(["Epsom", "Albany", "Manurewa", "Ponsonby", "Mt Eden", None], n, p=[.2, .2, .2, .2, .19, .01])
+    return pd.DataFrame({
+        "Suburb": suburbs.astype(object),
+        "Weekly Rent ($NZD)": rent,
+        "Days on Market": days,
+        "Bedrooms": beds,
+        "Agency": rng.choice(["Barfoot", "Ray White", "Harcourts"], n).astype(object),
+    })
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run_case(n: int, seed: int, repeat: int, reference_max: int, workers: int = 1) -> Dict[str, Any]:
+    df = _frame(n, np.random.default_rng(seed))
+    _, issues, summary = validate_dataframe(df, workers=1)
+    fast = _best(lambda: validate_dataframe(df, workers=1), repeat)
+    result: Dict[str, Any] = {
+        "rows": n,
+        "issues": len(issues),
+        "columnwise_s": round(fast, 4),
+        "columnwise_rows_per_s": int(n / fast),
+    }
+    if workers > 1:
+        _, par_issues, par_summary = validate_dataframe(df, workers=workers)
+        if (par_issues, par_summary) != (issues, summary):
+            raise AssertionError(f"{workers} workers disagree with one at {n} rows")
+        par = _best(lambda: validate_dataframe(df, workers=workers), repeat)
+        result.update({"workers": workers, "parallel_s": round(par, 4), "parallel_speedup": round(fast / par, 2)})
+    if n <= reference_max:
+        t0 = time.perf_counter()
+        _, ref_issues, ref_summary = _validate_dataframe_reference(df)
+        slow = time.perf_counter() - t0
+        if (ref_issues, ref_summary) != (issues, summary):
+            raise AssertionError(f"engines disagree at {n} rows")
+        result.update({"reference_s": round(slow, 4), "reference_rows_per_s": int(n / slow),
+                       "speedup": round(slow / fast, 1)})
+    return result
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="validate_dataframe benchmark (row-wise vs column-wise)")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs of the column-wise engine")
+    parser.add_argument("--reference-max", type=int, default=1_000_000,
+                        help="Largest case to also run (once) through the row-wise engine")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Also time the column-wise engine across this many processes")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args(argv)
+
+    results = []
+    for n in [int(s) for s in args.rows.split(",") if s.strip()]:
+        r = run_case(n, args.seed, args.repeat, args.reference_max, args.workers)
+        results.append(r)
+        ref = f"row-wise {r['reference_s']:>9}s | x{r['speedup']}" if "reference_s" in r else "row-wise skipped"
+        par = f" | {r['workers']} workers {r['parallel_s']:>7}s x{r['parallel_speedup']}" if "parallel_s" in r else ""
+        print(f"rows={n:<8} issues={r['issues']:<7} column-wise {r['columnwise_s']:>7}s "
+              f"({r['columnwise_rows_per_s']:>8} rows/s) | {ref}{par}")
+
+    text = json.dumps({"results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
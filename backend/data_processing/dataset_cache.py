@@ -0,0 +1,206 @@
+# backend/data_processing/dataset_cache.py
+"""
+Parsed-dataset cache for MockData.(xlsx|csv).
+
+- pick_dataset_path() is the one place that decides which dataset is current
+  (the most recently modified of MockData.xlsx / MockData.csv).
+- read_dataset() parses a file once and stores it column by column under
+  .dataset_cache/<sha256 of the file>/. Numeric/bool/datetime columns are raw
+  .npy files loaded with mmap_mode="r"; text columns are int32 codes (.npy) plus
+  a JSON list of their distinct values. Later reads, in any process, map these
+  files instead of running openpyxl again.
+- The key is the file's content hash, so a replaced file is never served stale.
+  The hash is memoised per (inode, size, mtime), so an unchanged file is not
+  re-hashed on every read.
+- invalidate() is called when /upload-data replaces the dataset; it drops the
+  memo and the cached copies that no longer match a dataset file.
+
+Frames read from the cache share read-only memory maps: call .copy() before
+assigning into existing columns in place.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path("data_processing")
+DATASET_NAMES = ("MockData.xlsx", "MockData.csv")
+CACHE_DIR = DATA_DIR / ".dataset_cache"
+CACHE_FORMAT = 1
+
+
+def pick_dataset_path(data_dir: str | Path = DATA_DIR) -> Path | None:
+    """
+    Look for MockData.xlsx or MockData.csv under data_dir.
+    If both exist, use the one most recently modified.
+    """
+    data_dir = Path(data_dir)
+    xlsx = data_dir / "MockData.xlsx"
+    csvp = data_dir / "MockData.csv"
+
+    if xlsx.exists() and csvp.exists():
+        return xlsx if xlsx.stat().st_mtime >= csvp.stat().st_mtime else csvp
+    if xlsx.exists():
+        return xlsx
+    if csvp.exists():
+        return csvp
+    return None
+
+
+def parse_dataset(path: str | Path) -> pd.DataFrame:
+    """Parse the dataset from CSV or XLSX based on the file extension (no cache)."""
+    path = Path(path)
+    ext = path.suffix.lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext == ".xlsx":
+        return pd.read_excel(path)  # openpyxl is auto-picked
+    raise ValueError(f"Unsupported dataset extension: {ext}")
+
+
+def _json_value(v: Any) -> Any:
+    if isinstance(v, (str, bool, int, float)) or v is None:
+        return v
+    if isinstance(v, np.generic):
+        return v.item()
+    raise TypeError(f"cannot cache value of type {type(v).__name__}")
+
+
+def _encode_column(values: pd.Series) -> Tuple[str, Dict[str, np.ndarray], Dict[str, Any]]:
+    """Return (kind, {suffix: array}, extra meta) for one column."""
+    dtype = values.dtype
+    if dtype.kind in "biufcmM":
+        return "array", {"": values.to_numpy()}, {}
+    if dtype == object or isinstance(dtype, pd.StringDtype):
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        categories = [_json_value(v) for v in uniques]
+        return "codes", {"": codes.astype(np.int32)}, {"categories": categories}
+    raise TypeError(f"cannot cache column dtype {dtype}")
+
+
+class DatasetCache:
+    def __init__(self, cache_dir: str | Path = CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self._lock = threading.Lock()
+        self._hashes: Dict[Path, Tuple[Tuple, str]] = {}   # path -> (stat key, content hash)
+
+    # ---------- Keys ----------
+    def content_hash(self, path: str | Path) -> str:
+        path = Path(path)
+        st = os.stat(path)
+        key = (st.st_ino, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            memo = self._hashes.get(path)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        digest = h.hexdigest()[:16]
+        with self._lock:
+            self._hashes[path] = (key, digest)
+        return digest
+
+    # ---------- Reading ----------
+    def read(self, path: str | Path) -> pd.DataFrame:
+        """Return the parsed dataset, from the columnar cache when it has been parsed before."""
+        path = Path(path)
+        digest = self.content_hash(path)
+        entry = self.cache_dir / digest
+        try:
+            return self._load(entry)
+        except (OSError, ValueError, KeyError):
+            pass
+        df = parse_dataset(path)
+        try:
+            self._store(entry, df, source=path.name)
+        except (TypeError, ValueError, OSError):
+            return df  # not representable (e.g. mixed objects) or read-only disk: serve uncached
+        return self._load(entry)
+
+    def _load(self, entry: Path) -> pd.DataFrame:
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != CACHE_FORMAT:
+            raise ValueError("stale cache format")
+        columns: Dict[str, Any] = {}
+        for i, col in enumerate(meta["columns"]):
+            data = np.load(entry / f"c{i}.npy", mmap_mode="r")
+            if col["kind"] == "array":
+                columns[col["name"]] = data
+            else:
+                categories = np.array(col["categories"] + [np.nan], dtype=object)
+                columns[col["name"]] = categories[data]   # code -1 -> NaN
+        return pd.DataFrame(columns, columns=[c["name"] for c in meta["columns"]], copy=False)
+
+    # ---------- Writing ----------
+    def _store(self, entry: Path, df: pd.DataFrame, source: str) -> None:
+        files: Dict[str, np.ndarray] = {}
+        columns: List[Dict[str, Any]] = []
+        for i, name in enumerate(df.columns):
+            if not isinstance(name, str):
+                raise TypeError("cached datasets need string column names")
+            kind, arrays, extra = _encode_column(df[name])
+            files[f"c{i}.npy"] = arrays[""]
+            columns.append({"name": name, "kind": kind, "dtype": str(df[name].dtype), **extra})
+        meta = {
+            "format": CACHE_FORMAT,
+            "source": source,
+            "rows": len(df),
+            "columns": columns,
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        }
+
+        # Write under a temp name and rename, so readers only see complete entries
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=self.cache_dir, prefix=f".{entry.name}.", suffix=".tmp"))
+        try:
+            for name, array in files.items():
+                np.save(tmp / name, np.ascontiguousarray(array), allow_pickle=False)
+            (tmp / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+            try:
+                os.rename(tmp, entry)
+            except OSError:
+                if not (entry / "meta.json").exists():
+                    raise
+                shutil.rmtree(tmp, ignore_errors=True)  # another process cached the same file
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+    def invalidate(self, data_dir: str | Path = DATA_DIR) -> None:
+        """Forget memoised hashes and delete cached copies of files no longer in data_dir."""
+        with self._lock:
+            self._hashes.clear()
+        keep = {self.content_hash(p) for p in (Path(data_dir) / n for n in DATASET_NAMES) if p.exists()}
+        if not self.cache_dir.exists():
+            return
+        for entry in self.cache_dir.iterdir():
+            if not entry.name.startswith(".") and entry.name not in keep:
+                shutil.rmtree(entry, ignore_errors=True)
+
+
+# Shared instance used by the API, retraining and prediction helpers
+dataset_cache = DatasetCache()
+
+
+def read_dataset(path: str | Path) -> pd.DataFrame:
+    return dataset_cache.read(path)
+
+
+def read_current_dataset(data_dir: str | Path = DATA_DIR) -> Tuple[Path | None, pd.DataFrame | None]:
+    """(path, frame) of the current MockData file, or (None, None) if there is none."""
+    path = pick_dataset_path(data_dir)
+    if path is None:
+        return None, None
+    return path, read_dataset(path)
@@ -2,19 +2,25 @@
 from __future__ import annotations
 
 import io
+import os
+import csv
 import json
-import hashlib
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Tuple, List
+from typing import Dict, Any, Tuple, List, Set
 
+import numpy as np
 import pandas as pd
-from sqlalchemy import MetaData, Table, Column, String, DateTime
+from sqlalchemy import MetaData, Table, Column, String, DateTime, bindparam, func, select, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.types import JSON
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy import insert as sa_insert
 
+from data_processing.row_filter import row_filters
+from data_processing.row_hash import HASH_VERSION, record_hash, row_hashes
+
 
 # ---------- Supported types ----------
 ALLOWED_MIME = {
@@ -97,26 +103,25 @@ def _clean_and_standardize(df: pd.DataFrame) -> pd.DataFrame:
 
 
 # ---------- Hashing for dedupe ----------
-def _row_hash(row_dict: Dict[str, Any]) -> str:
-    s = json.dumps(row_dict, sort_keys=True, ensure_ascii=False)
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
-
-
 def add_hashes(df: pd.DataFrame) -> pd.DataFrame:
-    """Add a _row_hash column based on all columns (after cleaning)."""
-    records = df.to_dict(orient="records")
-    hashes = [_row_hash(r) for r in records]
+    """Add a _row_hash column based on all columns (after cleaning); see row_hash.py."""
+    hashes = row_hashes(df)
     df = df.copy()
     df["_row_hash"] = hashes
     return df
 
 
 # ---------- DB Table & Insert ----------
+HASH_MIGRATION_BATCH = 5000
+
+
 def ensure_table(engine) -> Table:
     """
     Create (if needed) a table:
       uploaded_rows(row_hash PK, data JSON/JSONB, created_at)
+    plus uploaded_rows_meta(key PK, value), which records the row_hash version.
     Uses JSONB on Postgres; JSON on SQLite/others so local tests still pass.
+    Rows stored under an older hash version are rehashed first (once).
     """
     meta = MetaData()
     is_postgres = engine.dialect.name == "postgresql"
@@ -129,44 +134,243 @@ def ensure_table(engine) -> Table:
         Column("data", json_type, nullable=False),
         Column("created_at", DateTime(timezone=True), default=datetime.utcnow),
     )
+    versions = Table(
+        "uploaded_rows_meta",
+        meta,
+        Column("key", String, primary_key=True),
+        Column("value", String, nullable=False),
+    )
     meta.create_all(engine)
+    migrate_row_hashes(engine, table, versions)
     return table
 
 
+def migrate_row_hashes(engine, table: Table, versions: Table, batch_rows: int = HASH_MIGRATION_BATCH) -> int:
+    """
+    Rehash rows stored with an older row_hash version from their stored data,
+    so re-uploads of old rows are still recognised. A table without a recorded
+    version is treated as version 1. Runs in one transaction and is idempotent;
+    rows whose new hashes coincide are merged. Returns the number of rows changed.
+    The version is read without a lock first, so the usual up-to-date case never
+    waits behind a running upload; the table is locked only to migrate.
+    """
+    def up_to_date(conn) -> bool:
+        current = conn.execute(select(versions.c.value).where(versions.c.key == "row_hash_version")).scalar()
+        return current is not None and int(current) >= HASH_VERSION
+
+    with engine.connect() as conn:
+        if up_to_date(conn):
+            return 0
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.exec_driver_sql("LOCK TABLE uploaded_rows IN SHARE ROW EXCLUSIVE MODE")
+        if up_to_date(conn):
+            return 0   # migrated by another process while we waited for the lock
+
+        rename = (
+            table.update()
+            .where(table.c.row_hash == bindparam("old_hash"))
+            .values(row_hash=bindparam("new_hash"))
+        )
+        changed, last = 0, ""
+        while True:
+            # Keyset pages: a rehashed row may be met again under its new key; its hash is then unchanged
+            batch = conn.execute(
+                select(table.c.row_hash, table.c.data)
+                .where(table.c.row_hash > last)
+                .order_by(table.c.row_hash)
+                .limit(batch_rows)
+            ).all()
+            if not batch:
+                break
+            last = batch[-1][0]
+            moves = [(old, record_hash(data)) for old, data in batch]
+            moves = [(old, new) for old, new in moves if old != new]
+            if not moves:
+                continue
+            taken = set(conn.execute(
+                select(table.c.row_hash).where(table.c.row_hash.in_([new for _, new in moves]))
+            ).scalars())
+            renames, merged = [], []
+            for old, new in moves:
+                if new in taken:
+                    merged.append(old)
+                else:
+                    taken.add(new)
+                    renames.append({"old_hash": old, "new_hash": new})
+            if merged:
+                conn.execute(table.delete().where(table.c.row_hash.in_(merged)))
+            if renames:
+                conn.execute(rename, renames)
+            changed += len(moves)
+
+        conn.execute(versions.delete().where(versions.c.key == "row_hash_version"))
+        conn.execute(versions.insert().values(key="row_hash_version", value=str(HASH_VERSION)))
+    return changed
+
+
 def insert_unique_rows(engine, table: Table, df_with_hash: pd.DataFrame) -> int:
     """
-    Insert unique rows by row_hash.
-    - Postgres: ON CONFLICT DO NOTHING
-    - SQLite/others: INSERT OR IGNORE
-    Returns number of rows actually inserted.
+    Insert unique rows by row_hash, in batches of UPLOAD_INSERT_BATCH rows.
+    - rows the row_hash Bloom filter has probably seen are looked up first and
+      dropped if stored; certainly-new rows go straight to the insert
+    - Postgres: COPY into a temp stage table, then INSERT ... SELECT ... ON CONFLICT DO NOTHING
+    - SQLite: executemany of INSERT OR IGNORE
+    - others: skip hashes already stored, executemany the rest
+    All in one transaction. Returns number of rows actually inserted.
     """
+    if df_with_hash.empty:
+        return 0
+    with engine.begin() as conn:
+        inserted = _insert_rows(conn, table, df_with_hash)
+    row_filters.save(engine)
+    return inserted
+
+
+# Rows per COPY / executemany batch
+UPLOAD_INSERT_BATCH = int(os.getenv("UPLOAD_INSERT_BATCH", "5000"))
+SQLITE_BULK_CACHE_KIB = 65536   # page cache while inserting; random row_hash keys touch the whole index
+STAGE_TABLE = "uploaded_rows_stage"
+
+
+def _insert_rows(conn, table: Table, df_with_hash: pd.DataFrame, batch_rows: int = UPLOAD_INSERT_BATCH) -> int:
+    """insert_unique_rows on an open connection (the caller owns the transaction)."""
     if df_with_hash.empty:
         return 0
 
+    hashes = df_with_hash["_row_hash"].tolist()
+    row_filter = row_filters.get(conn, table)
+    fresh = _drop_stored(conn, table, hashes, row_filter.might_contain(hashes), batch_rows)
+    if not fresh.any():
+        return 0
+    if not fresh.all():
+        df_with_hash = df_with_hash[fresh]
+        hashes = df_with_hash["_row_hash"].tolist()
+
+    now = datetime.utcnow()
     payload: List[Dict[str, Any]] = [
-        {"row_hash": rh, "data": rec}
-        for rh, rec in zip(
-            df_with_hash["_row_hash"],
-            df_with_hash.drop(columns=["_row_hash"]).to_dict(orient="records"),
-        )
+        {"row_hash": rh, "data": rec, "created_at": now}
+        for rh, rec in zip(hashes, df_with_hash.drop(columns=["_row_hash"]).to_dict(orient="records"))
     ]
+    batches = [payload[i:i + batch_rows] for i in range(0, len(payload), batch_rows)]
+    inserted = _insert_batches(conn, table, batches)
+    row_filter.add(hashes)
+    return inserted
 
-    inserted = 0
-    with engine.begin() as conn:
-        if engine.dialect.name == "postgresql":
-            stmt = pg_insert(table).values(payload).on_conflict_do_nothing(
-                index_elements=["row_hash"]
-            )
-            result = conn.execute(stmt)
-            inserted = result.rowcount or 0
-        else:
-            # SQLite & others
-            for row in payload:
-                stmt = sa_insert(table).values(**row).prefix_with("OR IGNORE")
-                res = conn.execute(stmt)
-                inserted += res.rowcount or 0
 
-    return inserted
+def _drop_stored(conn, table: Table, hashes: List[str], maybe: np.ndarray, batch_rows: int) -> np.ndarray:
+    """
+    Mask of rows to send to the insert: everything except rows already stored.
+    Only the filter's "probably stored" hashes are looked up, one IN query per batch.
+    """
+    fresh = np.ones(len(hashes), dtype=bool)
+    candidates = np.flatnonzero(maybe)
+    for start in range(0, len(candidates), batch_rows):
+        idx = candidates[start:start + batch_rows]
+        stored = set(conn.execute(
+            select(table.c.row_hash).where(table.c.row_hash.in_([hashes[i] for i in idx]))
+        ).scalars().all())
+        if stored:
+            fresh[idx] = [hashes[i] not in stored for i in idx]
+    return fresh
+
+
+def _insert_batches(conn, table: Table, batches: List[List[Dict[str, Any]]]) -> int:
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if hasattr(cursor, "copy") or hasattr(cursor, "copy_expert"):
+                return sum(_insert_copy(conn, cursor, table, batch) for batch in batches)
+        finally:
+            cursor.close()
+        return sum(_insert_pg_values(conn, table, batch) for batch in batches)
+    if dialect == "sqlite":
+        return _insert_sqlite(conn, table, batches)
+    return sum(_insert_new_only(conn, table, batch) for batch in batches)
+
+
+def _copy_csv(conn, batch: List[Dict[str, Any]]) -> str:
+    """Stage rows as CSV for COPY (row_hash, data as JSON text)."""
+    serialize = getattr(conn.dialect, "_json_serializer", None) or json.dumps
+    buf = io.StringIO()
+    writer = csv.writer(buf, lineterminator="\n")
+    writer.writerows((row["row_hash"], serialize(row["data"])) for row in batch)
+    return buf.getvalue()
+
+
+def _insert_copy(conn, cursor, table: Table, batch: List[Dict[str, Any]]) -> int:
+    """COPY the batch into a temp stage table, then move the new rows across in one statement."""
+    stage = conn.dialect.identifier_preparer.quote(STAGE_TABLE)
+    target = conn.dialect.identifier_preparer.format_table(table)
+    conn.exec_driver_sql(
+        f"CREATE TEMP TABLE IF NOT EXISTS {stage} (row_hash text NOT NULL, data jsonb NOT NULL) ON COMMIT DROP"
+    )
+    conn.exec_driver_sql(f"TRUNCATE {stage}")
+
+    data = _copy_csv(conn, batch)
+    copy_sql = f"COPY {stage} (row_hash, data) FROM STDIN WITH (FORMAT csv)"
+    if hasattr(cursor, "copy"):            # psycopg 3
+        with cursor.copy(copy_sql) as copy:
+            copy.write(data)
+    else:                                  # psycopg2
+        cursor.copy_expert(copy_sql, io.StringIO(data))
+
+    result = conn.execute(
+        text(
+            f"INSERT INTO {target} (row_hash, data, created_at) "
+            f"SELECT row_hash, data, :created_at FROM {stage} "
+            "ON CONFLICT (row_hash) DO NOTHING"
+        ),
+        {"created_at": batch[0]["created_at"]},
+    )
+    return result.rowcount or 0
+
+
+def _insert_pg_values(conn, table: Table, batch: List[Dict[str, Any]]) -> int:
+    """Postgres drivers without COPY support: one bounded multi-row INSERT per batch."""
+    stmt = pg_insert(table).values(batch).on_conflict_do_nothing(index_elements=["row_hash"])
+    return conn.execute(stmt).rowcount or 0
+
+
+def _insert_sqlite(conn, table: Table, batches: List[List[Dict[str, Any]]]) -> int:
+    """
+    executemany INSERT OR IGNORE on the DBAPI cursor, with values serialised the way
+    the column types would; inserted rows are counted from the connection's total_changes.
+    """
+    raw = conn.connection.dbapi_connection
+    serialize = getattr(conn.dialect, "_json_serializer", None) or json.dumps
+    stamp = table.c.created_at.type.bind_processor(conn.dialect)
+    target = conn.dialect.identifier_preparer.format_table(table)
+    sql = f"INSERT OR IGNORE INTO {target} (row_hash, data, created_at) VALUES (?, ?, ?)"
+
+    previous_cache = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+    conn.exec_driver_sql(f"PRAGMA cache_size = -{SQLITE_BULK_CACHE_KIB}")
+    try:
+        cursor = raw.cursor()
+        before = raw.total_changes
+        for batch in batches:
+            created = stamp(batch[0]["created_at"]) if stamp else batch[0]["created_at"]
+            cursor.executemany(sql, [(row["row_hash"], serialize(row["data"]), created) for row in batch])
+        cursor.close()
+        return raw.total_changes - before
+    finally:
+        conn.exec_driver_sql(f"PRAGMA cache_size = {previous_cache}")
+
+
+def _insert_new_only(conn, table: Table, batch: List[Dict[str, Any]]) -> int:
+    """Portable path: drop hashes already stored (or repeated in the batch), insert the rest."""
+    stored = set(conn.execute(
+        select(table.c.row_hash).where(table.c.row_hash.in_([row["row_hash"] for row in batch]))
+    ).scalars())
+    fresh = []
+    for row in batch:
+        if row["row_hash"] not in stored:
+            stored.add(row["row_hash"])
+            fresh.append(row)
+    if fresh:
+        conn.execute(sa_insert(table), fresh)
+    return len(fresh)
 
 
 # ---------- Public entry used by FastAPI route ----------
@@ -196,16 +400,238 @@ def process_upload(
     inserted = insert_unique_rows(engine, table, df_h)
 
     cleaned_no_hash = df_h.drop(columns=["_row_hash"])
+    stamped, out_path = _cleaned_path(cleaned_dir, filename)
+    cleaned_no_hash.to_csv(out_path, index=False, encoding="utf-8-sig")
+
+    return _summary(total_rows, inserted, stamped), out_path
+
+
+def _cleaned_path(cleaned_dir: Path, filename: str) -> Tuple[str, Path]:
     cleaned_dir.mkdir(parents=True, exist_ok=True)
     stamped = f"cleaned_{Path(filename).stem}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.csv"
-    out_path = cleaned_dir / stamped
-    cleaned_no_hash.to_csv(out_path, index=False, encoding="utf-8-sig")
+    return stamped, cleaned_dir / stamped
+
 
-    summary = {
+def _summary(total_rows: int, inserted: int, stamped: str) -> Dict[str, Any]:
+    return {
         "total_rows": total_rows,
         "rows_inserted": inserted,
         "rows_skipped": total_rows - inserted,  # duplicates
         "message": "Upload processed successfully.",
         "cleaned_file_name": stamped,
     }
-    return summary, out_path
+
+
+# ---------- Streaming CSV ----------
+# Rows parsed, cleaned, hashed and inserted at a time; peak memory is a few chunks' worth
+UPLOAD_CHUNK_ROWS = int(os.getenv("UPLOAD_CHUNK_ROWS", "20000"))
+_TRUE, _FALSE = {"true"}, {"false"}
+
+
+def _read_kind(raw: pd.Series) -> str:
+    """dtype kind read_csv infers for these raw (non-missing) strings: i/f/b/O."""
+    if raw.str.lower().isin(_TRUE | _FALSE).all():
+        return "b"
+    stripped = raw.str.strip()
+    if (stripped == "").any():
+        return "O"
+    try:
+        kind = pd.to_numeric(stripped).dtype.kind
+    except (ValueError, TypeError):
+        return "O"
+    return kind if kind in "if" else "O"
+
+
+@dataclass
+class _ColumnProfile:
+    """What one raw CSV column looked like across every chunk (first pass)."""
+    kinds: Set[str] = field(default_factory=set)   # read_csv kind of each chunk's non-missing values
+    has_missing: bool = False                      # any blank at all (read_csv makes ints float)
+    kept_missing: bool = False                     # any blank in rows that survive the empty-row drop
+    numeric: bool = True                           # every kept value converts after strip (to_numeric)
+    integral: bool = True                          # ... and every converted value is an integer
+
+    def add(self, raw: pd.Series, keep: pd.Series) -> None:
+        missing = raw.isna()
+        self.has_missing |= bool(missing.any())
+        if not missing.all():
+            self.kinds.add(_read_kind(raw[~missing]))
+        kept = raw[keep]
+        self.kept_missing |= bool(kept.isna().any())
+        if self.numeric:
+            try:
+                converted = pd.to_numeric(kept.str.strip())
+            except (ValueError, TypeError):
+                self.numeric = False
+            else:
+                self.integral &= converted.dtype.kind == "i"
+
+    @property
+    def read_kind(self) -> str:
+        """dtype kind a single whole-file read_csv gives this column ("null" if always blank)."""
+        if not self.kinds:
+            return "null"
+        if self.kinds == {"i"} and not self.has_missing:
+            return "i"
+        if self.kinds <= {"i", "f"}:
+            return "f"
+        if self.kinds == {"b"}:
+            return "bool_na" if self.has_missing else "b"
+        return "O"
+
+
+@dataclass
+class _CsvPlan:
+    """Column decisions that _clean_and_standardize makes on the whole frame, fixed up front."""
+    read_dtypes: Dict[str, Any]     # raw column -> dtype for the second read_csv pass
+    bool_na: List[str]              # bool columns with blanks: read_csv gives object True/False/NaN
+    to_numeric: Dict[str, str]      # object column -> dtype pd.to_numeric gives the whole column
+    drop: List[str]                 # columns that are blank in every row
+
+
+def _profile_csv(path: Path, chunk_rows: int) -> Dict[str, _ColumnProfile]:
+    profiles: Dict[str, _ColumnProfile] = {}
+    for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=str):
+        if not profiles:
+            profiles = {c: _ColumnProfile() for c in chunk.columns}
+        keep = ~chunk.isna().all(axis=1)
+        for c in chunk.columns:
+            profiles[c].add(chunk[c], keep)
+    if not profiles:  # header only: read_csv yields no chunks
+        profiles = {c: _ColumnProfile() for c in pd.read_csv(path, nrows=0).columns}
+    return profiles
+
+
+def _plan_csv(profiles: Dict[str, _ColumnProfile]) -> _CsvPlan:
+    plan = _CsvPlan(read_dtypes={}, bool_na=[], to_numeric={}, drop=[])
+    for col, prof in profiles.items():
+        kind = prof.read_kind
+        if kind == "null":
+            plan.drop.append(col)
+            plan.read_dtypes[col] = str
+        elif kind == "i":
+            plan.read_dtypes[col] = "int64"
+        elif kind == "f":
+            plan.read_dtypes[col] = "float64"
+        elif kind == "b":
+            plan.read_dtypes[col] = bool
+        elif kind == "bool_na":
+            # to_numeric keeps object bools as bool, or makes 1.0/0.0 if a blank is left
+            plan.read_dtypes[col] = str
+            plan.bool_na.append(col)
+            plan.to_numeric[col] = "float64" if prof.kept_missing else "bool"
+        else:
+            plan.read_dtypes[col] = str
+            if prof.numeric:
+                plan.to_numeric[col] = "int64" if prof.integral and not prof.kept_missing else "float64"
+    return plan
+
+
+def _clean_chunk(chunk: pd.DataFrame, plan: _CsvPlan) -> pd.DataFrame:
+    """_clean_and_standardize for one chunk, with the column-wide decisions taken from the plan."""
+    for col in plan.bool_na:
+        chunk[col] = chunk[col].map(
+            lambda x: x if not isinstance(x, str) else x.lower() in _TRUE
+        )
+    chunk = chunk.drop(columns=plan.drop).dropna(axis=0, how="all")
+    for col in chunk.select_dtypes(include=["object"]).columns:
+        chunk[col] = chunk[col].map(lambda x: x.strip() if isinstance(x, str) else x)
+    for col, dtype in plan.to_numeric.items():
+        chunk[col] = pd.to_numeric(chunk[col]).astype(dtype)
+    chunk.columns = (
+        chunk.columns
+        .map(lambda c: str(c).strip())
+        .map(lambda c: c.lower().replace(" ", "_").replace("-", "_"))
+    )
+    return chunk.reset_index(drop=True)
+
+
+def process_csv_stream(
+    *,
+    path: Path,
+    filename: str,
+    engine,
+    cleaned_dir: Path,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Tuple[Dict[str, Any], Path]:
+    """
+    process_upload for a CSV already on disk, `chunk_rows` rows at a time.
+    1) first pass: profile every column (types, empty, numeric after trimming)
+    2) second pass, per chunk: parse with the fixed dtypes -> clean -> hash ->
+       insert -> append to the cleaned CSV
+    Rows, hashes, counts and the cleaned file match process_upload; all inserts
+    share one transaction, so a failed upload stores nothing.
+    """
+    path = Path(path)
+    plan = _plan_csv(_profile_csv(path, chunk_rows))
+
+    table = ensure_table(engine)
+    stamped, out_path = _cleaned_path(cleaned_dir, filename)
+    total_rows = inserted = 0
+    header_written = False
+    with engine.begin() as conn, open(out_path, "w", encoding="utf-8-sig", newline="") as out:
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, dtype=plan.read_dtypes):
+            cleaned = _clean_chunk(chunk, plan)
+            if cleaned.empty:
+                continue
+            df_h = add_hashes(cleaned)
+            total_rows += len(df_h)
+            inserted += _insert_rows(conn, table, df_h)
+            cleaned.to_csv(out, index=False, header=not header_written)
+            header_written = True
+        if not header_written:
+            pd.DataFrame().to_csv(out, index=False)  # no data rows: every column was dropped as empty
+    row_filters.save(engine)
+
+    return _summary(total_rows, inserted, stamped), out_path
+
+
+def process_upload_file(
+    *,
+    path: Path,
+    filename: str,
+    content_type: str,
+    engine,
+    cleaned_dir: Path,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Tuple[Dict[str, Any], Path]:
+    """
+    process_upload for an upload spooled to disk. CSV is streamed in chunks;
+    HTML and XLSX have to be parsed whole, so they go through process_upload.
+    """
+    kind = ALLOWED_MIME.get(content_type) or _ext_from_name(filename)
+    if kind == "csv":
+        return process_csv_stream(
+            path=path, filename=filename, engine=engine, cleaned_dir=cleaned_dir, chunk_rows=chunk_rows
+        )
+    return process_upload(
+        file_bytes=Path(path).read_bytes(),
+        filename=filename,
+        content_type=content_type,
+        engine=engine,
+        cleaned_dir=cleaned_dir,
+    )
+
+
+# ---------- Table state (upload ledger) ----------
+def stored_rows_state(engine) -> Dict[str, Any]:
+    """
+    Row count and newest created_at of uploaded_rows, recorded with a ledger
+    entry. Later uploads only add newer rows, so the count up to that time only
+    changes when rows are deleted (or the table is cleared).
+    """
+    table = ensure_table(engine)
+    with engine.connect() as conn:
+        count, newest = conn.execute(select(func.count(), func.max(table.c.created_at))).one()
+    return {"rows": int(count), "newest": newest.isoformat() if newest is not None else None}
+
+
+def stored_rows_intact(engine, state: Dict[str, Any]) -> bool:
+    """True while every row counted in `state` (see stored_rows_state) is still stored."""
+    if not state or state.get("newest") is None:
+        return False
+    table = ensure_table(engine)
+    newest = datetime.fromisoformat(state["newest"])
+    with engine.connect() as conn:
+        count = conn.execute(select(func.count()).where(table.c.created_at <= newest)).scalar()
+    return int(count) == state["rows"]
@@ -0,0 +1,111 @@
+# backend/data_processing/dup_index.py
+"""
+Persistent index of the duplicate keys of rows already stored, so validation
+can flag listings uploaded again in a later file (issue code duplicate_existing).
+
+- Table validation_dup_keys(rule_set, key_hash, created_at), primary key
+  (rule_set, key_hash). key_hash is validate_properties.dup_key_hashes() of a
+  row: the row_hash encoding of its duplicate-key values, numbers as parsed.
+- contains() answers a whole file with one IN query per DUP_INDEX_LOOKUP_BATCH
+  hashes, never one query per row.
+- add() indexes the keys of stored rows, skipping keys already present
+  (Postgres ON CONFLICT DO NOTHING, SQLite INSERT OR IGNORE, otherwise
+  lookup-then-insert); clear() forgets a rule set when its table is replaced.
+- replace() swaps a rule set's keys in one transaction; it backs
+  pipeline_main.rebuild_dup_index(), which re-indexes the rows of `properties`
+  (stored before the index existed, or deleted since). `created` tells whether
+  this instance created the table, i.e. it starts empty.
+- The index is written after the rows are saved, in its own transaction: two
+  concurrent runs of the same file can both pass the check and store twice.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime
+from typing import Iterable, List
+
+import numpy as np
+from sqlalchemy import Column, DateTime, MetaData, String, Table, delete, func, insert, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+TABLE_NAME = "validation_dup_keys"
+LOOKUP_BATCH = int(os.getenv("DUP_INDEX_LOOKUP_BATCH", "5000"))
+
+
+def ensure_table(engine) -> Table:
+    meta = MetaData()
+    table = Table(
+        TABLE_NAME,
+        meta,
+        Column("rule_set", String(64), primary_key=True),
+        Column("key_hash", String(64), primary_key=True),
+        Column("created_at", DateTime(timezone=True), default=datetime.utcnow),
+    )
+    meta.create_all(engine)
+    return table
+
+
+class DuplicateIndex:
+    def __init__(self, engine, batch_rows: int = LOOKUP_BATCH):
+        self.engine = engine
+        self.batch_rows = batch_rows
+        self.created = not inspect(engine).has_table(TABLE_NAME)
+        self.table = ensure_table(engine)
+
+    def contains(self, rule_set: str, hashes: List[str]) -> np.ndarray:
+        """Mask of the hashes already indexed for `rule_set`."""
+        found = np.zeros(len(hashes), dtype=bool)
+        t = self.table
+        with self.engine.connect() as conn:
+            for start in range(0, len(hashes), self.batch_rows):
+                batch = hashes[start:start + self.batch_rows]
+                stored = set(conn.execute(
+                    select(t.c.key_hash).where(t.c.rule_set == rule_set, t.c.key_hash.in_(set(batch)))
+                ).scalars().all())
+                if stored:
+                    found[start:start + len(batch)] = [h in stored for h in batch]
+        return found
+
+    def add(self, rule_set: str, hashes: Iterable[str]) -> None:
+        with self.engine.begin() as conn:
+            self._add(conn, rule_set, hashes, datetime.utcnow())
+
+    def clear(self, rule_set: str) -> None:
+        with self.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.rule_set == rule_set))
+
+    def replace(self, rule_set: str, chunks: Iterable[Iterable[str]]) -> int:
+        """
+        Swap the keys of `rule_set` for those in `chunks` (one iterable of hashes
+        per chunk) in one transaction, so lookups see the old or the complete new
+        keys. Returns the number of keys indexed.
+        """
+        t = self.table
+        now = datetime.utcnow()
+        with self.engine.begin() as conn:
+            conn.execute(delete(t).where(t.c.rule_set == rule_set))
+            for hashes in chunks:
+                self._add(conn, rule_set, hashes, now)
+            return int(conn.execute(select(func.count()).where(t.c.rule_set == rule_set)).scalar())
+
+    def _add(self, conn, rule_set: str, hashes: Iterable[str], now: datetime) -> None:
+        rows = [{"rule_set": rule_set, "key_hash": h, "created_at": now} for h in dict.fromkeys(hashes)]
+        for start in range(0, len(rows), self.batch_rows):
+            self._insert(conn, rows[start:start + self.batch_rows])
+
+    def _insert(self, conn, batch: List[dict]) -> None:
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            conn.execute(pg_insert(self.table).on_conflict_do_nothing(), batch)
+        elif dialect == "sqlite":
+            conn.execute(sqlite_insert(self.table).on_conflict_do_nothing(), batch)
+        else:
+            t = self.table
+            stored = set(conn.execute(
+                select(t.c.key_hash).where(t.c.rule_set == batch[0]["rule_set"],
+                                           t.c.key_hash.in_([row["key_hash"] for row in batch]))
+            ).scalars())
+            fresh = [row for row in batch if row["key_hash"] not in stored]
+            if fresh:
+                conn.execute(insert(t), fresh)
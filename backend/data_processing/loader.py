@@ -1,6 +1,6 @@
 import os
 import pandas as pd
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, inspect, text
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -42,13 +42,36 @@ def save_to_db(data: pd.DataFrame, *, mode: str = "append"):
     Args:
         data (pd.DataFrame): Data to store.
         mode (str): 'append' (default) to add rows, or 'replace' to overwrite table.
+
+    Returns:
+        bool: True if the rows were written.
     """
     try:
         engine = _engine()
         data.to_sql("properties", engine, if_exists=mode, index=False)
         print(f"Data saved to PostgreSQL successfully (mode={mode}).")
+        return True
     except Exception as e:
         print("Error saving to PostgreSQL:", e)
+        return False
+
+
+def properties_row_count():
+    """
+    Count the rows of the 'properties' table (0 if it does not exist yet).
+
+    Returns:
+        int | None: Row count, or None if the database cannot be read.
+    """
+    try:
+        engine = _engine()
+        if not inspect(engine).has_table("properties"):
+            return 0
+        with engine.connect() as conn:
+            return int(conn.execute(text("SELECT COUNT(*) FROM properties;")).scalar())
+    except Exception as e:
+        print("Error counting rows in PostgreSQL:", e)
+        return None
 
 
 def fetch_processed_data(limit: int = 100):
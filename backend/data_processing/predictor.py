@@ -1,10 +1,14 @@
 import pandas as pd
-import joblib
 
-# Load trained model
-model = joblib.load('Machine_Learning_Model/rental_model.pkl')
+from Machine_Learning_Model.model_registry import registry
 
 def predict_rent(data: pd.DataFrame) -> pd.DataFrame:
+    # Trained model, shared with the API (loaded once, hot-swapped on retrain)
+    snapshot = registry.current()
+    if snapshot is None:
+        raise RuntimeError("Model not loaded")
+    model = snapshot.model
+
     # Debug log (optional)
     print("Predictor input columns:", data.columns.tolist())
 
@@ -0,0 +1,229 @@
+# backend/data_processing/row_filter.py
+"""
+Bloom filter of uploaded_rows.row_hash, so re-uploaded rows need not be sent to the database.
+
+- might_contain() answers "certainly new" (False) or "probably stored" (True).
+  Probably-stored hashes are confirmed with one IN lookup per insert batch;
+  certainly-new rows go straight to the bulk insert.
+- The bit positions come from the row hash itself (it is already SHA-256):
+  two 64-bit words of it are combined by double hashing, k times.
+- The filter is sized for `capacity` rows at FALSE_POSITIVE_RATE. It is
+  rebuilt from the table when it is missing, was built for another row_hash
+  version, or has outgrown its capacity (the new one gets twice the room).
+- Persistence: <sqlite file>.rowfilter.npz next to a SQLite database, or
+  UPLOAD_FILTER_DIR/<url hash>.npz for server databases; in-memory SQLite keeps
+  it in memory only. Files are replaced atomically. If another process saved in
+  the meantime, its bits are OR-ed in before writing, not lost.
+
+The database's own ON CONFLICT / OR IGNORE still decides what is inserted, so a
+stale filter only costs lookups; it can never change the inserted/skipped counts.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Dict, Sequence
+
+import numpy as np
+from sqlalchemy import func, select
+
+from data_processing.row_hash import HASH_VERSION
+
+FILTER_DIR = Path(os.getenv("UPLOAD_FILTER_DIR", "data_processing/.upload_filter"))
+FALSE_POSITIVE_RATE = float(os.getenv("UPLOAD_FILTER_FP_RATE", "0.01"))
+MIN_CAPACITY = 100_000
+REBUILD_PAGE = 50_000
+FORMAT = 1
+
+
+def _words(hashes: Sequence[str]) -> np.ndarray:
+    """(n, 2) uint64: the first 16 bytes of each hex SHA-256 digest."""
+    raw = bytes.fromhex("".join(h[:32] for h in hashes))
+    return np.frombuffer(raw, dtype=">u8").astype(np.uint64).reshape(-1, 2)
+
+
+class RowHashFilter:
+    def __init__(self, capacity: int, fp_rate: float = FALSE_POSITIVE_RATE, *,
+                 bits: np.ndarray | None = None, num_hashes: int | None = None, count: int = 0,
+                 hash_version: int = HASH_VERSION):
+        capacity = max(int(capacity), 1)
+        m = -capacity * math.log(fp_rate) / math.log(2) ** 2
+        self.num_bits = 1 << max(int(math.ceil(math.log2(m))), 6)     # power of two: positions are a mask
+        if bits is not None:
+            self.num_bits = len(bits) * 8
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.num_hashes = num_hashes or min(max(round(self.num_bits / capacity * math.log(2)), 1), 16)
+        self.bits = bits if bits is not None else np.zeros(self.num_bits // 8, dtype=np.uint8)
+        self.count = count
+        self.hash_version = hash_version
+
+    # ---------- Bits ----------
+    def _positions(self, hashes: Sequence[str]) -> np.ndarray:
+        words = _words(hashes)
+        h1, h2 = words[:, :1], words[:, 1:] | np.uint64(1)
+        steps = np.arange(self.num_hashes, dtype=np.uint64)
+        return (h1 + steps * h2) & np.uint64(self.num_bits - 1)        # (n, k), wraps mod 2**64
+
+    def might_contain(self, hashes: Sequence[str]) -> np.ndarray:
+        if len(hashes) == 0:
+            return np.zeros(0, dtype=bool)
+        pos = self._positions(hashes)
+        hit = (self.bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return hit.all(axis=1)
+
+    def add(self, hashes: Sequence[str]) -> None:
+        if len(hashes) == 0:
+            return
+        pos = self._positions(hashes).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), np.left_shift(1, pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(hashes)
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
+
+    def stats(self) -> Dict[str, Any]:
+        fill = float(np.unpackbits(self.bits).mean()) if self.bits.size else 0.0
+        return {
+            "capacity": self.capacity,
+            "count": self.count,
+            "bits": self.num_bits,
+            "hashes": self.num_hashes,
+            "hash_version": self.hash_version,
+            "fill_ratio": round(fill, 4),
+            "expected_fp_rate": round(fill ** self.num_hashes, 6),
+        }
+
+    # ---------- Files ----------
+    def save(self, path: Path) -> None:
+        meta = {
+            "format": FORMAT, "capacity": self.capacity, "fp_rate": self.fp_rate, "hashes": self.num_hashes,
+            "count": self.count, "hash_version": self.hash_version,
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.savez(fh, bits=self.bits, meta=np.array(json.dumps(meta)))
+            os.replace(tmp, path)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+    @classmethod
+    def load(cls, path: Path) -> "RowHashFilter":
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format") != FORMAT:
+                raise ValueError("stale filter format")
+            return cls(meta["capacity"], meta["fp_rate"], bits=data["bits"].copy(), num_hashes=meta["hashes"],
+                       count=meta["count"], hash_version=meta["hash_version"])
+
+
+# ---------- One filter per database ----------
+class _Entry:
+    def __init__(self, path: Path | None, row_filter: RowHashFilter, mtime: int | None = None):
+        self.path = path
+        self.filter = row_filter
+        self.mtime = mtime      # of the file this copy was loaded from / last saved to
+
+
+class RowFilters:
+    """Loads, rebuilds and saves the filter of each database (one per engine URL)."""
+
+    def __init__(self, directory: str | Path = FILTER_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.RLock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def path_for(self, engine) -> Path | None:
+        url = engine.url
+        if url.get_backend_name() == "sqlite":
+            if not url.database or url.database == ":memory:":
+                return None
+            return Path(url.database + ".rowfilter.npz")
+        key = hashlib.sha256(url.render_as_string(hide_password=True).encode("utf-8")).hexdigest()[:16]
+        return self.directory / f"{key}.npz"
+
+    def _key(self, engine) -> str:
+        return str(engine.url) if self.path_for(engine) is not None else f"memory:{id(engine)}"
+
+    def get(self, conn, table) -> RowHashFilter:
+        """The filter for this connection's database; built from `table` when there is no usable one."""
+        key, path = self._key(conn.engine), self.path_for(conn.engine)
+        with self._lock:
+            entry = self._entries.get(key)
+            mtime = _mtime(path)
+            if mtime is not None and (entry is None or entry.mtime != mtime):
+                try:
+                    entry = _Entry(path, RowHashFilter.load(path), mtime)   # saved by another process
+                except (OSError, ValueError, KeyError):
+                    entry = None
+            if entry is None or entry.filter.hash_version != HASH_VERSION or entry.filter.full:
+                entry = _Entry(path, self._build(conn, table))
+            self._entries[key] = entry
+            return entry.filter
+
+    def rebuild(self, conn, table) -> RowHashFilter:
+        """Build a fresh filter from every row_hash in `table` and save it."""
+        key, path = self._key(conn.engine), self.path_for(conn.engine)
+        entry = _Entry(path, self._build(conn, table))
+        with self._lock:
+            self._entries[key] = entry
+            self._save(entry)
+        return entry.filter
+
+    def save(self, engine) -> None:
+        """Persist the filter after an upload. Bits another process saved meanwhile are OR-ed in."""
+        with self._lock:
+            entry = self._entries.get(self._key(engine))
+            if entry is not None:
+                self._save(entry)
+
+    def _save(self, entry: _Entry) -> None:
+        if entry.path is None:
+            return
+        mtime = _mtime(entry.path)
+        if mtime is not None and mtime != entry.mtime:
+            try:
+                other = RowHashFilter.load(entry.path)
+            except (OSError, ValueError, KeyError):
+                other = None
+            ours = entry.filter
+            if other is not None and (other.num_bits, other.num_hashes, other.hash_version) == \
+                    (ours.num_bits, ours.num_hashes, ours.hash_version):
+                np.bitwise_or(ours.bits, other.bits, out=ours.bits)
+                ours.count = max(ours.count, other.count)
+        entry.filter.save(entry.path)
+        entry.mtime = _mtime(entry.path)
+
+    @staticmethod
+    def _build(conn, table) -> RowHashFilter:
+        total = conn.execute(select(func.count()).select_from(table)).scalar() or 0
+        row_filter = RowHashFilter(max(MIN_CAPACITY, 2 * total))
+        result = conn.execution_options(yield_per=REBUILD_PAGE).execute(select(table.c.row_hash))
+        for page in result.scalars().partitions():
+            row_filter.add(page)
+        return row_filter
+
+
+def _mtime(path: Path | None) -> int | None:
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+# Shared instance used by the upload paths
+row_filters = RowFilters()
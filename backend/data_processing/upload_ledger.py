@@ -0,0 +1,107 @@
+# backend/data_processing/upload_ledger.py
+"""
+Ledger of processed uploads, so an identical re-upload is answered without parsing.
+
+- Keyed by (endpoint, sha256 of the raw file bytes, options that change the
+  outcome, e.g. replace_table). The filename is not part of the key.
+- Each entry is a small JSON file (upload_ledger/<key>.json, atomic writes)
+  holding the response that was returned, when it was recorded and the files
+  the response points at (cleaned CSV, issues report).
+- lookup() only returns an entry while all of its files still exist, so a
+  replayed response never links to a deleted download. Endpoints with extra
+  conditions (e.g. /upload-data: the dataset on disk is still this file;
+  /upload-dataset: the table `state` recorded with the entry still holds) check
+  them before replaying. State-changing commands (replace_table=true) are never
+  recorded.
+- Only successful outcomes are recorded (for the storing endpoints: every row
+  was written); every endpoint takes force=true to
+  reprocess and overwrite the entry. The oldest entries beyond UPLOAD_LEDGER_KEEP
+  are pruned.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable
+
+from Machine_Learning_Model.model_artifacts import atomic_write_bytes
+
+LEDGER_DIR = Path(os.getenv("UPLOAD_LEDGER_DIR", "data_processing/.upload_ledger"))
+KEEP_ENTRIES = int(os.getenv("UPLOAD_LEDGER_KEEP", "1000"))
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+class UploadLedger:
+    def __init__(self, directory: str | Path = LEDGER_DIR, keep: int = KEEP_ENTRIES):
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def _path(self, endpoint: str, digest: str, options: Dict[str, Any] | None) -> Path:
+        key = json.dumps([endpoint, digest, options or {}], sort_keys=True, default=str)
+        return self.directory / f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]}.json"
+
+    def lookup(self, endpoint: str, digest: str, options: Dict[str, Any] | None = None) -> Dict[str, Any] | None:
+        """The recorded entry for this upload, or None if there is none or a file it names is gone."""
+        try:
+            entry = json.loads(self._path(endpoint, digest, options).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not all(Path(f).exists() for f in entry.get("files", [])):
+            return None
+        return entry
+
+    def record(self, endpoint: str, digest: str, result: Dict[str, Any], *,
+               options: Dict[str, Any] | None = None, files: Iterable[str | Path] = (),
+               state: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        entry = {
+            "endpoint": endpoint,
+            "content_sha256": digest,
+            "options": options or {},
+            "recorded_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "files": [str(f) for f in files if f],
+            "state": state or {},
+            "result": result,
+        }
+        atomic_write_bytes(self._path(endpoint, digest, options), json.dumps(entry, indent=2, default=str).encode("utf-8"))
+        self._prune()
+        return entry
+
+    def forget(self, endpoint: str, digest: str, options: Dict[str, Any] | None = None) -> None:
+        self._path(endpoint, digest, options).unlink(missing_ok=True)
+
+    def forget_endpoint(self, endpoint: str) -> None:
+        """Drop every entry of `endpoint`, e.g. after the table its results describe was replaced."""
+        for path in self.directory.glob("*.json"):
+            try:
+                if json.loads(path.read_text(encoding="utf-8")).get("endpoint") == endpoint:
+                    path.unlink(missing_ok=True)
+            except (OSError, ValueError):
+                pass
+
+    def _prune(self) -> None:
+        try:
+            files = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            for old in files[:-self.keep] if self.keep > 0 else []:
+                old.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def ledger_info(entry: Dict[str, Any], replayed: bool) -> Dict[str, Any]:
+    """The `ledger` block added to upload responses."""
+    return {"replayed": replayed, "content_sha256": entry["content_sha256"], "recorded_at": entry["recorded_at"]}
+
+
+def unrecorded_info(digest: str) -> Dict[str, Any]:
+    """The `ledger` block of a response that was not recorded, so it will not be replayed."""
+    return {"replayed": False, "content_sha256": digest, "recorded_at": None}
+
+
+# Shared instance used by the upload endpoints
+upload_ledger = UploadLedger()
@@ -1,28 +1,46 @@
 # validate_properties.py
 from __future__ import annotations
 
+import csv
+import logging
 import math
+import multiprocessing
+import os
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, List, Tuple
+from typing import Any, Callable, Deque, Dict, List, Set, Tuple
 
+import numpy as np
 import pandas as pd
+from sqlalchemy.exc import SQLAlchemyError
+
+from data_processing.dup_index import DuplicateIndex
+from data_processing.row_hash import row_hashes
+from data_processing.validation_rules import DEFAULT_RULE_SET, RULE_SETS, ValidationPlan, get_plan
+
+logger = logging.getLogger("pipeline")
 
 
 # =========================
 # Simple, editable settings
 # =========================
-REQUIRED = ["Suburb", "Weekly Rent ($NZD)", "Days on Market", "Bedrooms"]
+# Rules are declared per dataset type in validation_rules.py. These mirror the
+# default set (the DataValidation sheet layout) for older callers.
+REQUIRED = list(RULE_SETS[DEFAULT_RULE_SET].required)
+RANGE_LIMITS = {col: (mn, mx) for col, mn, mx in RULE_SETS[DEFAULT_RULE_SET].ranges}
+DUP_KEYS = list(RULE_SETS[DEFAULT_RULE_SET].dup_keys)
 
-# Range checks (min, max). Keep numbers generous for rentals.
-RANGE_LIMITS = {
-    "Weekly Rent ($NZD)": (100, 10000),   # $100 – $10,000 / week
-    "Days on Market": (0, 730),           # 0 – 2 years
-    "Bedrooms": (0, 12),                  # integer only (see integer check below)
-}
+# Issues kept in memory (and returned by the API) per validation; the report CSV has all of them.
+ISSUE_SAMPLE_SIZE = int(os.getenv("INGEST_ISSUE_SAMPLE", "100"))
 
-# Heuristic duplicate key for the DataValidation sheet (no address column here).
-DUP_KEYS = ["Suburb", "Weekly Rent ($NZD)", "Bedrooms"]
+# Frames of at least PARALLEL_MIN_ROWS rows are checked in CHUNK_ROWS-row chunks
+# across VALIDATE_WORKERS processes (<= 0: one per CPU; 1: never).
+VALIDATE_WORKERS = int(os.getenv("VALIDATE_WORKERS", "0"))
+PARALLEL_MIN_ROWS = int(os.getenv("VALIDATE_PARALLEL_MIN_ROWS", "500000"))
+CHUNK_ROWS = int(os.getenv("VALIDATE_CHUNK_ROWS", "250000"))
 
 
 # =========================
@@ -32,7 +50,7 @@ DUP_KEYS = ["Suburb", "Weekly Rent ($NZD)", "Bedrooms"]
 class RowIssue:
     row: int          # 1-based row number in the file (includes header line offset)
     field: str        # column name (or a pipe-joined key group)
-    code: str         # missing_column | missing_required | invalid_number | invalid_integer | out_of_range | duplicate
+    code: str         # missing_column | missing_required | invalid_number | invalid_integer | out_of_range | duplicate | duplicate_existing
     message: str
 
 
@@ -43,6 +61,7 @@ class ValidationSummary:
     rejected: int
     duplicates: int
     report_csv: str | None = None
+    duplicates_existing: int = 0     # rows whose duplicate key is already stored (dup_index.py)
 
 
 # =========================
@@ -75,16 +94,355 @@ def _coerce_number(x: Any) -> float | None:
 # =========================
 # Main validation API
 # =========================
-def validate_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[RowIssue], ValidationSummary]:
+def validate_dataframe(df: pd.DataFrame, workers: int | None = None, plan: ValidationPlan | None = None,
+                       dup_index: DuplicateIndex | None = None) -> Tuple[pd.DataFrame, List[RowIssue], ValidationSummary]:
     """
-    Validate a dataframe of property rows according to REQUIRED fields,
-    numeric/type checks, value ranges, and in-file duplicates.
+    Validate a dataframe of property rows according to the required fields,
+    numeric/type checks, value ranges, and in-file duplicates of `plan`
+    (default: the rental_listings rule set, see validation_rules.py).
 
     Returns:
       accepted_df: DataFrame containing only rows that passed all rules
       issues:      list of RowIssue records describing rejections
       summary:     ValidationSummary with counts
+
+    The checks run one column at a time. Issues, their order, the summary and
+    accepted_df match the row-wise reference engine exactly. Large frames are
+    checked in row chunks by `workers` processes (default VALIDATE_WORKERS);
+    duplicates are still found over the whole frame, so the result is the same.
+
+    With `dup_index`, rows whose duplicate key was stored by an earlier upload
+    are rejected too (code duplicate_existing), looked up in batches.
     """
+    issues: List[RowIssue] = []
+    accepted_df, summary = _validate(df, issues.append, workers, plan, dup_index)
+    return accepted_df, issues, summary
+
+
+def validate_into(df: pd.DataFrame, report: "IssueReport", workers: int | None = None,
+                  plan: ValidationPlan | None = None,
+                  dup_index: DuplicateIndex | None = None) -> Tuple[pd.DataFrame, ValidationSummary]:
+    """
+    Same checks as validate_dataframe, but each issue goes to `report` as it is
+    found instead of into a list, so memory does not grow with the error count.
+    """
+    return _validate(df, report.add, workers, plan, dup_index)
+
+
+def _validate(df: pd.DataFrame, emit: Callable[[RowIssue], None], workers: int | None = None,
+              plan: ValidationPlan | None = None,
+              dup_index: DuplicateIndex | None = None) -> Tuple[pd.DataFrame, ValidationSummary]:
+    plan = plan or get_plan()
+    if not _columnwise_ok(df):
+        accepted_df, ref_issues, summary = _validate_dataframe_reference(df, plan, dup_index)
+        for issue in ref_issues:
+            emit(issue)
+        return accepted_df, summary
+
+    df = df.copy()
+    df.columns = [c.strip() for c in df.columns]
+
+    total_rows = len(df)
+
+    # A) Required columns exist
+    missing_columns = [col for col in plan.required if col not in df.columns]
+    for col in missing_columns:
+        emit(RowIssue(
+            row=-1,
+            field=col,
+            code="missing_column",
+            message=f"Required column '{col}' not found",
+        ))
+
+    if missing_columns:
+        # If structure is wrong, reject everything early
+        return pd.DataFrame(), ValidationSummary(
+            total=total_rows, accepted=0, rejected=total_rows, duplicates=0, report_csv=None
+        )
+
+    # B) Per-row checks, one column at a time (across a process pool for big frames)
+    workers = _worker_count(workers)
+    if workers > 1 and total_rows >= PARALLEL_MIN_ROWS:
+        bad_rows, parsed = _check_rows_parallel(df, emit, workers, plan)
+    else:
+        bad_rows, parsed = _check_rows(df, emit, plan)
+
+    # write back normalized numerics
+    for col, _, _ in plan.ranges:
+        if col in df.columns:
+            _write_numbers(df, col, *parsed[col])
+
+    # C) Duplicate detection within the file (keep first, flag later)
+    duplicates = 0
+    keys = list(plan.dup_keys)
+    if keys and all(k in df.columns for k in keys):
+        dup_mask = df.duplicated(subset=keys, keep="first")
+        duplicates = int(dup_mask.sum())
+        for idx in np.flatnonzero(dup_mask.to_numpy()).tolist():
+            emit(RowIssue(row=idx + 2, field="|".join(keys), code="duplicate",
+                          message="Duplicate based on " + ", ".join(keys)))
+            bad_rows.add(idx + 2)
+
+    # C2) Duplicates of rows stored by earlier uploads
+    existing = _stored_positions(df, plan, dup_index)
+    for idx in existing:
+        emit(RowIssue(row=idx + 2, field="|".join(keys), code="duplicate_existing",
+                      message="Already stored: " + ", ".join(keys)))
+        bad_rows.add(idx + 2)
+
+    # D) Build accepted_df by excluding any row that had an issue
+    bad_rows.discard(-1)
+    bad_idx = [r - 2 for r in bad_rows]  # convert back to 0-based
+    accepted_df = df.drop(index=bad_idx) if bad_idx else df.copy()
+
+    summary = ValidationSummary(
+        total=total_rows,
+        accepted=len(accepted_df),
+        rejected=total_rows - len(accepted_df),
+        duplicates=duplicates,
+        report_csv=None,
+        duplicates_existing=len(existing),
+    )
+    return accepted_df, summary
+
+
+# =========================
+# Column-wise helpers
+# =========================
+def _check_rows(df: pd.DataFrame, emit: Callable[[RowIssue], None],
+                plan: ValidationPlan) -> Tuple[Set[int], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    The plan's missing/number/range/integer checks, emitted in row order. Returns the
+    row numbers that had an issue and the (parsed ok, number) arrays of its range columns.
+    """
+    row_dtype = df.iloc[:0].values.dtype   # what iterrows() would hand each check
+    values = {col: _row_values(df, col, row_dtype) for col in plan.value_columns}
+    if row_dtype == object:
+        _apply_row_inference(df, values)
+    parsed = {col: _parse_numbers(values[col]) for col in plan.number_columns}
+
+    # (mask, field, code, message(i)) in the order the row-wise engine checks each row
+    checks = []
+    for col in plan.required:
+        checks.append((_missing(values[col]), col, "missing_required", lambda i, col=col: f"Missing value for {col}"))
+    for col, mn, mx in plan.ranges:
+        ok, num = parsed[col]
+        invalid = ~ok & ~_missing(values[col]) if col in plan.nullable else ~ok
+        checks.append((invalid, col, "invalid_number",
+                       lambda i, raw=values[col]: f"Cannot parse number from '{raw[i]}'"))
+        with np.errstate(invalid="ignore"):
+            outside = ok & ~((mn <= num) & (num <= mx))
+        checks.append((outside, col, "out_of_range",
+                       lambda i, col=col, mn=mn, mx=mx, num=num: f"{col}={float(num[i])} not in [{mn}, {mx}]"))
+    single_dtype = df.dtypes.nunique() == 1
+    for col in plan.integers:
+        ok, num = parsed[col]
+        if col in plan.range_columns and single_dtype:
+            # iterrows() rows of a single-dtype frame are views, so the row-wise check
+            # reads the value already written back: a parsed NaN ("nan") reads as unparsable
+            ok = ok & ~np.isnan(num)
+        with np.errstate(invalid="ignore"):
+            fractional = ok & ~(np.isfinite(num) & (num == np.floor(num)))
+        checks.append((fractional, col, "invalid_integer", lambda i, col=col: f"{col} must be an integer"))
+
+    positions = [np.flatnonzero(mask) for mask, *_ in checks]
+    order = np.concatenate([np.empty(0), *(np.full(len(p), k) for k, p in enumerate(positions))]).astype(np.intp)
+    flat = np.concatenate([np.empty(0), *positions]).astype(np.intp)
+    labels = df.index.tolist()
+    for j in np.lexsort((order, flat)).tolist():
+        i, (_, field, code, message) = int(flat[j]), checks[order[j]]
+        # +2 to present a human-friendly 1-based row number including header line
+        emit(RowIssue(row=labels[i] + 2, field=field, code=code, message=message(i)))
+    return {labels[i] + 2 for i in np.unique(flat).tolist()}, {col: parsed[col] for col in plan.range_columns}
+
+
+def _check_chunk(chunk: pd.DataFrame,
+                 plan: ValidationPlan) -> Tuple[Tuple[list, ...], Set[int], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    issues: List[RowIssue] = []
+    bad_rows, parsed = _check_rows(chunk, issues.append, plan)
+    # issues go back as four columns: far cheaper to pickle than RowIssue objects
+    columns = ([i.row for i in issues], [i.field for i in issues], [i.code for i in issues], [i.message for i in issues])
+    return columns, bad_rows, parsed
+
+
+def _worker_count(workers: int | None) -> int:
+    workers = VALIDATE_WORKERS if workers is None else workers
+    return max(1, os.cpu_count() or 1) if workers <= 0 else workers
+
+
+def _check_rows_parallel(df: pd.DataFrame, emit: Callable[[RowIssue], None], workers: int,
+                         plan: ValidationPlan) -> Tuple[Set[int], Dict[str, Tuple[np.ndarray, np.ndarray]]]:
+    """
+    _check_rows over row chunks in worker processes. Every check only looks at
+    its own row, so chunks are independent; results are taken back in chunk
+    order, which keeps issues in row order. At most 2 x workers chunks are in
+    flight. The parsed arrays are joined so the caller writes numbers back over
+    whole columns, exactly as for one process.
+    """
+    size = max(1, min(CHUNK_ROWS, -(-len(df) // workers)))
+    bad_rows: Set[int] = set()
+    parts: Dict[str, List[Tuple[np.ndarray, np.ndarray]]] = {col: [] for col in plan.range_columns}
+    pending: Deque[Future] = deque()
+
+    def collect(future: Future) -> None:
+        columns, part_bad, parsed = future.result()
+        for issue in map(RowIssue, *columns):
+            emit(issue)
+        bad_rows.update(part_bad)
+        for col in plan.range_columns:
+            parts[col].append(parsed[col])
+
+    # spawn: the API process has threads (log writer, thread pool); forking them is unsafe
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        for start in range(0, len(df), size):
+            pending.append(pool.submit(_check_chunk, df.iloc[start:start + size], plan))
+            if len(pending) >= 2 * workers:
+                collect(pending.popleft())
+        while pending:
+            collect(pending.popleft())
+    return bad_rows, {col: (np.concatenate([ok for ok, _ in p]), np.concatenate([num for _, num in p]))
+                      for col, p in parts.items()}
+
+
+def _columnwise_ok(df: pd.DataFrame) -> bool:
+    """Unique labels (after stripping headers) and plain NumPy dtypes; anything else goes through the reference engine."""
+    return (
+        df.index.is_unique
+        and len({str(c).strip() for c in df.columns}) == df.shape[1]
+        and all(isinstance(dt, np.dtype) for dt in df.dtypes)
+    )
+
+
+def _row_values(df: pd.DataFrame, col: str, row_dtype: np.dtype) -> np.ndarray:
+    """A column's values as the scalars iterrows() puts in each row (None if the column is absent)."""
+    if col not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    if row_dtype.kind in "Mm":
+        return df[col].to_numpy(dtype=object)     # rows box them as Timestamp / Timedelta
+    return df[col].to_numpy(dtype=row_dtype)
+
+
+_TEMPORAL = (datetime, timedelta, np.datetime64, np.timedelta64, pd.Period, pd.Interval)
+
+
+def _apply_row_inference(df: pd.DataFrame, values: Dict[str, np.ndarray]) -> None:
+    """
+    iterrows() builds each row with pd.Series(object values), which turns a row of
+    only NaT/None/NaN and dates (or timedeltas, periods) into a datetime-like row:
+    its None/NaN cells then read as NaT. Redo exactly that for the (rare) rows it applies to.
+    """
+    n = len(df)
+    candidate = np.ones(n, dtype=bool)      # every cell NA or temporal (a superset is fine: rebuilding is exact)
+    plain_na = np.ones(n, dtype=bool)       # every cell None / float NaN: such rows stay object
+    columns = [df.iloc[:, j].to_numpy() for j in range(df.shape[1])]
+    for col in sorted(columns, key=lambda c: c.dtype == object):     # cheap numeric columns first
+        if col.dtype.kind in "Mm":
+            plain_na[:] = False
+        elif col.dtype.kind == "f":
+            candidate &= np.isnan(col)
+        elif col.dtype == object:
+            na = pd.isna(col)
+            for i in np.flatnonzero(candidate & ~na).tolist():
+                candidate[i] = isinstance(col[i], _TEMPORAL)
+                plain_na[i] = False
+            for i in np.flatnonzero(candidate & na & plain_na).tolist():
+                plain_na[i] = col[i] is None or isinstance(col[i], float)
+        else:
+            return                          # ints / bools are never NA
+        if not candidate.any():
+            return
+    rows = np.flatnonzero(candidate & ~plain_na)
+    if not len(rows):
+        return
+    for col in values:
+        values[col] = values[col].copy()
+    for i in rows.tolist():
+        row = pd.Series(df.iloc[[i]].to_numpy(dtype=object)[0], index=df.columns)
+        for col in values:
+            values[col][i] = row.get(col)
+
+
+def _missing(values: np.ndarray) -> np.ndarray:
+    """_is_nan() of every value."""
+    if values.dtype == np.float64:      # np.float64 is a float
+        return np.isnan(values)
+    if values.dtype != object:
+        return np.zeros(len(values), dtype=bool)
+    out = pd.isna(values)               # superset: also pd.NA, NaT, float32 NaN, ...
+    for i in np.flatnonzero(out).tolist():
+        out[i] = _is_nan(values[i])
+    return out
+
+
+# Exact types _coerce_number() takes as numbers (1) or strings (2); subclasses go through the scalar path
+_VALUE_KINDS = {float: 1, int: 1, bool: 1, np.float64: 1, str: 2}
+
+
+def _parse_numbers(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    _coerce_number() of every value, as (parsed mask, float64 values).
+    Numbers convert in one step, strings are parsed once per distinct value,
+    anything else one by one.
+    """
+    n = len(values)
+    if values.dtype == np.float64:
+        return ~np.isnan(values), values
+    if values.dtype != object:          # np.int64, np.bool_, ... are not int/float: never parsed
+        return np.zeros(n, dtype=bool), np.full(n, np.nan)
+
+    ok = np.zeros(n, dtype=bool)
+    num = np.full(n, np.nan)
+    kinds = np.fromiter((_VALUE_KINDS.get(type(v), 0) for v in values), dtype=np.int8, count=n)
+
+    numbers = kinds == 1
+    if numbers.any():
+        floats = values[numbers].astype(np.float64)
+        ok[numbers], num[numbers] = ~np.isnan(floats), floats
+
+    strings = kinds == 2
+    if strings.any():
+        codes, uniques = pd.factorize(values[strings])
+        coerced = [_coerce_number(u) for u in uniques]
+        ok[strings] = np.array([c is not None for c in coerced], dtype=bool)[codes]
+        num[strings] = np.array([np.nan if c is None else c for c in coerced], dtype=np.float64)[codes]
+
+    for i in np.flatnonzero(~(numbers | strings)).tolist():
+        c = _coerce_number(values[i])
+        if c is not None:
+            ok[i], num[i] = True, c
+    return ok, num
+
+
+def _write_numbers(df: pd.DataFrame, col: str, ok: np.ndarray, num: np.ndarray) -> None:
+    """df.at[row, col] = parsed value for every parsed row, with the dtype the row-wise writes end up with."""
+    if not ok.any():
+        return
+    current = df[col].to_numpy()
+    kind = current.dtype.kind
+    if kind == "f":
+        return                                              # its own values written back
+    if kind in "iu" and ok.all() and (np.abs(current) < 2 ** 53).all():
+        return                                              # floats equal the ints: the column stays integer
+    if current.dtype == object or (kind == "b" and ok.all()):
+        out = current.astype(object)                        # bool columns become object on the first write
+        out[ok] = num[ok].astype(object)
+        df[col] = pd.Series(out, index=df.index, dtype=object)     # dtype=object: no datetime inference
+        return
+    labels = df.index
+    for i in np.flatnonzero(ok).tolist():
+        df.at[labels[i], col] = float(num[i])
+
+
+# =========================
+# Row-wise reference engine
+# =========================
+def _validate_dataframe_reference(df: pd.DataFrame, plan: ValidationPlan | None = None,
+                                  dup_index: DuplicateIndex | None = None) -> Tuple[pd.DataFrame, List[RowIssue], ValidationSummary]:
+    """
+    Row-by-row engine (iterrows). It defines the behaviour validate_dataframe()
+    reproduces; kept for frames the column-wise engine does not handle and for parity tests.
+    """
+    plan = plan or get_plan()
     df = df.copy()
     df.columns = [c.strip() for c in df.columns]
 
@@ -92,7 +450,7 @@ def validate_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[RowIssue],
     total_rows = len(df)
 
     # A) Required columns exist
-    for col in REQUIRED:
+    for col in plan.required:
         if col not in df.columns:
             issues.append(RowIssue(
                 row=-1,
@@ -114,15 +472,17 @@ def validate_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[RowIssue],
 
     for idx, row in df.iterrows():
         # Required fields present
-        for col in REQUIRED:
+        for col in plan.required:
             if _is_nan(row.get(col)):
                 record_issue(idx, col, "missing_required", f"Missing value for {col}")
 
         # Coerce numeric & range checks
-        for col, (mn, mx) in RANGE_LIMITS.items():
+        for col, mn, mx in plan.ranges:
             raw = row.get(col)
             val = _coerce_number(raw)
             if val is None:
+                if col in plan.nullable and _is_nan(raw):
+                    continue
                 record_issue(idx, col, "invalid_number", f"Cannot parse number from '{raw}'")
                 continue
             if not (mn <= val <= mx):
@@ -130,20 +490,26 @@ def validate_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[RowIssue],
             # write back normalized numeric
             df.at[idx, col] = val
 
-        # Bedrooms must be an integer value if provided
-        b = _coerce_number(row.get("Bedrooms"))
-        if b is not None and not float(b).is_integer():
-            record_issue(idx, "Bedrooms", "invalid_integer", "Bedrooms must be an integer")
+        # Integer columns must hold whole numbers if provided
+        for col in plan.integers:
+            b = _coerce_number(row.get(col))
+            if b is not None and not float(b).is_integer():
+                record_issue(idx, col, "invalid_integer", f"{col} must be an integer")
 
     # C) Duplicate detection within the file (keep first, flag later)
     duplicates = 0
-    if all(k in df.columns for k in DUP_KEYS):
-        dup_mask = df.duplicated(subset=DUP_KEYS, keep="first")
+    keys = list(plan.dup_keys)
+    if keys and all(k in df.columns for k in keys):
+        dup_mask = df.duplicated(subset=keys, keep="first")
         duplicates = int(dup_mask.sum())
         for idx, is_dup in enumerate(dup_mask.tolist()):
             if is_dup:
-                record_issue(idx, "|".join(DUP_KEYS), "duplicate",
-                             "Duplicate based on " + ", ".join(DUP_KEYS))
+                record_issue(idx, "|".join(keys), "duplicate",
+                             "Duplicate based on " + ", ".join(keys))
+
+    existing = _stored_positions(df, plan, dup_index)
+    for idx in existing:
+        record_issue(idx, "|".join(keys), "duplicate_existing", "Already stored: " + ", ".join(keys))
 
     # D) Build accepted_df by excluding any row that had an issue
     bad_rows = {i.row for i in issues if i.row != -1}
@@ -156,10 +522,50 @@ def validate_dataframe(df: pd.DataFrame) -> Tuple[pd.DataFrame, List[RowIssue],
         rejected=total_rows - len(accepted_df),
         duplicates=duplicates,
         report_csv=None,
+        duplicates_existing=len(existing),
     )
     return accepted_df, issues, summary
 
 
+# =========================
+# Duplicates across uploads
+# =========================
+def dup_key_hashes(df: pd.DataFrame, plan: ValidationPlan | None = None) -> List[str]:
+    """
+    Hash of every row's duplicate key, as stored in the DuplicateIndex. Number
+    columns are hashed as parsed, so 650, 650.0 and "650" give the same key.
+    """
+    plan = plan or get_plan()
+    keys: Dict[str, Any] = {}
+    for col in plan.dup_keys:
+        values = df[col].to_numpy()
+        if col in plan.number_columns:
+            if values.dtype.kind in "iuf":
+                ok, num = ~np.isnan(values.astype(np.float64)), values.astype(np.float64)
+            else:
+                ok, num = _parse_numbers(values.astype(object))
+            values = num if ok.all() else np.where(ok, num.astype(object), values.astype(object))
+        keys[col] = values
+    return row_hashes(pd.DataFrame(keys))
+
+
+def _stored_positions(df: pd.DataFrame, plan: ValidationPlan,
+                      dup_index: DuplicateIndex | None) -> List[int]:
+    """
+    0-based positions of the rows whose duplicate key `dup_index` already holds.
+    If the index cannot be read, that is logged and no row counts as stored.
+    """
+    keys = list(plan.dup_keys)
+    if dup_index is None or df.empty or not keys or not all(k in df.columns for k in keys):
+        return []
+    try:
+        stored = dup_index.contains(plan.name, dup_key_hashes(df, plan))
+    except SQLAlchemyError as e:
+        logger.warning(f"duplicate index lookup failed, checking in-file duplicates only: {e}")
+        return []
+    return np.flatnonzero(stored).tolist()
+
+
 def save_report_csv(issues: List[RowIssue], dest: str | Path) -> str:
     """
     Write the issues list to a CSV (row, field, code, message) and return its path.
@@ -171,6 +577,61 @@ def save_report_csv(issues: List[RowIssue], dest: str | Path) -> str:
     return str(dest)
 
 
+class IssueReport:
+    """
+    Receives issues one at a time (validate_into) and writes each to a report
+    CSV in the save_report_csv layout as it arrives. Keeps only per-code counts
+    and the first `sample_size` issues in memory.
+
+    The file is created on the first issue; `path` stays None for a clean file.
+    Use as a context manager: a report left by a failed validation is removed.
+    """
+
+    def __init__(self, dest: str | Path, sample_size: int = ISSUE_SAMPLE_SIZE):
+        self.dest = Path(dest)
+        self.sample_size = sample_size
+        self.counts: Counter = Counter()
+        self.sample: List[RowIssue] = []
+        self.path: str | None = None
+        self._file = None
+        self._writer = None
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def truncated(self) -> bool:
+        return self.total > len(self.sample)
+
+    def add(self, issue: RowIssue) -> None:
+        if self._writer is None:
+            self.dest.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.dest, "w", newline="", encoding="utf-8")
+            self._writer = csv.writer(self._file, lineterminator=os.linesep)
+            self._writer.writerow(["row", "field", "code", "message"])
+            self.path = str(self.dest)
+        self._writer.writerow([issue.row, issue.field, issue.code, issue.message])
+        self.counts[issue.code] += 1
+        if len(self.sample) < self.sample_size:
+            self.sample.append(issue)
+
+    def close(self) -> str | None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self.path
+
+    def __enter__(self) -> "IssueReport":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+        if exc_type is not None and self.path:
+            Path(self.path).unlink(missing_ok=True)
+            self.path = None
+
+
 # ===========================================================
 # Backwards-compat wrappers (keeps your older flow working)
 # ===========================================================
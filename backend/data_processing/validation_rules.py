@@ -0,0 +1,166 @@
+# backend/data_processing/validation_rules.py
+"""
+Declarative validation rule sets, one per dataset type, compiled once into plans.
+
+- A RuleSet names the required columns, numeric ranges (min, max), whole-number
+  columns, range columns that may be blank, and the in-file duplicate key.
+  RULE_SETS holds the built-in ones: rental_listings (the DataValidation sheet
+  layout), provider_records, msd_registers and linz_titles. RuleSet.from_dict
+  builds one from plain JSON-style data.
+- compile_rules() turns a rule set into a ValidationPlan: the column sets and
+  the ordered checks the column-wise engine in validate_properties.py runs as
+  one NumPy mask per check. Plans are cached by the rule set's content hash, so
+  each set is compiled once per process.
+- select_rule_set() picks the rule set that fits a file's header (all required
+  columns present, the most specific set first), for /ingest/file.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, FrozenSet, Iterable, Tuple
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    name: str
+    required: Tuple[str, ...] = ()
+    ranges: Tuple[Tuple[str, float, float], ...] = ()   # (column, min, max), checked in this order
+    integers: Tuple[str, ...] = ()                      # parsed values must be whole numbers
+    nullable: Tuple[str, ...] = ()                      # range columns where a blank cell is not an error
+    dup_keys: Tuple[str, ...] = ()                      # later rows repeating these values are duplicates
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RuleSet":
+        """{"name", "required": [...], "ranges": {col: [min, max]}, "integers", "nullable", "dup_keys"}"""
+        return cls(
+            name=data["name"],
+            required=tuple(data.get("required", ())),
+            ranges=tuple((col, mn, mx) for col, (mn, mx) in data.get("ranges", {}).items()),
+            integers=tuple(data.get("integers", ())),
+            nullable=tuple(data.get("nullable", ())),
+            dup_keys=tuple(data.get("dup_keys", ())),
+        )
+
+    def digest(self) -> str:
+        return hashlib.sha256(json.dumps(asdict(self), default=str).encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass(frozen=True)
+class ValidationPlan:
+    name: str
+    digest: str
+    required: Tuple[str, ...]
+    ranges: Tuple[Tuple[str, float, float], ...]
+    integers: Tuple[str, ...]
+    nullable: FrozenSet[str]
+    dup_keys: Tuple[str, ...]
+    range_columns: FrozenSet[str]       # numbers written back into the frame
+    number_columns: Tuple[str, ...]     # parsed once: range and integer columns
+    value_columns: Tuple[str, ...]      # read once: required and number columns
+
+
+# =========================
+# Built-in rule sets
+# =========================
+RULE_SETS: Dict[str, RuleSet] = {r.name: r for r in map(RuleSet.from_dict, [
+    {
+        # DataValidation sheet (no address column, so the duplicate key is a heuristic)
+        "name": "rental_listings",
+        "required": ["Suburb", "Weekly Rent ($NZD)", "Days on Market", "Bedrooms"],
+        "ranges": {
+            "Weekly Rent ($NZD)": [100, 10000],   # $100 – $10,000 / week
+            "Days on Market": [0, 730],           # 0 – 2 years
+            "Bedrooms": [0, 12],
+        },
+        "integers": ["Bedrooms"],
+        "dup_keys": ["Suburb", "Weekly Rent ($NZD)", "Bedrooms"],
+    },
+    {
+        # Listing exports in the `properties` table layout (see services/ingest_properties._normalize)
+        "name": "provider_records",
+        "required": ["external_id", "address", "suburb", "bedrooms", "bathrooms"],
+        "ranges": {
+            "bedrooms": [1, 12],
+            "bathrooms": [1, 12],
+            "floor_area": [10, 5000],
+            "rent_weekly": [100, 10000],
+        },
+        "integers": ["bedrooms", "bathrooms"],
+        "nullable": ["floor_area", "rent_weekly"],
+        "dup_keys": ["external_id"],
+    },
+    {
+        # MSD housing register reports in long format (transform_registers.transform_register_report)
+        "name": "msd_registers",
+        "required": ["register_type", "month_code", "count"],
+        "ranges": {"count": [0, 1_000_000]},
+        "integers": ["count"],
+        "dup_keys": ["register_type", "month_code"],
+    },
+    {
+        # LINZ property titles (linz_to_postgres column list)
+        "name": "linz_titles",
+        "required": ["id", "title_number", "status", "land_district"],
+        "ranges": {"number_owners": [0, 10000]},
+        "integers": ["id", "number_owners"],
+        "nullable": ["number_owners"],
+        "dup_keys": ["title_number"],
+    },
+])}
+DEFAULT_RULE_SET = "rental_listings"
+
+
+# =========================
+# Compilation
+# =========================
+_PLANS: Dict[str, ValidationPlan] = {}
+
+
+def compile_rules(rules: RuleSet) -> ValidationPlan:
+    """The plan for `rules`, compiled on first use and cached by content hash."""
+    digest = rules.digest()
+    plan = _PLANS.get(digest)
+    if plan is not None:
+        return plan
+
+    range_columns = [col for col, _, _ in rules.ranges]
+    if len(set(range_columns)) != len(range_columns):
+        raise ValueError(f"{rules.name}: a column has more than one range")
+    for col, mn, mx in rules.ranges:
+        if not mn <= mx:
+            raise ValueError(f"{rules.name}: empty range for {col}: [{mn}, {mx}]")
+    if not set(rules.nullable) <= set(range_columns):
+        raise ValueError(f"{rules.name}: nullable columns must have a range")
+
+    number_columns = tuple(dict.fromkeys([*range_columns, *rules.integers]))
+    plan = ValidationPlan(
+        name=rules.name,
+        digest=digest,
+        required=rules.required,
+        ranges=rules.ranges,
+        integers=rules.integers,
+        nullable=frozenset(rules.nullable),
+        dup_keys=rules.dup_keys,
+        range_columns=frozenset(range_columns),
+        number_columns=number_columns,
+        value_columns=tuple(dict.fromkeys([*rules.required, *number_columns])),
+    )
+    _PLANS[digest] = plan
+    return plan
+
+
+def get_plan(name: str = DEFAULT_RULE_SET) -> ValidationPlan:
+    """Compiled plan of a built-in rule set; KeyError for an unknown name."""
+    return compile_rules(RULE_SETS[name])
+
+
+def select_rule_set(columns: Iterable[Any], rule_sets: Dict[str, RuleSet] = RULE_SETS) -> RuleSet | None:
+    """
+    The rule set whose required columns are all in `columns` (headers are
+    stripped). When several fit, the one requiring the most columns wins.
+    """
+    present = {str(c).strip() for c in columns}
+    fits = [r for r in rule_sets.values() if r.required and present.issuperset(r.required)]
+    return max(fits, key=lambda r: len(r.required), default=None)
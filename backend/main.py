@@ -1,15 +1,17 @@
 # backend/main.py
 from dotenv import load_dotenv
 import os
-import shutil
+import hashlib
 import logging
-import pandas as pd
+import tempfile
+from datetime import datetime
 from pathlib import Path
 
 # Imports for FastAPI and related components
-from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Body
+from fastapi import FastAPI, UploadFile, File, Request, HTTPException, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field, validator
 
 # Try imports relative to current working dir first (when running from backend/)
@@ -17,7 +19,9 @@ try:
     # Routers & internal modules
     from routers.properties import router as properties_router
     from routers import ingest  # NEW: file validation/upload router
-    from data_processing.dataset_uploader import process_upload
+    from data_processing.dataset_uploader import ensure_table, process_upload_file, stored_rows_intact, stored_rows_state
+    from data_processing.row_filter import row_filters
+    from data_processing.upload_ledger import content_hash, ledger_info, upload_ledger
     from schemas import UploadSummary
     from db import engine, SessionLocal
     from models import Base as SQLBase
@@ -28,15 +32,22 @@ try:
     from data_scraper.scraper import scrape_listings
     from data_processing.cleaner import clean_data
     from data_processing.predictor import predict_rent
-    from Machine_Learning_Model.retrain_model import retrain_rent_model
-    from Machine_Learning_Model.predict_logger import log_prediction
-    from Machine_Learning_Model.rental_price_model import load_model, prepare_input_dataframe
+    from data_processing.dataset_cache import dataset_cache, pick_dataset_path, read_current_dataset
+    from Machine_Learning_Model.retrain_model import remove_training_batch, verify_incremental
+    from Machine_Learning_Model.retrain_jobs import RetrainJobManager
+    from Machine_Learning_Model.incremental_trainer import IncrementalTrainer
+    from Machine_Learning_Model.predict_logger import log_prediction, log_predictions, get_writer as get_log_writer
+    from Machine_Learning_Model import batch_predict, batch_scheduler
+    from Machine_Learning_Model.model_registry import registry as model_registry, atomic_write_bytes
+    from Machine_Learning_Model.prediction_cache import prediction_cache
 
 except ModuleNotFoundError:
     # Fallback absolute-style imports if run from repo root
     from backend.routers.properties import router as properties_router
     from backend.routers import ingest  # NEW: file validation/upload router
-    from backend.data_processing.dataset_uploader import process_upload
+    from backend.data_processing.dataset_uploader import ensure_table, process_upload_file, stored_rows_intact, stored_rows_state
+    from backend.data_processing.row_filter import row_filters
+    from backend.data_processing.upload_ledger import content_hash, ledger_info, upload_ledger
     from backend.schemas import UploadSummary
     from backend.db import engine, SessionLocal
     from backend.models import Base as SQLBase
@@ -46,9 +57,14 @@ except ModuleNotFoundError:
     from backend.data_scraper.scraper import scrape_listings
     from backend.data_processing.cleaner import clean_data
     from backend.data_processing.predictor import predict_rent
-    from backend.Machine_Learning_Model.retrain_model import retrain_rent_model
-    from backend.Machine_Learning_Model.predict_logger import log_prediction
-    from backend.Machine_Learning_Model.rental_price_model import load_model, prepare_input_dataframe
+    from backend.data_processing.dataset_cache import dataset_cache, pick_dataset_path, read_current_dataset
+    from backend.Machine_Learning_Model.retrain_model import remove_training_batch, verify_incremental
+    from backend.Machine_Learning_Model.retrain_jobs import RetrainJobManager
+    from backend.Machine_Learning_Model.incremental_trainer import IncrementalTrainer
+    from backend.Machine_Learning_Model.predict_logger import log_prediction, log_predictions, get_writer as get_log_writer
+    from backend.Machine_Learning_Model import batch_predict, batch_scheduler
+    from backend.Machine_Learning_Model.model_registry import registry as model_registry, atomic_write_bytes
+    from backend.Machine_Learning_Model.prediction_cache import prediction_cache
 
 # -----------------------------
 # Environment & Logging
@@ -65,10 +81,41 @@ app = FastAPI(title="MJ Home API")
 # Ensure tables exist at startup
 SQLBase.metadata.create_all(bind=engine)
 
+# Drop cached predictions as soon as a retrained model is swapped in
+model_registry.subscribe(prediction_cache.clear)
+
+# Optional micro-batching of concurrent /predict calls (PREDICT_MICROBATCH=1)
+predict_scheduler = (
+    batch_scheduler.MicroBatchScheduler(batch_predict.score_rows) if batch_scheduler.ENABLED else None
+)
+
+
+
+def _on_retrain_finished(state: dict):
+    # serve the worker's model straight away, and accept suburbs it was trained on
+    snapshot = model_registry.refresh()
+    if snapshot is None or snapshot.manifest is None:
+        return
+    new = set(snapshot.manifest.suburbs) - set(ALLOWED_SUBURBS)
+    if new:
+        ALLOWED_SUBURBS.extend(sorted(new))
+        ALLOWED_SUBURBS.sort()
+
+
+# Retraining runs in a worker process; overlapping triggers merge into one follow-up job
+retrain_jobs = RetrainJobManager(on_finished=_on_retrain_finished)
+
 # Register routers
 app.include_router(properties_router)
 app.include_router(ingest.router)  # NEW: exposes POST /ingest/file
 
+
+@app.on_event("shutdown")
+def drain_prediction_log():
+    # Flush queued prediction log rows before the worker exits
+    get_log_writer().close()
+    retrain_jobs.shutdown()
+
 # Enable CORS for frontend communication
 app.add_middleware(
     CORSMiddleware,
@@ -81,23 +128,22 @@ app.add_middleware(
 # -----------------------------
 # Allowed suburbs loader (CSV/XLSX)
 # -----------------------------
-_xlsx = Path("data_processing") / "MockData.xlsx"
-_csv = Path("data_processing") / "MockData.csv"
-
-if not _xlsx.exists() and not _csv.exists():
+if pick_dataset_path() is None:
     raise FileNotFoundError("Neither MockData.xlsx nor MockData.csv found in data_processing/")
 
-try:
-    if _xlsx.exists() and (not _csv.exists() or _xlsx.stat().st_mtime >= _csv.stat().st_mtime):
-        df = pd.read_excel(_xlsx)
-    else:
-        df = pd.read_csv(_csv)
 
-    ALLOWED_SUBURBS = sorted(df["Suburb"].dropna().astype(str).str.strip().unique().tolist())
-    logger.info("Allowed suburbs loaded: %d suburbs", len(ALLOWED_SUBURBS))
-except Exception as e:
-    logger.error("Error loading suburbs: %s", str(e))
-    ALLOWED_SUBURBS = []
+def _load_allowed_suburbs() -> list:
+    try:
+        _, df = read_current_dataset()  # parsed once per file content (shared dataset cache)
+        suburbs = sorted(df["Suburb"].dropna().astype(str).str.strip().unique().tolist())
+        logger.info("Allowed suburbs loaded: %d suburbs", len(suburbs))
+        return suburbs
+    except Exception as e:
+        logger.error("Error loading suburbs: %s", str(e))
+        return []
+
+
+ALLOWED_SUBURBS = _load_allowed_suburbs()
 
 # -----------------------------
 # Directory for cleaned datasets
@@ -146,14 +192,63 @@ def get_data(limit: int = 100):
     return {"status": "success", "data": data}
 
 
-@app.post("/retrain-model", summary="Retrain ML Model", description="Manually retrain the rental price prediction model using the latest data.")
-def retrain_model_endpoint():
-    result = retrain_rent_model()
-    return {"status": "done", "message": result}
-
-
-@app.post("/upload-data", summary="Upload and Retrain", description="Upload a new dataset (.xlsx or .csv) and automatically retrain the rental price model.")
-async def upload_data(file: UploadFile = File(...)):
+@app.post("/retrain-model", summary="Retrain ML Model", description="Manually retrain the rental price prediction model using the latest data. Returns a job id; poll /retrain-jobs/{job_id}.")
+async def retrain_model_endpoint(
+    wait: bool = Query(False, description="Block until the retrain job has finished"),
+    training_source: str = Query("mockdata", pattern="^(mockdata|properties)$", description="Train on MockData or stream the properties table"),
+    property_source: str | None = Query(None, description="properties: only listings from this provider (Property.source)"),
+    since: datetime | None = Query(None, description="properties: only listings created at or after this time"),
+    until: datetime | None = Query(None, description="properties: only listings created before this time"),
+    chunk_size: int | None = Query(None, gt=0, description="properties: rows fetched per chunk (default TRAINING_CHUNK_ROWS)"),
+    model_selection: bool = Query(False, description="mockdata: cross-validate several estimators and publish the best one within the p99 latency budget (MODEL_SELECTION_P99_MS)"),
+):
+    properties = None
+    if training_source == "properties":
+        if model_selection:
+            raise HTTPException(status_code=400, detail="model_selection is only available when training on mockdata.")
+        properties = {
+            "source": property_source,
+            "since": since.isoformat() if since else None,
+            "until": until.isoformat() if until else None,
+            "chunk_size": chunk_size,
+        }
+    job, merged = retrain_jobs.trigger(full=True, properties=properties, select=model_selection)
+    if wait:
+        job = await run_in_threadpool(retrain_jobs.wait, job["job_id"])
+    return {"status": job["status"], "job_id": job["job_id"], "merged": merged, "job": job}
+
+
+def _upload_still_applies(entry, incremental: bool) -> bool:
+    """
+    A recorded /upload-data result can be replayed while its retrain job has not
+    failed or rejected the file and, for a dataset replacement, the dataset on
+    disk is still this file; for an incremental batch, while the job is still
+    pending or the batch it added is still in the training statistics (not
+    removed by DELETE /training-batches or dropped by a full retrain).
+    """
+    job = retrain_jobs.get(entry["result"]["job_id"])
+    if job is not None and (job["status"] == "failed" or job.get("rejected")):
+        return False
+    if incremental:
+        if job is None or job["status"] != "succeeded":
+            return job is not None  # queued/running; a pruned job cannot be checked
+        source = (entry.get("state") or {}).get("filename")
+        added = job.get("metrics", {}).get("incremental", {}).get("batches", [])
+        batch_ids = [b["batch_id"] for b in added if b.get("source") == source]
+        return bool(batch_ids) and set(batch_ids) <= set(IncrementalTrainer.load().batches)
+    current = pick_dataset_path()
+    return current is not None and dataset_cache.content_hash(current) == entry["content_sha256"]
+
+
+@app.post("/upload-data", summary="Upload and Retrain", description="Upload a new dataset (.xlsx or .csv) and retrain the rental price model in the background. Returns a job id; poll /retrain-jobs/{job_id}.")
+async def upload_data(
+    file: UploadFile = File(...),
+    incremental: bool = Query(
+        False,
+        description="Add the file as a new training batch on top of the saved statistics instead of replacing the dataset and refitting.",
+    ),
+    force: bool = Query(False, description="Reprocess even if these exact bytes were uploaded before"),
+):
     try:
         logger.info("[UPLOAD] Upload endpoint hit")
 
@@ -161,28 +256,121 @@ async def upload_data(file: UploadFile = File(...)):
         if not (filename.endswith(".xlsx") or filename.endswith(".csv")):
             return {"status": "error", "message": "Invalid file format. Please upload an Excel .xlsx or a .csv file."}
 
-        # Save to MockData.xlsx or MockData.csv
-        save_path = Path("data_processing") / ("MockData.xlsx" if filename.endswith(".xlsx") else "MockData.csv")
-        save_path.parent.mkdir(parents=True, exist_ok=True)
-
-        logger.info("[UPLOAD] Saving uploaded file to %s", save_path)
-        with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-
-        logger.info("[UPLOAD] File saved. Starting model retraining...")
-        retrain_result = retrain_rent_model()
-
-        return {
+        raw = await file.read()
+        digest = content_hash(raw)
+        options = {"incremental": incremental}
+        previous = None if force else upload_ledger.lookup("upload-data", digest, options)
+        if previous is not None and _upload_still_applies(previous, incremental):
+            logger.info("[UPLOAD] %s was already processed; returning job %s", file.filename, previous["result"]["job_id"])
+            return {**previous["result"], "ledger": ledger_info(previous, replayed=True)}
+
+        if incremental:
+            logger.info("[UPLOAD] Queuing %s as an incremental training batch", file.filename)
+            job, merged = retrain_jobs.trigger(upload=(file.filename or filename, raw))
+            message = "Batch queued for incremental training."
+        else:
+            # Save to MockData.xlsx or MockData.csv (atomic: a running retrain never reads a partial file)
+            save_path = Path("data_processing") / ("MockData.xlsx" if filename.endswith(".xlsx") else "MockData.csv")
+            logger.info("[UPLOAD] Saving uploaded file to %s", save_path)
+            atomic_write_bytes(save_path, raw)
+
+            # Drop cached copies of the old dataset; parsing the new one here also
+            # warms the cache for the retrain worker (same content hash)
+            dataset_cache.invalidate()
+            ALLOWED_SUBURBS[:] = await run_in_threadpool(_load_allowed_suburbs)
+
+            logger.info("[UPLOAD] File saved. Queuing model retraining...")
+            job, merged = retrain_jobs.trigger(full=True)
+            message = "File uploaded; model retraining queued."
+
+        result = {
             "status": "success",
-            "message": "File uploaded and model retrained.",
-            "retrain_result": retrain_result
+            "message": message,
+            "job_id": job["job_id"],
+            "merged": merged,
         }
+        state = {"filename": file.filename or filename} if incremental else None
+        entry = upload_ledger.record("upload-data", digest, result, options=options, state=state)
+        return {**result, "ledger": ledger_info(entry, replayed=False)}
 
     except Exception as e:
         logger.error("[UPLOAD] Error during upload or retrain: %s", str(e))
         return {"status": "error", "message": f"Upload or retraining failed: {str(e)}"}
 
 
+@app.get(
+    "/retrain-jobs/{job_id}",
+    summary="Retrain Job Status",
+    description="Status (queued/running/succeeded/failed), current stage and training metrics of a retrain job.",
+)
+def retrain_job_status(job_id: str):
+    job = retrain_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown retrain job '{job_id}'.")
+    return job
+
+
+@app.get(
+    "/model/versions",
+    summary="Model Versions",
+    description="Saved model artifacts (newest first) with their metrics, training data hash and which one is being served.",
+)
+def list_model_versions():
+    current = model_registry.artifacts.current_version()
+    return {
+        "current": current,
+        "versions": [{**meta, "current": meta["version"] == current} for meta in model_registry.artifacts.versions()],
+    }
+
+
+@app.post(
+    "/model/rollback/{version}",
+    summary="Roll Back Model",
+    description="Serve a previously published model version again (instant: only the CURRENT pointer changes).",
+)
+def rollback_model(version: str):
+    try:
+        snapshot = model_registry.rollback(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown model version '{version}'.")
+    return {"status": "success", "version": snapshot.version, "metrics": snapshot.metadata.get("metrics", {})}
+
+
+@app.get(
+    "/training-batches",
+    summary="Incremental Training Batches",
+    description="Batches folded into the saved training statistics (the full dataset at the last full retrain is 'base').",
+)
+def list_training_batches():
+    return IncrementalTrainer.load().summary()
+
+
+@app.delete(
+    "/training-batches/{batch_id}",
+    summary="Remove a Training Batch",
+    description="Subtract a bad batch from the training statistics and publish the model without it.",
+)
+def delete_training_batch(batch_id: str):
+    try:
+        return remove_training_batch(batch_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown training batch '{batch_id}'.")
+    except ValueError as ve:
+        raise HTTPException(status_code=409, detail=str(ve))
+
+
+@app.get(
+    "/training-batches/verify",
+    summary="Verify Incremental Model",
+    description="Refit from scratch on every stored batch and compare predictions with the incrementally solved model.",
+)
+def verify_training_batches():
+    try:
+        return verify_incremental()
+    except ValueError as ve:
+        raise HTTPException(status_code=409, detail=str(ve))
+
+
 @app.post(
     "/predict",
     summary="Predict Rental Price",
@@ -191,12 +379,24 @@ async def upload_data(file: UploadFile = File(...)):
 )
 async def predict_rental_price(request: Request, input_data: RentalInput = Body(...)):
     try:
-        model = load_model()
-        if model is None:
+        # One snapshot per request: a concurrent hot swap never changes the
+        # model underneath this prediction.
+        snapshot = model_registry.current()
+        if snapshot is None:
             raise HTTPException(status_code=500, detail="Model not loaded")
 
-        df_input = prepare_input_dataframe(input_data)
-        prediction = model.predict(df_input)[0]
+        cache_key = prediction_cache.make_key(snapshot.version, input_data.dict())
+        prediction = prediction_cache.get(cache_key)
+        if prediction is None:
+            if snapshot.scorer is not None:
+                # Linear model: a few multiply-adds, no DataFrame
+                prediction = snapshot.scorer.score(input_data.dict())
+            elif predict_scheduler is not None:
+                # Other models: share one vectorised predict call with concurrent requests
+                prediction = await predict_scheduler.submit(snapshot, input_data.dict())
+            else:
+                prediction = batch_predict.predict_one(snapshot, input_data.dict())
+            prediction_cache.put(cache_key, prediction)
 
         user_id = request.headers.get("X-User-ID", "anonymous")
         log_prediction(input_data.dict(), prediction, user_id)
@@ -210,6 +410,77 @@ async def predict_rental_price(request: Request, input_data: RentalInput = Body(
         raise HTTPException(status_code=500, detail="Prediction failed: " + str(e))
 
 
+@app.post(
+    "/predict/batch",
+    summary="Predict Rental Prices in Bulk",
+    description=(
+        "Submit a JSON array of property features, or upload a CSV with bedrooms, bathrooms, "
+        "floor_area and suburb columns. Rows are validated and scored in one vectorised call; "
+        "results stream back as NDJSON (default) or CSV, with per-row errors reported inline."
+    ),
+)
+async def predict_rental_price_batch(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$", description="Response format: ndjson or csv"),
+):
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or not hasattr(upload, "read"):
+                raise HTTPException(status_code=400, detail="Upload a CSV file in the 'file' field.")
+            rows = batch_predict.rows_from_csv(await upload.read())
+        elif content_type.startswith("text/csv"):
+            rows = batch_predict.rows_from_csv(await request.body())
+        else:
+            rows = batch_predict.rows_from_json(await request.json())
+    except HTTPException:
+        raise
+    except OverflowError as oe:
+        raise HTTPException(status_code=413, detail=str(oe))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Could not read batch: {e}")
+
+    snapshot = model_registry.current()
+    if snapshot is None:
+        raise HTTPException(status_code=500, detail="Model not loaded")
+
+    # Validation + one model.predict call, off the event loop
+    result = await run_in_threadpool(batch_predict.predict_rows, rows, snapshot, ALLOWED_SUBURBS)
+
+    ok = result.ok_mask
+    if ok.any():
+        user_id = request.headers.get("X-User-ID", "anonymous")
+        scored = result.inputs[ok]
+        log_predictions(scored.to_dict(orient="records"), result.predictions[ok].tolist(), user_id)
+
+    if format == "csv":
+        return StreamingResponse(batch_predict.iter_csv(result), media_type="text/csv")
+    return StreamingResponse(batch_predict.iter_ndjson(result), media_type="application/x-ndjson")
+
+
+@app.get(
+    "/predict/cache-stats",
+    summary="Prediction Cache Stats",
+    description="Hit/miss/eviction counters for the /predict result cache (use them to size PREDICTION_CACHE_SIZE).",
+)
+def prediction_cache_stats():
+    snapshot = model_registry.current()
+    return {"model_version": snapshot.version if snapshot else None, **prediction_cache.stats()}
+
+
+@app.get(
+    "/predict/scheduler-stats",
+    summary="Micro-batching Stats",
+    description="Queue depth and batch-size histograms for the optional /predict micro-batching scheduler.",
+)
+def prediction_scheduler_stats():
+    if predict_scheduler is None:
+        return {"enabled": False}
+    return predict_scheduler.stats()
+
+
 # -----------------------------
 # New: Dataset Upload & Download
 # -----------------------------
@@ -218,7 +489,10 @@ async def predict_rental_price(request: Request, input_data: RentalInput = Body(
     summary="Upload a CSV/XLSX/HTML dataset for cleaning & storage",
     response_model=UploadSummary,
 )
-async def upload_dataset(file: UploadFile = File(...)):
+async def upload_dataset(
+    file: UploadFile = File(...),
+    force: bool = Query(False, description="Reprocess even if these exact bytes were processed before"),
+):
     if file.content_type not in {
         "text/csv",
         "application/vnd.ms-excel",
@@ -228,24 +502,69 @@ async def upload_dataset(file: UploadFile = File(...)):
     }:
         raise HTTPException(status_code=415, detail="Please upload a CSV, HTML, or XLSX file.")
 
-    file_bytes = await file.read()
-
+    # Spool to disk in blocks (hashing as we go); CSV is then parsed, cleaned and stored chunk by chunk
+    filename = file.filename or "dataset"
+    fd, spool_name = tempfile.mkstemp(prefix="upload_", suffix=Path(filename).suffix)
+    spool = Path(spool_name)
+    sha = hashlib.sha256()
     try:
-        summary, saved_path = process_upload(
-            file_bytes=file_bytes,
-            filename=file.filename or "dataset",
+        with os.fdopen(fd, "wb") as fh:
+            while block := await file.read(1 << 20):
+                sha.update(block)
+                fh.write(block)
+        digest = sha.hexdigest()
+
+        # Replay only while the rows counted when it was recorded are all still in uploaded_rows
+        previous = None if force else upload_ledger.lookup("upload-dataset", digest)
+        if previous is not None and await run_in_threadpool(stored_rows_intact, engine, previous.get("state")):
+            return UploadSummary(**previous["result"], ledger=ledger_info(previous, replayed=True))
+
+        summary, saved_path = await run_in_threadpool(
+            process_upload_file,
+            path=spool,
+            filename=filename,
             content_type=file.content_type or "",
             engine=engine,
             cleaned_dir=CLEANED_DIR,
         )
+        state = await run_in_threadpool(stored_rows_state, engine)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.exception("Processing failed")
         raise HTTPException(status_code=500, detail=f"Processing failed: {e}")
+    finally:
+        spool.unlink(missing_ok=True)
 
+    # Only reached once every row was inserted or skipped: a failed write raises above and is not recorded
     download_url = f"/download-cleaned/{saved_path.name}"
-    return UploadSummary(**summary, download_url=download_url)
+    result = {**summary, "download_url": download_url}
+    entry = upload_ledger.record("upload-dataset", digest, result, files=[saved_path.resolve()], state=state)
+    return UploadSummary(**result, ledger=ledger_info(entry, replayed=False))
+
+
+@app.get(
+    "/upload-dataset/filter",
+    summary="Upload Dedup Filter Stats",
+    description="Size, fill ratio and expected false-positive rate of the Bloom filter of stored row hashes.",
+)
+def upload_filter_stats():
+    table = ensure_table(engine)
+    with engine.connect() as conn:
+        return row_filters.get(conn, table).stats()
+
+
+@app.post(
+    "/upload-dataset/filter/rebuild",
+    summary="Rebuild Upload Dedup Filter",
+    description="Rebuild the Bloom filter of stored row hashes from uploaded_rows (e.g. after rows were deleted).",
+)
+async def rebuild_upload_filter():
+    def _rebuild():
+        table = ensure_table(engine)
+        with engine.connect() as conn:
+            return row_filters.rebuild(conn, table).stats()
+    return await run_in_threadpool(_rebuild)
 
 
 @app.get("/download-cleaned/{file_name}", summary="Download a cleaned CSV")
@@ -2,21 +2,28 @@
 Orchestrator for the modular data pipeline (ingestion → validation → transformation → storage).
 
 - New API: run(file_like, replace_table=False)  -> returns dict with stage_counts, report_path, duration_seconds
+- Rows already stored by an earlier run are rejected as duplicate_existing (see data_processing/dup_index.py).
+- rebuild_dup_index() re-indexes the rows of `properties`; it runs when the index table is first created.
 - Backward compatibility: keeps your previous "legacy" pipeline imports and main() so older flows don't break.
 """
 
 from __future__ import annotations
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 from io import BytesIO
 from pathlib import Path
 from datetime import datetime
+import uuid
 import pandas as pd
+from sqlalchemy import column, inspect, select, table
+from sqlalchemy.exc import SQLAlchemyError
 
 # ---------- NEW pipeline imports ----------
 from utils.logger import setup as setup_logger
-from data_processing.validate_properties import validate_dataframe, save_report_csv
+from data_processing.validate_properties import IssueReport, dup_key_hashes, validate_into
+from data_processing.validation_rules import get_plan
 from data_processing.transformer import transform_data
-from data_processing.loader import save_to_db
+from data_processing.loader import _engine, save_to_db
+from data_processing.dup_index import LOOKUP_BATCH, DuplicateIndex
 
 logger = setup_logger()
 
@@ -67,8 +74,62 @@ def _read_any_table(src: Union[str, Path, bytes, BytesIO]) -> pd.DataFrame:
     raise ValueError(f"Unsupported file type: {suf or 'unknown'}")
 
 
+_dup_index: Optional[DuplicateIndex] = None
+
+
+def _default_dup_index() -> Optional[DuplicateIndex]:
+    """
+    Duplicate index in the pipeline's database, created on first use and shared
+    by later runs; None (no cross-upload check) while the database is unavailable.
+    A newly created index is backfilled from the rows already in `properties`.
+    """
+    global _dup_index
+    if _dup_index is None:
+        try:
+            _dup_index = DuplicateIndex(_engine())
+        except Exception as e:
+            logger.warning(f"duplicate index unavailable, checking in-file duplicates only: {e}")
+            return None
+        if _dup_index.created:
+            try:
+                rebuild_dup_index(_dup_index)
+            except (SQLAlchemyError, ValueError) as e:
+                logger.warning(f"indexing the rows already stored failed; POST /ingest/dup-index/rebuild to retry: {e}")
+    return _dup_index
+
+
+def rebuild_dup_index(dup_index: DuplicateIndex, *, chunk_rows: int = LOOKUP_BATCH) -> Dict:
+    """
+    Re-index the duplicate keys of every row in `properties` (e.g. rows stored
+    before the index existed, or after rows were deleted), reading the key
+    columns in chunks of `chunk_rows`. The rule set's keys are swapped in one
+    transaction. Raises ValueError if `properties` lacks a duplicate-key column.
+    """
+    plan = get_plan()
+    engine = _engine()
+    rows = 0
+
+    def chunks():
+        nonlocal rows
+        if not plan.dup_keys or not inspect(engine).has_table("properties"):
+            return
+        stored = {c["name"] for c in inspect(engine).get_columns("properties")}
+        missing = [k for k in plan.dup_keys if k not in stored]
+        if missing:
+            raise ValueError(f"properties has no column(s) {missing} for rule set {plan.name}")
+        query = select(*[column(k) for k in plan.dup_keys]).select_from(table("properties"))
+        for chunk in pd.read_sql(query, engine, chunksize=chunk_rows):
+            rows += len(chunk)
+            yield dup_key_hashes(chunk, plan)
+
+    keys = dup_index.replace(plan.name, chunks())
+    logger.info(f"dup_index_rebuild rule_set={plan.name} rows={rows} keys={keys}")
+    return {"rule_set": plan.name, "rows": rows, "keys": keys}
+
+
 # ---------- Public API for the new story ----------
-def run(file_like: Union[str, Path, bytes, BytesIO], *, replace_table: bool = False) -> Dict:
+def run(file_like: Union[str, Path, bytes, BytesIO], *, replace_table: bool = False,
+        dup_index: Optional[DuplicateIndex] = None) -> Dict:
     """
     End-to-end pipeline:
       1) Ingestion (read table)
@@ -76,10 +137,18 @@ def run(file_like: Union[str, Path, bytes, BytesIO], *, replace_table: bool = Fa
       3) Transformation (feature/typing/normalisation)
       4) Storage (append by default; can replace)
 
+    Rows whose duplicate key an earlier run stored are rejected (duplicate_existing);
+    the keys of the rows stored by this run are added to `dup_index` (default: the
+    validation_dup_keys table next to `properties`). save_to_db and the index
+    update run in separate transactions, so two concurrent runs of the same rows
+    can both pass the check and both store them.
+
     Returns:
       {
-        "stage_counts": {ingested, validated_ok, rejected, duplicates, transformed_ok, stored},
-        "report_path": "backend/Machine_Learning_Model/reports/ingest_report_....csv" | None,
+        "stage_counts": {ingested, validated_ok, rejected, duplicates, duplicates_existing, transformed_ok, stored},
+        "issue_counts": {code: count},
+        "report_path": "backend/Machine_Learning_Model/reports/ingest_report_<ts>_<id>.csv" | None,
+        "store_error": None | str,   # set (and stored=0) when writing to the database failed
         "duration_seconds": float
       }
     """
@@ -89,23 +158,40 @@ def run(file_like: Union[str, Path, bytes, BytesIO], *, replace_table: bool = Fa
     df = _read_any_table(file_like)
     total_rows = len(df)
 
-    # 2) Validation
-    accepted_df, issues, summary = validate_dataframe(df)
-
-    # 3) Report (only if issues)
-    report_path = None
-    if issues:
-        ts = start.strftime("%Y-%m-%dT%H-%M-%S")
-        reports_dir = Path("backend/Machine_Learning_Model/reports")
-        reports_dir.mkdir(parents=True, exist_ok=True)
-        report_path = save_report_csv(issues, reports_dir / f"ingest_report_{ts}.csv")
+    # 2) Validation + 3) Report: issues are written as they are found (file only created if any)
+    ts = start.strftime("%Y-%m-%dT%H-%M-%S")
+    reports_dir = Path("backend/Machine_Learning_Model/reports")
+    plan = get_plan()
+    if dup_index is None:
+        dup_index = _default_dup_index()
+    # replace_table drops what was stored, so earlier keys are not duplicates of anything
+    check_index = None if replace_table else dup_index
+    # unique name: concurrent runs stream into their own report
+    with IssueReport(reports_dir / f"ingest_report_{ts}_{uuid.uuid4().hex[:8]}.csv", sample_size=0) as report:
+        accepted_df, summary = validate_into(df, report, plan=plan, dup_index=check_index)
+    report_path = report.path
 
     # 4) Transformation
     transformed = transform_data(accepted_df) if not accepted_df.empty else accepted_df
 
     # 5) Storage
+    stored, store_error = 0, None
     if not transformed.empty:
-        save_to_db(transformed, mode="replace" if replace_table else "append")
+        saved = save_to_db(transformed, mode="replace" if replace_table else "append")
+        if saved:
+            stored = len(transformed)
+        else:
+            store_error = "saving to the properties table failed; see the pipeline log"
+        if saved and dup_index is not None:
+            # transform_data keeps every accepted row, so these are the stored rows' keys.
+            # The rows are stored either way: a failure here only means a later
+            # re-upload of them is not flagged.
+            try:
+                if replace_table:
+                    dup_index.clear(plan.name)
+                dup_index.add(plan.name, dup_key_hashes(accepted_df, plan))
+            except SQLAlchemyError as e:
+                logger.warning(f"indexing stored rows for duplicate checks failed: {e}")
 
     out = {
         "stage_counts": {
@@ -113,10 +199,13 @@ def run(file_like: Union[str, Path, bytes, BytesIO], *, replace_table: bool = Fa
             "validated_ok": summary.accepted,
             "rejected": summary.rejected,
             "duplicates": summary.duplicates,
+            "duplicates_existing": summary.duplicates_existing,
             "transformed_ok": len(transformed),
-            "stored": int(len(transformed)),
+            "stored": stored,
         },
+        "issue_counts": dict(report.counts),
         "report_path": report_path,
+        "store_error": store_error,
         "duration_seconds": (datetime.utcnow() - start).total_seconds(),
     }
     logger.info(f"pipeline_run {out}")
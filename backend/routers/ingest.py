@@ -3,14 +3,20 @@ from __future__ import annotations
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query
 from typing import Any, Dict
+from dataclasses import asdict
 from io import BytesIO, StringIO
 from pathlib import Path
 from datetime import datetime
+import uuid
 import pandas as pd
 
 from services.ingest_properties import validate_property_dataframe
-from data_processing.validate_properties import save_report_csv, RowIssue  # type: ignore
+from data_processing.validate_properties import IssueReport  # type: ignore
+from data_processing.validation_rules import DEFAULT_RULE_SET, RULE_SETS, compile_rules, select_rule_set
 from pipeline_main import run as pipeline_run  # NEW: orchestrator for full pipeline
+from pipeline_main import _default_dup_index, rebuild_dup_index
+from data_processing.loader import properties_row_count
+from data_processing.upload_ledger import content_hash, ledger_info, unrecorded_info, upload_ledger
 
 router = APIRouter(prefix="/ingest", tags=["Ingestion & Validation"])
 
@@ -54,16 +60,23 @@ def _load_dataframe_from_upload(upload: UploadFile) -> pd.DataFrame:
         raise HTTPException(status_code=422, detail=f"parse_error: {type(ex).__name__}: {ex}") from ex
 
 
-def _write_report(issues: list[RowIssue]) -> str | None:
+def _report_dest() -> Path:
     """
-    If there are issues, write a CSV report and return its path relative to backend/.
+    Where this validation's CSV report goes; it is only created if there are issues.
+    The random suffix keeps validations started in the same second (whose reports
+    are written while they run) out of each other's files.
     """
-    if not issues:
-        return None
-    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
     ts = datetime.now().isoformat(timespec="seconds").replace(":", "-")
-    path = REPORTS_DIR / f"ingest_report_{ts}.csv"
-    return save_report_csv(issues, path)
+    return REPORTS_DIR / f"ingest_report_{ts}_{uuid.uuid4().hex[:8]}.csv"
+
+
+# ---------- Rule sets ----------
+@router.get("/rule-sets")
+def list_rule_sets() -> Dict[str, Any]:
+    """
+    Validation rule sets /ingest/file can apply, with the content hash their compiled plans are cached under.
+    """
+    return {"rule_sets": [{**asdict(r), "digest": r.digest()} for r in RULE_SETS.values()]}
 
 
 # ---------- Validation-only endpoint (kept) ----------
@@ -71,45 +84,85 @@ def _write_report(issues: list[RowIssue]) -> str | None:
 async def validate_file(
     file: UploadFile = File(..., description="CSV/XLSX file containing property rows"),
     dry_run: bool = Query(True, description="No persistence occurs; returns validation summary & report"),
+    force: bool = Query(False, description="Revalidate even if these exact bytes were validated before"),
+    rule_set: str | None = Query(None, description="Rule set to apply; default: picked from the file's columns"),
 ) -> Dict[str, Any]:
     """
-    Validate an uploaded CSV/XLSX of property rows against rule-based checks.
-    Returns JSON summary, per-row issues, and a CSV report path (if any).
+    Validate an uploaded CSV/XLSX against the rule set for its dataset type.
+    Returns JSON summary, issue counts per code, a sample of the issues, and a
+    CSV report path (if any) listing every issue.
 
     Notes:
     - This endpoint focuses on validation & reporting for your user story.
     - Persistence is intentionally disabled for safety (dry_run always honored here).
+    - Without `rule_set`, the set whose required columns the file has is used
+      (rental_listings if none fits).
     """
+    suffix = Path(file.filename or "").suffix.lower()
+    if suffix not in SUPPORTED_EXTS:
+        raise HTTPException(status_code=400, detail=f"unsupported_file_type: {suffix or 'unknown'}")
+    if rule_set is not None and rule_set not in RULE_SETS:
+        raise HTTPException(status_code=400, detail=f"unknown_rule_set: {rule_set}")
+
+    # Identical bytes validated before: return that result without parsing
+    digest = content_hash(await file.read())
+    options = {"rule_set": rule_set} if rule_set else None
+    previous = None if force else upload_ledger.lookup("ingest-file", digest, options)
+    if previous is not None:
+        return {**previous["result"], "ledger": ledger_info(previous, replayed=True)}
+    await file.seek(0)
+
     # Load DF
     df = _load_dataframe_from_upload(file)
 
-    # Run shared validator
-    result = validate_property_dataframe(df)
-    issues_dicts = result["issues"]
+    # Compiled (cached) plan of the chosen rule set
+    rules = RULE_SETS[rule_set] if rule_set else select_rule_set(df.columns) or RULE_SETS[DEFAULT_RULE_SET]
+    plan = compile_rules(rules)
 
-    # Write report if there are issues
-    issues_objs = [RowIssue(**i) for i in issues_dicts]
-    report_path = _write_report(issues_objs)
+    # Run shared validator, streaming issues to the report as they are found
+    with IssueReport(_report_dest()) as report:
+        result = validate_property_dataframe(df, report=report, plan=plan)
+    report_path = report.path
 
     # Build response
     response = {
         "dry_run": True,  # always True here
+        "rule_set": plan.name,
         "summary": result["summary"],
         "report_csv": None,
-        "issues": issues_dicts,
+        "issue_counts": result["issue_counts"],
+        "issues_total": report.total,
+        "issues_truncated": report.truncated,
+        "issues": result["issues"],
     }
     if report_path:
         backend_root = Path(__file__).resolve().parents[1]
-        rel = Path(report_path).resolve().relative_to(backend_root)
-        response["report_csv"] = f"./{rel.as_posix()}"
-    return response
+        resolved = Path(report_path).resolve()
+        if resolved.is_relative_to(backend_root):
+            response["report_csv"] = f"./{resolved.relative_to(backend_root).as_posix()}"
+        else:  # REPORTS_DIR pointed outside backend/
+            response["report_csv"] = resolved.as_posix()
+    entry = upload_ledger.record("ingest-file", digest, response, options=options, files=[report_path])
+    return {**response, "ledger": ledger_info(entry, replayed=False)}
 
 
 # ---------- Full pipeline endpoint (new) ----------
+def _properties_unchanged(state: Dict[str, Any] | None) -> bool:
+    """
+    True while `properties` has the row count recorded after the append. Any
+    later change re-runs the file; rows still stored are then rejected as
+    duplicate_existing by the dup index, so nothing is stored twice.
+    """
+    recorded = (state or {}).get("properties_rows")
+    return recorded is not None and properties_row_count() == recorded
+
+
+
 @router.post("/pipeline")
 async def run_pipeline(
     file: UploadFile = File(..., description="CSV/XLSX/HTML data to ingest"),
     replace_table: bool = Query(False, description="Replace properties table instead of append"),
+    force: bool = Query(False, description="Run the pipeline even if these exact bytes were ingested before"),
 ) -> Dict[str, Any]:
     """
     End-to-end pipeline run: ingestion → validation → transformation → storage.
@@ -123,11 +176,22 @@ async def run_pipeline(
     if not raw:
         raise HTTPException(status_code=400, detail="empty_file")
 
+    # Identical bytes already appended: return that result instead of storing the rows again,
+    # while `properties` still holds the rows it held then (no delete, replace or later append).
+    # Replacing the table is a command, not an idempotent upload, so it always runs.
+    digest = content_hash(raw)
+    options = {"replace_table": False}
+    previous = None if force or replace_table else upload_ledger.lookup("ingest-pipeline", digest, options)
+    if previous is not None and _properties_unchanged(previous.get("state")):
+        return {**previous["result"], "ledger": ledger_info(previous, replayed=True)}
+
     try:
         result = pipeline_run(raw, replace_table=replace_table)
-        return {
+        response = {
             "stage_counts": result["stage_counts"],
+            "issue_counts": result["issue_counts"],
             "report_csv": result["report_path"],
+            "store_error": result["store_error"],
             "duration_seconds": result["duration_seconds"],
             "mode": "replace" if replace_table else "append",
         }
@@ -135,3 +199,35 @@ async def run_pipeline(
         raise HTTPException(status_code=422, detail=f"pipeline_error: {ex}") from ex
     except Exception as ex:
         raise HTTPException(status_code=500, detail=f"internal_error: {type(ex).__name__}") from ex
+
+    # A run whose rows did not all reach the database must not be replayed as done
+    counts = result["stage_counts"]
+    if result["store_error"] is not None or counts["stored"] != counts["transformed_ok"]:
+        return {**response, "ledger": unrecorded_info(digest)}
+    if replace_table:
+        # Appends recorded before describe rows this replacement removed
+        upload_ledger.forget_endpoint("ingest-pipeline")
+        return {**response, "ledger": unrecorded_info(digest)}
+
+    report = result["report_path"]
+    entry = upload_ledger.record(
+        "ingest-pipeline", digest, response, options=options,
+        files=[report] if report and Path(report).exists() else [],
+        state={"properties_rows": properties_row_count()},
+    )
+    return {**response, "ledger": ledger_info(entry, replayed=False)}
+
+
+@router.post("/dup-index/rebuild")
+def rebuild_duplicate_index() -> Dict[str, Any]:
+    """
+    Re-index the duplicate keys of the rows in `properties` (e.g. after rows were
+    deleted there), so /pipeline flags exactly the rows still stored.
+    """
+    dup_index = _default_dup_index()
+    if dup_index is None:
+        raise HTTPException(status_code=503, detail="duplicate_index_unavailable")
+    try:
+        return rebuild_dup_index(dup_index)
+    except ValueError as ex:
+        raise HTTPException(status_code=409, detail=str(ex)) from ex
@@ -1,7 +1,7 @@
 # backend/schemas.py
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, Dict
+from typing import Any, Optional, Dict
 
 
 class PropertyOut(BaseModel):
@@ -28,15 +28,24 @@ class UploadSummary(BaseModel):
     message: str = Field(..., description="Status message about the upload")
     cleaned_file_name: str = Field(..., description="Name of the cleaned CSV file saved on the server")
     download_url: str = Field(..., description="API endpoint to download the cleaned CSV/XLSX file")
+    ledger: Optional[Dict[str, Any]] = Field(
+        None, description="replayed=true when an identical file was already processed and its result was returned"
+    )
 
 
 # --- NEW: pipeline run summary ---
 class PipelineRunSummary(BaseModel):
     stage_counts: Dict[str, int] = Field(
-        ..., description="Number of rows at each stage (ingested, validated_ok, rejected, duplicates, transformed_ok, stored)"
+        ..., description="Number of rows at each stage (ingested, validated_ok, rejected, duplicates, duplicates_existing, transformed_ok, stored)"
+    )
+    issue_counts: Dict[str, int] = Field(
+        default_factory=dict, description="Number of issues per code (missing_required, duplicate, ...)"
     )
     report_csv: Optional[str] = Field(
         None, description="Relative path to CSV issues report (if issues found)"
     )
+    store_error: Optional[str] = Field(
+        None, description="Set when writing to the properties table failed; stage_counts.stored is then 0"
+    )
     duration_seconds: float = Field(..., description="Pipeline execution time in seconds")
     mode: str = Field(..., description="'append' (default) or 'replace' mode for DB storage")
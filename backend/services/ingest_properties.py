@@ -14,7 +14,8 @@ except Exception:
     RealEstateNZProvider = None  # type: ignore
 
 # NEW: shared validator import (used for file-ingest or any DataFrame validation)
-from data_processing.validate_properties import validate_dataframe  # type: ignore
+from data_processing.validate_properties import IssueReport, validate_dataframe, validate_into  # type: ignore
+from data_processing.validation_rules import ValidationPlan
 
 logger = logging.getLogger(__name__)
 
@@ -137,7 +138,8 @@ def run_ingestion(db: Session, provider_name: str = "mock") -> Dict[str, Any]:
 # -----------------------------------------------------------------------------
 # NEW: Shared validator wrapper for file/DF ingestion (used by your new story)
 # -----------------------------------------------------------------------------
-def validate_property_dataframe(df) -> Dict[str, Any]:
+def validate_property_dataframe(df, report: IssueReport | None = None,
+                                plan: ValidationPlan | None = None) -> Dict[str, Any]:
     """
     Apply the same rule-based validation used for your acceptance tests to a
     pandas DataFrame (e.g., from CSV/XLSX upload).
@@ -148,9 +150,17 @@ def validate_property_dataframe(df) -> Dict[str, Any]:
         "issues":  [ {row, field, code, message}, ... ],
         "accepted_df": <DataFrame>   # rows safe to persist
       }
+
+    With a `report`, issues are streamed into it (and its CSV) instead:
+    "issues" is then only its capped sample, and "issue_counts" counts every
+    issue by code. `plan` picks the rule set (default: rental listings).
     """
-    accepted_df, issues, summary = validate_dataframe(df)
-    return {
+    if report is None:
+        accepted_df, issues, summary = validate_dataframe(df, plan=plan)
+    else:
+        accepted_df, summary = validate_into(df, report, plan=plan)
+        issues = report.sample
+    result = {
         "summary": {
             "total": summary.total,
             "accepted": summary.accepted,
@@ -160,3 +170,6 @@ def validate_property_dataframe(df) -> Dict[str, Any]:
         "issues": [i.__dict__ for i in issues],
         "accepted_df": accepted_df,
     }
+    if report is not None:
+        result["issue_counts"] = dict(report.counts)
+    return result
@@ -0,0 +1,57 @@
+import asyncio
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.neighbors import KNeighborsRegressor
+
+from Machine_Learning_Model.batch_predict import score_rows
+from Machine_Learning_Model.batch_scheduler import MicroBatchScheduler
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.model_registry import ModelRegistry
+from Machine_Learning_Model.rental_price_model import _input_from_manifest
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "bedrooms": rng.integers(1, 5, 60),
+        "bathrooms": rng.integers(1, 3, 60),
+        "floor_area": rng.uniform(50, 200, 60),
+        "suburb": rng.choice(["Epsom", "Manurewa"], 60),
+    })
+    X = pd.get_dummies(df, columns=["suburb"])
+    model = KNeighborsRegressor(n_neighbors=3).fit(X, 100 * df["bedrooms"] + df["floor_area"])
+    return ModelRegistry(tmp_path / "m.pkl").publish(model, FeatureManifest.from_columns(list(X.columns)))
+
+
+def test_concurrent_requests_share_one_batch(snapshot):
+    rows = [{"bedrooms": b, "bathrooms": 1, "floor_area": 80.0 + b, "suburb": "Epsom"} for b in range(1, 11)]
+    scheduler = MicroBatchScheduler(score_rows, window_ms=50, max_batch=64)
+
+    async def run():
+        return await asyncio.gather(*(scheduler.submit(snapshot, r) for r in rows))
+
+    results = asyncio.run(run())
+    expected = [snapshot.model.predict(_input_from_manifest(r, snapshot.manifest))[0] for r in rows]
+    assert results == pytest.approx(expected)
+
+    stats = scheduler.stats()
+    assert stats["batches"] == 1 and stats["rows"] == 10
+    assert stats["batch_size_histogram"]["<=16"] == 1
+    assert stats["max_queue_depth"] == 10
+
+
+def test_max_batch_splits_and_errors_stay_per_row(snapshot):
+    rows = [{"bedrooms": 2, "bathrooms": 1, "floor_area": 80.0, "suburb": s}
+            for s in ["Epsom", "Atlantis", "Manurewa", "Epsom"]]
+    scheduler = MicroBatchScheduler(score_rows, window_ms=50, max_batch=2)
+
+    async def run():
+        return await asyncio.gather(*(scheduler.submit(snapshot, r) for r in rows), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert isinstance(results[1], ValueError)
+    assert all(isinstance(results[i], float) for i in (0, 2, 3))
+    assert scheduler.stats()["batches"] == 2
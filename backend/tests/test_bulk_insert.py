@@ -0,0 +1,57 @@
+import csv
+import io
+import json
+
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+
+from data_processing import dataset_uploader as du
+
+
+def _frame(start, stop):
+    return du.add_hashes(pd.DataFrame({"suburb": "Epsom", "n": list(range(start, stop))}))
+
+
+def test_sqlite_batches_count_inserted_rows_exactly(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    table = du.ensure_table(engine)
+    assert du.insert_unique_rows(engine, table, _frame(0, 10)) == 10
+
+    # 5 stored already, 7 new, plus one new row repeated inside the upload; batches of 3
+    upload = pd.concat([_frame(5, 17), _frame(16, 17)], ignore_index=True)
+    with engine.begin() as conn:
+        cache = conn.exec_driver_sql("PRAGMA cache_size").scalar()
+        assert du._insert_rows(conn, table, upload, batch_rows=3) == 7
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == cache
+
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(table)).scalar() == 17
+        row = conn.execute(select(table).where(table.c.row_hash == upload["_row_hash"][0])).first()
+    assert row.data == {"suburb": "Epsom", "n": 5}
+    assert row.created_at is not None
+
+
+def test_portable_path_skips_stored_and_repeated_hashes(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    table = du.ensure_table(engine)
+    du.insert_unique_rows(engine, table, _frame(0, 4))
+
+    upload = pd.concat([_frame(2, 6), _frame(5, 6)], ignore_index=True)
+    batch = [
+        {"row_hash": h, "data": {"suburb": "Epsom", "n": n}, "created_at": None}
+        for h, n in zip(upload["_row_hash"], upload["n"].tolist())
+    ]
+    with engine.begin() as conn:
+        assert du._insert_new_only(conn, table, batch) == 2
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(table)).scalar() == 6
+
+
+def test_copy_payload_round_trips_through_csv(tmp_path):
+    engine = create_engine("sqlite://")
+    data = {"notes": 'has "quotes", commas\nand a newline', "n": 1.5, "missing": None}
+    with engine.connect() as conn:
+        text = du._copy_csv(conn, [{"row_hash": "abc", "data": data}])
+    (row,) = list(csv.reader(io.StringIO(text)))
+    assert row[0] == "abc"
+    assert json.loads(row[1]) == data
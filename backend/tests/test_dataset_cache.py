@@ -0,0 +1,49 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_processing import dataset_cache as dc
+from data_processing.dataset_cache import DatasetCache, pick_dataset_path
+
+CSV = "Suburb,Bedrooms,Weekly Rent ($NZD),Agency\nManurewa,3,550.5,Ray White\nEpsom,2,610,\n,4,700,Harcourts\n"
+
+
+def test_second_read_is_served_from_the_columnar_cache(tmp_path, monkeypatch):
+    src = tmp_path / "MockData.csv"
+    src.write_text(CSV)
+    cache = DatasetCache(tmp_path / "cache")
+
+    first = cache.read(src)
+    pd.testing.assert_frame_equal(first.copy(), pd.read_csv(src))
+
+    def no_parse(path):
+        raise AssertionError("dataset parsed twice")
+
+    monkeypatch.setattr(dc, "parse_dataset", no_parse)
+    again = DatasetCache(tmp_path / "cache").read(src)   # e.g. another process
+    pd.testing.assert_frame_equal(again.copy(), pd.read_csv(src))
+    assert isinstance(again["Bedrooms"].values, np.memmap)
+    assert again["Suburb"].isna().tolist() == [False, False, True]
+
+
+def test_replaced_file_is_reparsed_and_invalidate_drops_stale_entries(tmp_path):
+    src = tmp_path / "MockData.csv"
+    src.write_text(CSV)
+    cache = DatasetCache(tmp_path / "cache")
+    cache.read(src)
+
+    src.write_text(CSV.replace("Manurewa", "Albany"))
+    assert cache.read(src)["Suburb"].tolist()[0] == "Albany"
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+    cache.invalidate(tmp_path)
+    assert [p.name for p in (tmp_path / "cache").iterdir()] == [cache.content_hash(src)]
+
+
+def test_pick_dataset_path_prefers_newest(tmp_path):
+    assert pick_dataset_path(tmp_path) is None
+    (tmp_path / "MockData.csv").write_text(CSV)
+    (tmp_path / "MockData.xlsx").write_bytes(b"")
+    os.utime(tmp_path / "MockData.xlsx", (1, 1))
+    assert pick_dataset_path(tmp_path).name == "MockData.csv"
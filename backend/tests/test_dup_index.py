@@ -0,0 +1,129 @@
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from sqlalchemy import create_engine, event
+
+from data_processing.dup_index import DuplicateIndex
+from data_processing.validate_properties import _validate_dataframe_reference, dup_key_hashes, validate_dataframe
+
+
+def _index(tmp_path, batch_rows=5000):
+    return DuplicateIndex(create_engine(f"sqlite:///{tmp_path / 'dup.db'}"), batch_rows=batch_rows)
+
+
+def _listings(rents, suburb="Epsom"):
+    return pd.DataFrame({
+        "Suburb": [suburb] * len(rents),
+        "Weekly Rent ($NZD)": rents,
+        "Days on Market": [3] * len(rents),
+        "Bedrooms": [2] * len(rents),
+    })
+
+
+def test_contains_add_and_clear_in_batches(tmp_path):
+    index = _index(tmp_path, batch_rows=3)
+    statements = []
+    event.listen(index.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    hashes = [f"h{i}" for i in range(10)]
+    index.add("a", hashes[:5] + hashes[:2])         # repeats are ignored
+    index.add("a", hashes[3:6])
+    statements.clear()
+    assert index.contains("a", hashes).tolist() == [True] * 6 + [False] * 4
+    assert len(statements) == 4                     # one query per batch of 3, not one per row
+    assert not index.contains("b", hashes).any()
+
+    index.clear("a")
+    assert not index.contains("a", hashes).any()
+
+
+def test_rows_stored_before_are_rejected(tmp_path):
+    index = _index(tmp_path)
+    index.add("rental_listings", dup_key_hashes(_listings([650.0, 700.0])))
+
+    df = _listings(["650", 800, "1,200", 650, "abc"])   # same keys as text, int, ...
+    accepted, issues, summary = validate_dataframe(df, dup_index=index)
+    assert [(i.row, i.code) for i in issues] == [
+        (6, "invalid_number"),
+        (5, "duplicate"),
+        (2, "duplicate_existing"),
+        (5, "duplicate_existing"),
+    ]
+    assert summary.duplicates_existing == 2 and accepted["Weekly Rent ($NZD)"].tolist() == [800.0, 1200.0]
+
+    ref = _validate_dataframe_reference(df, dup_index=index)
+    assert ref[1] == issues and ref[2] == summary
+    assert_frame_equal(ref[0], accepted, check_dtype=False)
+    assert validate_dataframe(df)[2].duplicates_existing == 0
+
+
+def test_pipeline_indexes_what_it_stores(tmp_path, monkeypatch):
+    import pipeline_main
+
+    stored = []
+    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": stored.append(len(df)) or True)
+    monkeypatch.chdir(tmp_path)
+    index = _index(tmp_path)
+    first = _listings([650, 700, 750])
+    first.to_csv(tmp_path / "week1.csv", index=False)
+    pd.concat([first, _listings([900])]).to_csv(tmp_path / "week2.csv", index=False)
+
+    assert pipeline_main.run(tmp_path / "week1.csv", dup_index=index)["stage_counts"]["duplicates_existing"] == 0
+    second = pipeline_main.run(tmp_path / "week2.csv", dup_index=index)
+    assert second["stage_counts"]["duplicates_existing"] == 3
+    assert second["issue_counts"] == {"duplicate_existing": 3}
+    assert stored == [3, 1]
+
+    replaced = pipeline_main.run(tmp_path / "week2.csv", replace_table=True, dup_index=index)
+    assert replaced["stage_counts"]["stored"] == 4 and stored[-1] == 4
+    assert pipeline_main.run(tmp_path / "week1.csv", dup_index=index)["stage_counts"]["duplicates_existing"] == 3
+
+
+def test_failed_save_is_not_counted_or_indexed(tmp_path, monkeypatch):
+    import pipeline_main
+
+    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": False)
+    monkeypatch.chdir(tmp_path)
+    index = _index(tmp_path)
+    _listings([650, 700]).to_csv(tmp_path / "week1.csv", index=False)
+
+    result = pipeline_main.run(tmp_path / "week1.csv", dup_index=index)
+    assert result["stage_counts"]["transformed_ok"] == 2 and result["stage_counts"]["stored"] == 0
+    assert result["store_error"]
+    assert not index.contains("rental_listings", dup_key_hashes(_listings([650, 700]))).any()
+
+
+def test_unreachable_index_falls_back_to_in_file_checks(tmp_path, monkeypatch):
+    import pipeline_main
+
+    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": True)
+    monkeypatch.chdir(tmp_path)
+    index = _index(tmp_path)
+    index.engine = create_engine(f"sqlite:///{tmp_path / 'missing' / 'dup.db'}")   # cannot be opened
+    df = _listings([650, 650])
+    df.to_csv(tmp_path / "week1.csv", index=False)
+
+    issues = validate_dataframe(df, dup_index=index)[1]
+    assert [i.code for i in issues] == ["duplicate"]
+    result = pipeline_main.run(tmp_path / "week1.csv", dup_index=index)
+    assert result["stage_counts"]["stored"] == 1 and result["store_error"] is None
+
+
+def test_rebuild_indexes_rows_already_stored(tmp_path, monkeypatch):
+    import pipeline_main
+    from data_processing import loader
+
+    monkeypatch.setattr(loader, "DATABASE_URL", f"sqlite:///{tmp_path / 'properties.db'}")
+    assert loader.save_to_db(_listings([650.0, 700.0]))     # stored before any index existed
+    index = _index(tmp_path, batch_rows=1)
+    assert index.created and not _index(tmp_path).created
+    index.add("rental_listings", ["stale"])
+
+    rebuilt = pipeline_main.rebuild_dup_index(index, chunk_rows=1)
+    assert rebuilt == {"rule_set": "rental_listings", "rows": 2, "keys": 2}
+    assert index.contains("rental_listings", dup_key_hashes(_listings([650, 700, 800]))).tolist() == [True, True, False]
+    assert not index.contains("rental_listings", ["stale"]).any()
+
+    # The shared index is backfilled when it creates its table
+    monkeypatch.setattr(pipeline_main, "_dup_index", None)
+    shared = pipeline_main._default_dup_index()
+    assert shared.created and shared.contains("rental_listings", dup_key_hashes(_listings([650]))).all()
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression
+
+from Machine_Learning_Model.incremental_trainer import IncrementalTrainer
+from Machine_Learning_Model.retrain_model import encode_training_rows
+
+
+def _rows(n, suburbs, seed):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "bedrooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n),
+        "floor_area": 100,  # constant, like datasets without a floor_area column
+        "suburb": rng.choice(suburbs, n),
+    })
+    df["rent_price"] = 150 + 90 * df["bedrooms"] + 40 * df["bathrooms"] + rng.normal(0, 25, n)
+    return df
+
+
+def _full_refit(frames):
+    X, y, cols = encode_training_rows(pd.concat(frames, ignore_index=True))
+    return LinearRegression().fit(X, y), X, cols
+
+
+def _trainer(tmp_path):
+    return IncrementalTrainer(tmp_path / "stats.npz", tmp_path / "batches")
+
+
+def test_incremental_matches_full_refit_with_new_suburbs(tmp_path):
+    base = _rows(300, ["Manurewa", "Papakura"], 1)
+    extra = _rows(120, ["Papakura", "Takanini", "Albany"], 2)  # introduces two suburbs
+    trainer = _trainer(tmp_path)
+    trainer.add_batch(base, "base")
+    trainer.add_batch(extra, "b1")
+
+    model, manifest, mse = trainer.solve()
+    full, X, cols = _full_refit([base, extra])
+
+    assert manifest.columns == cols
+    np.testing.assert_allclose(model.predict(X), full.predict(X), rtol=0, atol=1e-6)
+    np.testing.assert_allclose(model.coef_, full.coef_, atol=1e-6)
+    assert mse == pytest.approx(np.mean((full.predict(X) - pd.concat([base, extra])["rent_price"].to_numpy()) ** 2))
+
+
+def test_remove_bad_batch_restores_model(tmp_path):
+    base = _rows(200, ["Manurewa", "Papakura"], 3)
+    bad = _rows(50, ["Papakura", "Nowhere"], 4)
+    bad["rent_price"] *= 10
+    trainer = _trainer(tmp_path)
+    trainer.add_batch(base, "base")
+    trainer.add_batch(bad, "bad")
+
+    trainer.remove_batch("bad")
+    model, manifest, _ = trainer.solve()
+    full, X, cols = _full_refit([base])
+
+    assert "suburb_Nowhere" not in manifest.columns
+    assert manifest.columns == cols
+    np.testing.assert_allclose(model.predict(X), full.predict(X), atol=1e-6)
+    assert not (tmp_path / "batches" / "bad.csv").exists()
+
+
+def test_stats_round_trip_and_duplicate_batch(tmp_path):
+    base = _rows(80, ["Manurewa", "Albany"], 5)
+    trainer = _trainer(tmp_path)
+    batch = trainer.add_batch(base)
+    trainer.save()
+
+    loaded = IncrementalTrainer.load(tmp_path / "stats.npz", tmp_path / "batches")
+    assert list(loaded.batches) == [batch.batch_id]
+    np.testing.assert_allclose(loaded.solve()[0].coef_, trainer.solve()[0].coef_)
+    pd.testing.assert_frame_equal(loaded.batch_rows(batch.batch_id), base, check_dtype=False)
+
+    with pytest.raises(ValueError):
+        loaded.add_batch(base)  # same content -> same id
@@ -0,0 +1,78 @@
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from pandas.testing import assert_frame_equal
+
+from data_processing.upload_ledger import UploadLedger
+from data_processing.validate_properties import IssueReport, save_report_csv, validate_dataframe, validate_into
+
+
+def _bad_frame(n):
+    rng = np.random.default_rng(3)
+    return pd.DataFrame({
+        "Suburb": rng.choice(["Epsom", "Albany", None], n).astype(object),
+        "Weekly Rent ($NZD)": rng.choice(["650", "1,200", "abc", "50"], n).astype(object),
+        "Days on Market": rng.choice([3.0, np.nan, 9999.0], n),
+        "Bedrooms": rng.choice([2.0, 2.5, 3.0], n),
+    })
+
+
+def test_streamed_report_matches_the_issue_list(tmp_path):
+    for df in [_bad_frame(2000), _bad_frame(50).astype({"Bedrooms": "Float64"})]:   # column-wise, row-wise engine
+        accepted, issues, summary = validate_dataframe(df)
+        with IssueReport(tmp_path / "streamed.csv", sample_size=10) as report:
+            streamed_df, streamed_summary = validate_into(df, report)
+
+        assert streamed_summary == summary
+        assert_frame_equal(streamed_df, accepted)
+        save_report_csv(issues, tmp_path / "listed.csv")
+        assert (tmp_path / "streamed.csv").read_bytes() == (tmp_path / "listed.csv").read_bytes()
+        assert report.counts == Counter(i.code for i in issues)
+        assert report.sample == issues[:10] and report.truncated
+
+
+def test_clean_or_failed_validation_leaves_no_report(tmp_path):
+    clean = pd.DataFrame({"Suburb": ["Epsom"], "Weekly Rent ($NZD)": [650], "Days on Market": [3], "Bedrooms": [2]})
+    with IssueReport(tmp_path / "clean.csv") as report:
+        validate_into(clean, report)
+    assert report.path is None and report.total == 0
+    assert not (tmp_path / "clean.csv").exists()
+
+    try:
+        with IssueReport(tmp_path / "failed.csv") as report:
+            validate_into(_bad_frame(20), report)
+            raise RuntimeError("stop")
+    except RuntimeError:
+        pass
+    assert report.path is None and not (tmp_path / "failed.csv").exists()
+
+
+def test_ingest_file_returns_a_capped_sample(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    from routers import ingest
+
+    monkeypatch.setattr(ingest, "REPORTS_DIR", tmp_path / "reports")
+    monkeypatch.setattr(ingest, "upload_ledger", UploadLedger(tmp_path / "ledger"))
+    df = _bad_frame(3000)
+    _, issues, _ = validate_dataframe(df)
+
+    resp = TestClient(main.app).post(
+        "/ingest/file", files={"file": ("bad.csv", df.to_csv(index=False).encode(), "text/csv")}
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["issues_total"] == len(issues) > len(body["issues"]) and body["issues_truncated"]
+    assert sum(body["issue_counts"].values()) == len(issues)
+    report = pd.read_csv(body["report_csv"])
+    assert len(report) == len(issues)
+    assert body["issues"] == report.head(len(body["issues"])).to_dict("records")
+
+
+def test_reports_of_one_second_do_not_share_a_file(tmp_path, monkeypatch):
+    from routers import ingest
+
+    monkeypatch.setattr(ingest, "REPORTS_DIR", tmp_path)
+    dests = {ingest._report_dest() for _ in range(20)}
+    assert len(dests) == 20 and all(d.name.startswith("ingest_report_") for d in dests)
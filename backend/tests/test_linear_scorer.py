@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.neighbors import KNeighborsRegressor
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearScorer
+from Machine_Learning_Model.rental_price_model import _input_from_manifest
+
+SUBURBS = ["Epsom", "Manurewa", "Mangere", "Papatoetoe", "Otahuhu"]
+
+
+def _training_frame(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "bedrooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n),
+        "floor_area": rng.uniform(40, 250, n),
+        "suburb": rng.choice(SUBURBS, n),
+    })
+    y = 150 + 80 * df["bedrooms"] + 40 * df["bathrooms"] + 1.2 * df["floor_area"] + rng.normal(0, 20, n)
+    X = pd.get_dummies(df, columns=["suburb"])
+    return X, y
+
+
+@pytest.mark.parametrize("estimator", [LinearRegression(), Ridge(alpha=0.5)])
+def test_scorer_matches_model_predict(estimator):
+    X, y = _training_frame()
+    model = estimator.fit(X, y)
+    manifest = FeatureManifest.from_columns(list(X.columns))
+    scorer = LinearScorer.from_model(model, manifest)
+    assert scorer is not None
+
+    rng = np.random.default_rng(1)
+    for _ in range(50):
+        row = {
+            "bedrooms": int(rng.integers(1, 6)),
+            "bathrooms": int(rng.integers(1, 4)),
+            "floor_area": float(rng.uniform(40, 250)),
+            "suburb": str(rng.choice(SUBURBS)).lower(),  # normalised the same way as training
+        }
+        expected = model.predict(_input_from_manifest(row, manifest))[0]
+        assert scorer.score(row) == pytest.approx(expected, rel=1e-9, abs=1e-9)
+
+
+def test_unknown_suburb_raises_like_the_dataframe_path():
+    X, y = _training_frame()
+    manifest = FeatureManifest.from_columns(list(X.columns))
+    scorer = LinearScorer.from_model(LinearRegression().fit(X, y), manifest)
+    with pytest.raises(ValueError):
+        scorer.score({"bedrooms": 2, "bathrooms": 1, "floor_area": 80, "suburb": "Atlantis"})
+    with pytest.raises(ValueError):
+        scorer.score({"bedrooms": 2, "bathrooms": 1, "floor_area": 80, "suburb": "unknown"})
+
+
+def test_non_linear_models_fall_back():
+    X, y = _training_frame()
+    manifest = FeatureManifest.from_columns(list(X.columns))
+    assert LinearScorer.from_model(KNeighborsRegressor().fit(X, y), manifest) is None
+    assert LinearScorer.from_model(LinearRegression().fit(X, y), None) is None
+
+
+def test_missing_floor_area_defaults_the_same_on_every_path():
+    X, y = _training_frame()
+    model = LinearRegression().fit(X, y)
+    manifest = FeatureManifest.from_columns(list(X.columns))
+    scorer = LinearScorer.from_model(model, manifest)
+    row = {"bedrooms": 3, "bathrooms": 2, "suburb": "Epsom"}
+
+    dense = model.predict(_input_from_manifest(row, manifest))[0]
+    encoded, known = manifest.encode(pd.DataFrame([row]))
+    assert known.all()
+    assert scorer.score(row) == pytest.approx(dense, rel=1e-9)
+    assert float(encoded @ model.coef_ + model.intercept_) == pytest.approx(dense, rel=1e-9)
+    assert scorer.score({**row, "floor_area": 100}) == pytest.approx(dense, rel=1e-9)
@@ -0,0 +1,97 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.neighbors import KNeighborsRegressor
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.linear_scorer import LinearModel
+from Machine_Learning_Model.model_artifacts import ArtifactStore
+from Machine_Learning_Model.model_registry import ModelRegistry
+
+X = pd.DataFrame({"bedrooms": [1, 2, 3, 4], "suburb_Epsom": [1, 0, 0, 1], "suburb_Manurewa": [0, 1, 1, 0]})
+y = [400.0, 450.0, 520.0, 700.0]
+
+
+def _manifest():
+    return FeatureManifest.from_columns(list(X.columns))
+
+
+def test_linear_model_is_stored_as_mmapped_coefficients(tmp_path):
+    fitted = LinearRegression().fit(X, y)
+    store = ArtifactStore(tmp_path / "artifacts")
+    version = store.save(fitted, _manifest(), metrics={"mse": 1.5}, training_data_hash="abc")
+
+    assert sorted(p.name for p in (tmp_path / "artifacts" / version).iterdir()) == ["coef.npy", "manifest.json"]
+    model, manifest, meta = store.load(version)
+    assert isinstance(model, LinearModel) and isinstance(model.coef_, np.memmap)
+    assert meta["kind"] == "linear" and meta["metrics"] == {"mse": 1.5} and meta["training_data_hash"] == "abc"
+    assert manifest.columns == list(X.columns) and manifest.model_version == version
+    np.testing.assert_allclose(model.predict(X), fitted.predict(X))
+    # same model -> same version, no duplicate directory
+    assert store.save(fitted, _manifest()) == version and len(store.versions()) == 1
+
+    # saved again with new metrics: the manifest is rewritten, not kept stale
+    assert store.save(fitted, _manifest(), metrics={"mse": 1.2}) == version
+    meta = store.read_meta(version)
+    assert meta["metrics"] == {"mse": 1.2} and meta["training_data_hash"] == "abc" and "updated_at" in meta
+    assert not [p for p in (tmp_path / "artifacts" / version).iterdir() if p.name.startswith(".")]
+
+
+def test_other_estimators_fall_back_to_pickle(tmp_path):
+    fitted = KNeighborsRegressor(n_neighbors=2).fit(X, y)
+    store = ArtifactStore(tmp_path / "artifacts")
+    model, _, meta = store.load(store.save(fitted, _manifest()))
+    assert meta["kind"] == "pickle"
+    np.testing.assert_allclose(model.predict(X), fitted.predict(X))
+
+
+def test_rollback_and_pruning(tmp_path):
+    reg = ModelRegistry(tmp_path / "rental_model.pkl", artifacts=ArtifactStore(tmp_path / "artifacts", keep=2),
+                        check_interval=0)
+    fits = [LinearRegression().fit(X, [v * k for v in y]) for k in (1, 2, 3)]
+    versions = [reg.publish(m, _manifest()).version for m in fits]
+    assert [m["version"] for m in reg.artifacts.versions()] == versions[:0:-1]  # oldest pruned
+
+    reader = ModelRegistry(tmp_path / "rental_model.pkl", artifacts=ArtifactStore(tmp_path / "artifacts"),
+                           check_interval=0)
+    assert reader.current().version == versions[2]
+    snap = reg.rollback(versions[1])
+    assert snap.version == versions[1] and reader.current().version == versions[1]
+    np.testing.assert_allclose(snap.model.predict(X), fits[1].predict(X))
+    try:
+        reg.rollback(versions[0])
+        assert False, "pruned version should not be restorable"
+    except KeyError:
+        pass
+
+
+def test_legacy_pickle_is_served_until_first_publish(tmp_path):
+    path = tmp_path / "rental_model.pkl"
+    joblib.dump(LinearRegression().fit(X, y), path)
+    reg = ModelRegistry(path, check_interval=0)
+    legacy = reg.current()
+    assert legacy.metadata == {} and legacy.manifest.columns == list(X.columns)
+
+    published = reg.publish(LinearRegression().fit(X, [2 * v for v in y]))
+    assert published.metadata["kind"] == "linear"
+    assert ModelRegistry(path, check_interval=0).current().version == published.version
+
+
+def test_missing_current_version_keeps_serving_loaded_model(tmp_path):
+    import shutil
+
+    path = tmp_path / "rental_model.pkl"
+    store = ArtifactStore(tmp_path / "artifacts")
+    reg = ModelRegistry(path, artifacts=store, check_interval=0)
+    first = reg.publish(LinearRegression().fit(X, y), _manifest()).version
+    second = reg.publish(LinearRegression().fit(X, [2 * v for v in y]), _manifest()).version
+
+    store.set_current(first)
+    shutil.rmtree(tmp_path / "artifacts" / first)      # CURRENT names a version that is gone
+    assert reg.refresh().version == second
+
+    # nothing loaded yet: the legacy pickle is served, or nothing at all
+    assert ModelRegistry(path, artifacts=store, check_interval=0).current() is None
+    joblib.dump(LinearRegression().fit(X, y), path)
+    assert ModelRegistry(path, artifacts=store, check_interval=0).current().path == path
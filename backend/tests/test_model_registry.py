@@ -0,0 +1,60 @@
+from sklearn.linear_model import LinearRegression
+
+from Machine_Learning_Model.model_registry import ModelRegistry
+
+
+def _fit(slope):
+    return LinearRegression().fit([[0.0], [1.0]], [0.0, slope])
+
+
+def test_load_once_and_serve_from_memory(tmp_path):
+    path = tmp_path / "rental_model.pkl"
+    ModelRegistry(path).publish(_fit(1.0))
+
+    reg = ModelRegistry(path, check_interval=0)
+    first = reg.current()
+    assert first is not None
+    assert reg.current() is first  # unchanged file -> same in-memory snapshot
+
+
+def test_publish_swaps_and_old_snapshot_stays_usable(tmp_path):
+    path = tmp_path / "rental_model.pkl"
+    reg = ModelRegistry(path, check_interval=0)
+    old = reg.publish(_fit(1.0))
+
+    new = reg.publish(_fit(2.0))
+    assert new.version != old.version
+    assert reg.current().version == new.version
+    # an in-flight request holding the old snapshot still predicts with it
+    assert abs(old.model.predict([[1.0]])[0] - 1.0) < 1e-9
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_picks_up_artifact_replaced_by_another_process(tmp_path):
+    path = tmp_path / "rental_model.pkl"
+    reader = ModelRegistry(path, check_interval=0)
+    ModelRegistry(path).publish(_fit(1.0))
+    v1 = reader.current().version
+
+    ModelRegistry(path).publish(_fit(3.0))
+    assert reader.current().version != v1
+    assert abs(reader.current().model.predict([[1.0]])[0] - 3.0) < 1e-9
+
+
+def test_missing_artifact_returns_none(tmp_path):
+    assert ModelRegistry(tmp_path / "nope.pkl").current() is None
+
+
+def test_publish_saves_manifest_and_reader_trusts_matching_version(tmp_path):
+    import pandas as pd
+    from Machine_Learning_Model.feature_manifest import FeatureManifest
+
+    X = pd.DataFrame({"bedrooms": [1, 2, 3], "suburb_Epsom": [1, 0, 0], "suburb_Manurewa": [0, 1, 1]})
+    model = LinearRegression().fit(X, [400, 500, 600])
+    path = tmp_path / "rental_model.pkl"
+    ModelRegistry(path).publish(model, FeatureManifest.from_columns(list(X.columns)))
+
+    snap = ModelRegistry(path).current()
+    assert snap.manifest.model_version == snap.version
+    assert snap.manifest.columns == list(X.columns)
+    assert snap.manifest.suburb_index == {"Epsom": 1, "Manurewa": 2}
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression, Ridge
+
+from Machine_Learning_Model.feature_manifest import FeatureManifest
+from Machine_Learning_Model.model_selection import select_model
+
+
+def _data(n=150, seed=0):
+    rng = np.random.default_rng(seed)
+    beds = rng.integers(1, 6, n)
+    suburbs = rng.choice(["Albany", "Epsom", "Manurewa"], n)
+    X = pd.DataFrame({"bedrooms": beds, "bathrooms": rng.integers(1, 4, n), "floor_area": rng.uniform(50, 200, n)})
+    for s in ["Albany", "Epsom", "Manurewa"]:
+        X[f"suburb_{s}"] = (suburbs == s).astype(int)
+    # strongly non-linear in bedrooms, so the tree model should win on accuracy
+    y = pd.Series(300 + 150 * (beds >= 3) + 400 * (beds >= 5) + 50 * (suburbs == "Epsom") + rng.normal(0, 5, n))
+    return X, y, FeatureManifest.from_columns(list(X.columns))
+
+
+def test_compares_all_candidates_and_promotes_most_accurate_within_budget():
+    X, y, manifest = _data()
+    model, report = select_model(X, y, manifest, budget_ms=1e6, folds=3, n_jobs=2)
+
+    names = [row["name"] for row in report["candidates"]]
+    assert names == ["linear", "ridge", "lasso", "gradient_boosting", "knn"]
+    for row in report["candidates"]:
+        assert {"cv_mse", "single_p99_ms", "batch_ms", "within_budget"} <= set(row)
+    best = min(report["candidates"], key=lambda r: r["cv_mse"])
+    assert report["selected"] == best["name"] == "gradient_boosting" and report["budget_met"]
+    assert type(model).__name__ == "GradientBoostingRegressor"
+    assert next(r for r in report["candidates"] if r["name"] == "knn")["estimator"] == "KNeighborsRegressor"
+    # linear candidates are timed on the pandas-free scorer path, like /predict serves them
+    assert next(r for r in report["candidates"] if r["name"] == "linear")["path"] == "scorer"
+
+
+def test_budget_excludes_slow_candidates():
+    X, y, manifest = _data()
+    _, report = select_model(X, y, manifest, candidates={"linear": LinearRegression(), "ridge": Ridge()},
+                             budget_ms=0.0, folds=3, n_jobs=1)
+    # nothing fits a zero budget: the fastest candidate is promoted and flagged
+    assert not report["budget_met"]
+    fastest = min(report["candidates"], key=lambda r: r["single_p99_ms"])
+    assert report["selected"] == fastest["name"]
+
+
+def test_failing_candidate_is_reported_not_promoted():
+    X, y, manifest = _data(n=40)
+
+    class Broken(LinearRegression):
+        def fit(self, X, y):
+            raise RuntimeError("cannot fit")
+
+    model, report = select_model(X, y, manifest, candidates={"broken": Broken(), "linear": LinearRegression()},
+                                 budget_ms=1e6, folds=2, n_jobs=1)
+    broken = report["candidates"][0]
+    assert "cannot fit" in broken["error"] and not broken["selected"]
+    assert report["selected"] == "linear" and isinstance(model, LinearRegression)
@@ -43,8 +43,8 @@ def test_pipeline_runs_without_db(monkeypatch):
     # Import pipeline after sys.path tweak
     import pipeline_main  # type: ignore
 
-    # Monkey-patch save_to_db used inside pipeline_main to a no-op
-    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": None)
+    # Monkey-patch save_to_db used inside pipeline_main to a no-op that reports success
+    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": True)
 
     result = pipeline_main.run(str(DATA_FILE), replace_table=False)
     _basic_stage_assertions(result)
@@ -0,0 +1,51 @@
+import json
+
+from fastapi.testclient import TestClient
+
+try:
+    from main import app
+except ModuleNotFoundError:
+    from backend.main import app
+
+client = TestClient(app)
+
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines() if line]
+
+
+def test_batch_matches_single_predictions_and_reports_errors_inline():
+    rows = [
+        {"bedrooms": 2, "bathrooms": 1, "suburb": "Manurewa", "floor_area": 80},
+        {"bedrooms": 0, "bathrooms": 1, "suburb": "Manurewa", "floor_area": 80},
+        {"bedrooms": 3, "bathrooms": 2, "suburb": "GibberishTown", "floor_area": 90},
+        {"bedrooms": 3, "bathrooms": 2, "suburb": "Manurewa", "floor_area": 90},
+    ]
+    r = client.post("/predict/batch", json=rows)
+    assert r.status_code == 200
+    out = _lines(r)
+    assert [o["index"] for o in out] == [0, 1, 2, 3]
+    assert "error" in out[1] and "bedrooms" in out[1]["error"]
+    assert "error" in out[2] and "suburb" in out[2]["error"]
+
+    for i in (0, 3):
+        single = client.post("/predict", json=rows[i]).json()["predicted_rent"]
+        assert out[i]["predicted_rent"] == single
+
+
+def test_batch_csv_upload_and_csv_output():
+    csv_body = "bedrooms,bathrooms,floor_area,suburb\n2,1,80,Manurewa\nx,1,80,Manurewa\n"
+    r = client.post(
+        "/predict/batch?format=csv",
+        files={"file": ("rows.csv", csv_body, "text/csv")},
+    )
+    assert r.status_code == 200
+    lines = r.text.strip().splitlines()
+    assert lines[0] == "index,predicted_rent,error"
+    assert lines[1].startswith("0,") and lines[1].endswith(",")
+    assert lines[2].startswith("1,,") and "bedrooms" in lines[2]
+
+
+def test_batch_rejects_non_array_body():
+    r = client.post("/predict/batch", json={"bedrooms": 2})
+    assert r.status_code == 400
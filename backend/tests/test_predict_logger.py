@@ -0,0 +1,81 @@
+import csv
+import gzip
+import os
+
+from Machine_Learning_Model.predict_logger import FIELDNAMES, PredictionLogWriter
+
+
+def _row(i):
+    return {"timestamp": "2025-01-01T00:00:00", "user_id": "u", "bedrooms": i,
+            "bathrooms": 1, "floor_area": 80, "suburb": "Manurewa", "prediction": 500.0 + i}
+
+
+def _read(path):
+    with open(path, newline="") as fh:
+        return list(csv.DictReader(fh))
+
+
+def test_rows_are_batched_and_drained_on_close(tmp_path):
+    path = tmp_path / "prediction_logs.csv"
+    writer = PredictionLogWriter(path, batch_size=1000, flush_interval=60)
+    for i in range(10):
+        writer.submit([_row(i)])
+    writer.close()
+
+    rows = _read(path)
+    assert [int(r["bedrooms"]) for r in rows] == list(range(10))
+    assert list(rows[0].keys()) == FIELDNAMES
+
+
+def test_flush_writes_header_once(tmp_path):
+    path = tmp_path / "prediction_logs.csv"
+    writer = PredictionLogWriter(path, batch_size=1000, flush_interval=60)
+    writer.submit([_row(1)])
+    writer.flush()
+    writer.submit([_row(2), _row(3)])
+    writer.flush()
+    writer.close()
+    assert open(path).read().count("timestamp,user_id") == 1
+    assert len(_read(path)) == 3
+
+
+def test_rotation_by_size_with_gzip_segments(tmp_path):
+    path = tmp_path / "prediction_logs.csv"
+    writer = PredictionLogWriter(path, batch_size=1, flush_interval=60, max_bytes=1, segment_format="csv.gz",
+                                 segment_grace=0)
+    for i in range(1, 4):
+        writer.submit([_row(i)])
+        writer.flush()
+    writer.close()
+
+    # Only segments older than the newest are compressed: a writer may still append to that one
+    segments = list(tmp_path.glob("prediction_logs-*.csv.gz"))
+    assert len(segments) == 1
+    with gzip.open(segments[0], "rt") as fh:
+        assert [int(r["bedrooms"]) for r in csv.DictReader(fh)] == [1]
+    newest = list(tmp_path.glob("prediction_logs-*.csv"))
+    assert len(newest) == 1 and [int(r["bedrooms"]) for r in _read(newest[0])] == [2]
+    assert [int(r["bedrooms"]) for r in _read(path)] == [3]
+
+    # Within the grace period a segment stays CSV
+    writer = PredictionLogWriter(path, batch_size=1, flush_interval=60, max_bytes=1, segment_format="csv.gz",
+                                 segment_grace=3600)
+    writer.submit([_row(4)])
+    writer.close()
+    assert len(list(tmp_path.glob("prediction_logs-*.csv"))) == 2
+    assert len(list(tmp_path.glob("prediction_logs-*.csv.gz"))) == 1
+    assert os.path.exists(path)
+
+
+def test_daily_segment_is_named_after_its_entries(tmp_path):
+    path = tmp_path / "prediction_logs.csv"
+    writer = PredictionLogWriter(path, batch_size=1, flush_interval=60)
+    writer.submit([{**_row(1), "timestamp": "2025-01-01T23:59:58"}])
+    writer.flush()
+    yesterday = os.path.getmtime(path) - 86400
+    os.utime(path, (yesterday, yesterday))
+    writer.submit([_row(2)])                                  # first write of a new day rolls the file
+    writer.close()
+
+    segments = [p.name for p in tmp_path.glob("prediction_logs-*.csv")]
+    assert len(segments) == 1 and segments[0].startswith("prediction_logs-20250101-235958-")
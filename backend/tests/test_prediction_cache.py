@@ -0,0 +1,50 @@
+import time
+
+from sklearn.linear_model import LinearRegression
+
+from Machine_Learning_Model.model_registry import ModelRegistry
+from Machine_Learning_Model.prediction_cache import PredictionCache
+
+ROW = {"bedrooms": 2, "bathrooms": 1, "floor_area": 80, "suburb": " manurewa "}
+
+
+def test_hits_misses_and_lru_eviction():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    k1 = cache.make_key("v1", ROW)
+    assert k1 == cache.make_key("v1", {**ROW, "suburb": "Manurewa", "floor_area": 80.0})
+
+    assert cache.get(k1) is None
+    cache.put(k1, 500.0)
+    assert cache.get(k1) == 500.0
+
+    k2 = cache.make_key("v1", {**ROW, "bedrooms": 3})
+    k3 = cache.make_key("v1", {**ROW, "bedrooms": 4})
+    cache.put(k2, 600.0)
+    cache.get(k1)            # k1 is now most recent, so k2 is evicted next
+    cache.put(k3, 700.0)
+    assert cache.get(k2) is None
+    assert cache.get(k1) == 500.0
+
+    s = cache.stats()
+    assert (s["hits"], s["misses"], s["evictions"], s["size"]) == (3, 2, 1, 2)
+
+
+def test_ttl_expiry_and_version_in_key():
+    cache = PredictionCache(maxsize=10, ttl=0.01)
+    cache.put(cache.make_key("v1", ROW), 500.0)
+    assert cache.get(cache.make_key("v2", ROW)) is None
+    time.sleep(0.02)
+    assert cache.get(cache.make_key("v1", ROW)) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_publishing_a_new_model_clears_the_cache(tmp_path):
+    cache = PredictionCache(maxsize=10, ttl=60)
+    reg = ModelRegistry(tmp_path / "rental_model.pkl")
+    reg.subscribe(cache.clear)
+    reg.publish(LinearRegression().fit([[0.0], [1.0]], [0.0, 1.0]))
+    cache.put(cache.make_key("old", ROW), 1.0)
+
+    reg.publish(LinearRegression().fit([[0.0], [1.0]], [0.0, 2.0]))
+    assert cache.stats()["size"] == 0
+    assert cache.stats()["invalidations"] == 1
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from models import Base, Property
+from Machine_Learning_Model.incremental_trainer import IncrementalTrainer
+from Machine_Learning_Model.properties_source import PropertyFilter, iter_property_chunks, stats_from_properties
+from Machine_Learning_Model.retrain_model import encode_training_rows
+
+T0 = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def _engine(tmp_path, n=250):
+    engine = create_engine(f"sqlite:///{tmp_path / 'props.db'}")
+    Base.metadata.create_all(engine)
+    rng = np.random.default_rng(0)
+    with Session(engine) as s:
+        for i in range(n):
+            beds, baths = int(rng.integers(1, 6)), int(rng.integers(1, 4))
+            s.add(Property(
+                source="trademe" if i % 2 else "manual", external_id=str(i), address=f"{i} Test St",
+                suburb=str(rng.choice(["Manurewa", "Papakura", "Albany"])), bedrooms=beds, bathrooms=baths,
+                floor_area=None if i % 7 == 0 else float(rng.uniform(50, 200)),
+                rent_weekly=None if i % 50 == 0 else round(200 + 80 * beds + 30 * baths + float(rng.normal(0, 20)), 2),
+                created_at=T0 + timedelta(days=i),
+            ))
+        s.commit()
+    return engine
+
+
+def test_streamed_stats_match_one_shot_fit(tmp_path):
+    engine = _engine(tmp_path)
+    chunks = list(iter_property_chunks(engine, chunk_size=40))
+    assert len(chunks) > 1 and all(len(c) <= 40 for c in chunks)
+
+    trainer = IncrementalTrainer(tmp_path / "stats.npz", tmp_path / "batches")
+    trainer.add_stats(stats_from_properties(engine, chunk_size=40))
+    model, manifest, _ = trainer.solve()
+
+    rows = pd.concat(chunks, ignore_index=True)
+    X, y, cols = encode_training_rows(rows)
+    full = LinearRegression().fit(X, y)
+    assert manifest.columns == cols
+    assert trainer.n == len(rows) == 245  # rows without rent are skipped
+    np.testing.assert_allclose(model.predict(X), full.predict(X), atol=1e-6)
+
+
+def test_filters_limit_rows(tmp_path):
+    engine = _engine(tmp_path)
+    stats = stats_from_properties(engine, PropertyFilter(source="trademe", since=T0 + timedelta(days=100),
+                                                         until=T0 + timedelta(days=200)), chunk_size=16)
+    assert stats.n == 50  # odd i in [100, 200); the rent-less rows (i % 50 == 0) are all even
+    assert stats_from_properties(engine, PropertyFilter(source="nobody")) is None
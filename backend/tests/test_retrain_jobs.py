@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from Machine_Learning_Model.retrain_jobs import RetrainJobManager
+
+
+class _Runner:
+    """Stands in for the worker: blocks until released and records each run."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+
+    def __call__(self, jobs_dir, job_id, full, uploads, properties=None, select=False):
+        self.calls.append((job_id, full, [name for name, _ in uploads]))
+        self.release.wait(5)
+        return {"metrics": {"full": {"mse": 1.0}} if full else {}, "rejected": [], "error": None}
+
+
+def test_triggers_during_a_run_merge_into_one_follow_up(tmp_path):
+    runner = _Runner()
+    finished = []
+    jobs = RetrainJobManager(tmp_path, executor=ThreadPoolExecutor(1), runner=runner, on_finished=finished.append)
+
+    first, merged = jobs.trigger(full=True)
+    assert first["status"] == "running" and not merged
+
+    second, merged = jobs.trigger(full=True)
+    assert second["status"] == "queued" and not merged
+    third, merged = jobs.trigger(upload=("extra.csv", b"a,b\n"))
+    assert merged and third["job_id"] == second["job_id"]
+    assert third["triggers"] == 2 and third["uploads"] == [{"filename": "extra.csv", "bytes": 4}]
+
+    runner.release.set()
+    done = jobs.wait(second["job_id"], timeout=5)
+    assert done["status"] == "succeeded"
+    assert jobs.get(first["job_id"])["metrics"] == {"full": {"mse": 1.0}}
+
+    # two runs in total, the follow-up carrying the merged upload
+    assert [(full, names) for _, full, names in runner.calls] == [(True, []), (True, ["extra.csv"])]
+    assert [s["job_id"] for s in finished] == [first["job_id"], second["job_id"]]
+
+
+def test_failed_run_is_reported(tmp_path):
+    def broken(jobs_dir, job_id, full, uploads, properties=None, select=False):
+        raise RuntimeError("worker died")
+
+    jobs = RetrainJobManager(tmp_path, executor=ThreadPoolExecutor(1), runner=broken)
+    job, _ = jobs.trigger(full=True)
+    state = jobs.wait(job["job_id"], timeout=5)
+    assert state["status"] == "failed"
+    assert "worker died" in state["error"]
+    assert jobs.get("nope") is None
@@ -0,0 +1,69 @@
+import hashlib
+
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+
+from data_processing import dataset_uploader as du
+from data_processing.row_filter import RowFilters, RowHashFilter, row_filters
+
+
+def _hashes(start, stop):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(start, stop)]
+
+
+def _frame(start, stop):
+    return du.add_hashes(pd.DataFrame({"suburb": "Epsom", "n": list(range(start, stop))}))
+
+
+def test_no_false_negatives_and_bounded_false_positives(tmp_path):
+    f = RowHashFilter(20_000, 0.01)
+    f.add(_hashes(0, 20_000))
+    assert f.might_contain(_hashes(0, 20_000)).all()
+    assert f.might_contain(_hashes(20_000, 60_000)).mean() < 0.02
+
+    path = tmp_path / "f.npz"
+    f.save(path)
+    loaded = RowHashFilter.load(path)
+    assert loaded.stats() == f.stats()
+    assert loaded.might_contain(_hashes(0, 20_000)).all()
+
+
+def test_reupload_only_looks_up_probable_duplicates(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    table = du.ensure_table(engine)
+    assert du.insert_unique_rows(engine, table, _frame(0, 50)) == 50
+    assert row_filters.path_for(engine).exists()
+
+    looked_up = []
+    drop_stored = du._drop_stored
+
+    def counting(conn, t, hashes, maybe, batch_rows):
+        looked_up.append(int(maybe.sum()))
+        return drop_stored(conn, t, hashes, maybe, batch_rows)
+
+    monkeypatch.setattr(du, "_drop_stored", counting)
+    # 50 stored, 10 new; counts stay exact
+    assert du.insert_unique_rows(engine, table, _frame(0, 60)) == 10
+    assert 50 <= looked_up[0] < 55
+    with engine.connect() as conn:
+        assert conn.execute(select(func.count()).select_from(table)).scalar() == 60
+
+
+def test_filter_is_rebuilt_from_the_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    table = du.ensure_table(engine)
+    du.insert_unique_rows(engine, table, _frame(0, 30))
+    stored = _frame(0, 30)["_row_hash"].tolist()
+
+    # Another process (fresh RowFilters) picks up the saved file
+    with engine.connect() as conn:
+        assert RowFilters(tmp_path).get(conn, table).might_contain(stored).all()
+
+    # Without the file, get() rebuilds from uploaded_rows
+    row_filters.path_for(engine).unlink()
+    filters = RowFilters(tmp_path)
+    with engine.connect() as conn:
+        built = filters.get(conn, table)
+        assert built.count == 30 and built.might_contain(stored).all()
+        assert filters.rebuild(conn, table).count == 30
+    assert row_filters.path_for(engine).exists()
@@ -0,0 +1,77 @@
+import hashlib
+import struct
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import JSON, Column, DateTime, MetaData, String, Table, create_engine, event, select
+
+from data_processing import dataset_uploader as du
+from data_processing.row_hash import legacy_record_hash, record_hash, row_hashes
+
+
+def test_hash_follows_the_documented_encoding():
+    row = {"suburb": "Epsom", "bedrooms": 3, "rent": 550.5, "garage": True, "notes": None}
+    names = sorted(row)
+    expected = b"RH2" + struct.pack("<I", len(names))
+    for n in names:
+        expected += struct.pack("<I", len(n)) + n.encode()
+    values = {
+        "bedrooms": b"i" + struct.pack("<q", 3),
+        "garage": b"b\x01",
+        "notes": b"N",
+        "rent": b"f" + struct.pack("<d", 550.5),
+        "suburb": b"s" + struct.pack("<I", 5) + b"Epsom",
+    }
+    expected += b"".join(values[n] for n in names)
+    assert record_hash(row) == hashlib.sha256(expected).hexdigest()
+
+
+def test_vectorised_hashes_match_record_hash():
+    df = pd.DataFrame({
+        "flag": [True, False, True, False],
+        "count": [1, -2, 0, 2 ** 40],
+        "price": [1.0, np.nan, -0.0, float("inf")],
+        "name": ["a", None, "é\x00", ""],
+        "mixed": [1, "1", 1.0, None],
+        "small": np.array([0, 1, 2, 255], dtype="uint8"),
+        "when": pd.to_datetime(["2024-01-01", None, "2024-03-01", "2024-04-01"]),
+    })
+    hashes = row_hashes(df)
+    assert hashes == [record_hash(r) for r in df.to_dict(orient="records")]
+    assert len(set(hashes)) == 4
+    # Types stay distinct, as they were with the JSON hash
+    assert len({record_hash({"a": v}) for v in (1, 1.0, "1", True)}) == 4
+
+
+def test_v1_hashes_are_migrated_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    old = pd.DataFrame({"suburb": ["Epsom", "Albany"], "bedrooms": [3, 2], "rent": [550.5, np.nan]})
+    records = old.to_dict(orient="records")
+
+    # A table written before hashes were versioned: v1 hashes, no uploaded_rows_meta
+    legacy = Table(
+        "uploaded_rows", MetaData(),
+        Column("row_hash", String, primary_key=True),
+        Column("data", JSON, nullable=False),
+        Column("created_at", DateTime(timezone=True)),
+    )
+    legacy.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(legacy.insert(), [{"row_hash": legacy_record_hash(r), "data": r} for r in records])
+        # Same row under two v1 hashes (None vs NaN): they merge under v2
+        conn.execute(legacy.insert(), [{"row_hash": legacy_record_hash({**records[1], "rent": None}),
+                                        "data": {**records[1], "rent": None}}])
+
+    table = du.ensure_table(engine)
+    with engine.connect() as conn:
+        stored = sorted(conn.execute(select(table.c.row_hash)).scalars())
+    assert stored == sorted(row_hashes(old))
+
+    # Re-uploading the old rows is still recognised as duplicates
+    assert du.insert_unique_rows(engine, table, du.add_hashes(old)) == 0
+    # The recorded version makes the next call a no-op: one read, no write transaction
+    versions = Table("uploaded_rows_meta", MetaData(), autoload_with=engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert du.migrate_row_hashes(engine, table, versions) == 0
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith("SELECT")
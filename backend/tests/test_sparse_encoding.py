@@ -0,0 +1,82 @@
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import LinearRegression
+
+from Machine_Learning_Model.batch_predict import predict_rows
+from Machine_Learning_Model.incremental_trainer import RCOND, BatchStats, _solve_arrowhead
+from Machine_Learning_Model.model_registry import ModelRegistry
+from Machine_Learning_Model.retrain_model import encode_training_matrix, encode_training_rows
+
+
+def _rows(n=300, suburbs=40, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "bedrooms": rng.integers(1, 6, n),
+        "bathrooms": rng.integers(1, 4, n),
+        "floor_area": rng.uniform(50, 200, n),
+        "suburb": [f"Suburb {i:02d}" for i in rng.integers(0, suburbs, n)],
+    })
+    df["rent_price"] = 200 + 80 * df["bedrooms"] + 30 * df["bathrooms"] + rng.normal(0, 20, n)
+    return df
+
+
+def test_sparse_encoder_matches_get_dummies():
+    rows = _rows()
+    X, y, manifest = encode_training_matrix(rows)
+    dense, y_dense, cols = encode_training_rows(rows)
+    assert sp.issparse(X) and X.nnz <= 4 * len(rows)
+    assert manifest.columns == cols
+    np.testing.assert_array_equal(X.toarray(), dense.to_numpy(dtype=float))
+    np.testing.assert_array_equal(y, y_dense.to_numpy())
+
+
+def test_batch_inference_feeds_each_model_what_it_was_fitted_on(tmp_path):
+    rows = _rows()
+    X, y, manifest = encode_training_matrix(rows)
+    dense, _, _ = encode_training_rows(rows)
+    inputs = rows[["bedrooms", "bathrooms", "floor_area", "suburb"]].head(25)
+    allowed = sorted(rows["suburb"].unique())
+
+    legacy = LinearRegression().fit(dense, y)                      # old pickle fitted on get_dummies
+    joblib.dump(legacy, tmp_path / "legacy.pkl")
+    cases = [
+        (ModelRegistry(tmp_path / "legacy.pkl").current(), legacy.predict(dense.head(25))),
+    ]
+    for name, model, expected_X in (
+        ("dense", GradientBoostingRegressor(random_state=0).fit(dense, y), dense.head(25)),
+        ("sparse", GradientBoostingRegressor(random_state=0).fit(X, y), X[:25]),
+    ):
+        snap = ModelRegistry(tmp_path / name / "m.pkl").publish(model, manifest)
+        cases.append((snap, model.predict(expected_X)))
+
+    for snap, expected in cases:
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")  # no feature-name mismatch warnings
+            result = predict_rows(inputs, snap, allowed)
+        np.testing.assert_allclose(result.predictions, expected, rtol=1e-9)
+
+
+def test_arrowhead_solve_matches_pseudo_inverse():
+    for rows in (_rows(), _rows(200, 1, 1), _rows(400, 300, 2).assign(floor_area=100.0)):
+        b = BatchStats.from_rows("x", rows)
+        n = b.ztz[0, 0]
+        mean_x, mean_y = b.ztz[0, 1:] / n, b.zty[0] / n
+        cov = b.ztz[1:, 1:] - n * np.outer(mean_x, mean_x)
+        cross = b.zty[1:] - n * mean_x * mean_y
+        coef = _solve_arrowhead(cov, cross, b.ztz[0, 4:], n)
+        reference = np.linalg.pinv(cov, rcond=RCOND, hermitian=True) @ cross
+        np.testing.assert_allclose(coef, reference, atol=1e-6)
+
+    # bedrooms fully determined by suburb: not the structure it handles -> caller falls back
+    tied = _rows(200, 5, 3)
+    tied["bedrooms"] = tied["suburb"].str[-1].astype(int) % 5 + 1
+    b = BatchStats.from_rows("x", tied)
+    n = b.ztz[0, 0]
+    mean_x = b.ztz[0, 1:] / n
+    cov = b.ztz[1:, 1:] - n * np.outer(mean_x, mean_x)
+    assert _solve_arrowhead(cov, b.zty[1:] - n * mean_x * b.zty[0] / n, b.ztz[0, 4:], n) is None
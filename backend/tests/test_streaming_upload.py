@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import create_engine
+
+from data_processing import dataset_uploader as du
+from data_processing.upload_ledger import UploadLedger
+
+# Columns whose cleaned type depends on the whole file: a late non-numeric value,
+# bools with blanks, padded numbers, an int column with a gap, an empty column,
+# a fully blank row and a repeated row.
+CSV = (
+    "Suburb, Bed Rooms,Garage,Code,Rent-Weekly,Notes,Empty\n"
+    " Epsom ,3,True, 12 ,550,,\n"
+    "Manurewa,2,false,7,610.5,quiet,\n"
+    ",,,,,,\n"
+    " Epsom ,3,True, 12 ,550,,\n"
+    "Albany,,TRUE,9,700,,\n"
+    "Onehunga,4,,11,720, ok ,\n"
+    "Ponsonby,1,false,X1,800,,\n"
+)
+
+
+def _hashes(engine):
+    with engine.connect() as conn:
+        return sorted(r[0] for r in conn.exec_driver_sql("SELECT row_hash FROM uploaded_rows"))
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 1000])
+def test_streamed_csv_matches_in_memory_upload(tmp_path, chunk_rows):
+    src = tmp_path / "rent.csv"
+    src.write_bytes(CSV.encode())
+    mem_engine = create_engine(f"sqlite:///{tmp_path / 'mem.db'}")
+    stream_engine = create_engine(f"sqlite:///{tmp_path / 'stream.db'}")
+
+    expected, expected_path = du.process_upload(
+        file_bytes=CSV.encode(), filename="rent.csv", content_type="text/csv",
+        engine=mem_engine, cleaned_dir=tmp_path / "mem",
+    )
+    summary, path = du.process_upload_file(
+        path=src, filename="rent.csv", content_type="text/csv",
+        engine=stream_engine, cleaned_dir=tmp_path / "stream", chunk_rows=chunk_rows,
+    )
+
+    counts = ("total_rows", "rows_inserted", "rows_skipped")
+    assert [summary[k] for k in counts] == [expected[k] for k in counts] == [6, 5, 1]
+    assert _hashes(stream_engine) == _hashes(mem_engine)
+    assert path.read_bytes() == expected_path.read_bytes()
+
+    # Re-uploading the same file inserts nothing
+    again, _ = du.process_upload_file(
+        path=src, filename="rent.csv", content_type="text/csv",
+        engine=stream_engine, cleaned_dir=tmp_path / "stream", chunk_rows=chunk_rows,
+    )
+    assert (again["rows_inserted"], again["rows_skipped"]) == (0, 6)
+
+
+def test_header_only_csv(tmp_path):
+    src = tmp_path / "empty.csv"
+    src.write_text("a,b\n")
+    engine = create_engine(f"sqlite:///{tmp_path / 'db.sqlite'}")
+    summary, path = du.process_upload_file(
+        path=src, filename="empty.csv", content_type="text/csv", engine=engine, cleaned_dir=tmp_path,
+    )
+    _, expected = du.process_upload(
+        file_bytes=b"a,b\n", filename="empty.csv", content_type="text/csv", engine=engine, cleaned_dir=tmp_path / "m",
+    )
+    assert (summary["total_rows"], summary["rows_inserted"]) == (0, 0)
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_upload_dataset_endpoint_streams_csv(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    monkeypatch.setattr(main, "engine", engine)
+    monkeypatch.setattr(main, "CLEANED_DIR", tmp_path / "cleaned")
+    monkeypatch.setattr(main, "upload_ledger", UploadLedger(tmp_path / "ledger"))
+
+    res = TestClient(main.app).post("/upload-dataset", files={"file": ("rent.csv", CSV.encode(), "text/csv")})
+    assert res.status_code == 200, res.text
+    body = res.json()
+    assert (body["total_rows"], body["rows_inserted"], body["rows_skipped"]) == (6, 5, 1)
+    assert (tmp_path / "cleaned" / body["cleaned_file_name"]).exists()
@@ -0,0 +1,172 @@
+from sqlalchemy import create_engine
+
+from data_processing.upload_ledger import UploadLedger, content_hash
+
+CSV = "Suburb,Bedrooms,Rent\nEpsom,3,550\nAlbany,2,610\nEpsom,3,550\n"
+
+
+def test_entries_are_keyed_by_content_and_options(tmp_path):
+    ledger = UploadLedger(tmp_path / "ledger", keep=2)
+    report = tmp_path / "report.csv"
+    report.write_text("row\n")
+    digest = content_hash(b"same bytes")
+
+    ledger.record("ingest-pipeline", digest, {"stored": 3}, options={"replace_table": False}, files=[report])
+    assert ledger.lookup("ingest-pipeline", digest, {"replace_table": False})["result"] == {"stored": 3}
+    assert ledger.lookup("ingest-pipeline", digest, {"replace_table": True}) is None
+    assert ledger.lookup("ingest-file", digest) is None
+    assert ledger.lookup("ingest-pipeline", content_hash(b"other bytes"), {"replace_table": False}) is None
+
+    # A result whose files are gone is not replayed
+    report.unlink()
+    assert ledger.lookup("ingest-pipeline", digest, {"replace_table": False}) is None
+
+    for i in range(3):
+        ledger.record("ingest-file", content_hash(bytes([i])), {"i": i})
+    assert len(list((tmp_path / "ledger").glob("*.json"))) == 2
+
+
+def test_identical_reupload_returns_the_stored_summary(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+
+    monkeypatch.setattr(main, "engine", create_engine(f"sqlite:///{tmp_path / 'api.db'}"))
+    monkeypatch.setattr(main, "CLEANED_DIR", tmp_path / "cleaned")
+    monkeypatch.setattr(main, "upload_ledger", UploadLedger(tmp_path / "ledger"))
+    calls = []
+    process = main.process_upload_file
+
+    def counting(**kwargs):
+        calls.append(kwargs)
+        return process(**kwargs)
+
+    monkeypatch.setattr(main, "process_upload_file", counting)
+    client = TestClient(main.app)
+
+    def upload(name, **params):
+        res = client.post("/upload-dataset", params=params, files={"file": (name, CSV.encode(), "text/csv")})
+        assert res.status_code == 200, res.text
+        return res.json()
+
+    first = upload("rent.csv")
+    assert (first["rows_inserted"], first["ledger"]["replayed"]) == (2, False)
+
+    again = upload("renamed.csv")
+    assert again["ledger"]["replayed"] is True
+    assert {k: again[k] for k in first if k != "ledger"} == {k: first[k] for k in first if k != "ledger"}
+    assert len(calls) == 1
+
+    forced = upload("rent.csv", force="true")
+    assert (forced["rows_inserted"], forced["rows_skipped"], forced["ledger"]["replayed"]) == (0, 3, False)
+    assert len(calls) == 2
+
+    # The next replay returns the latest result
+    assert upload("rent.csv")["cleaned_file_name"] == forced["cleaned_file_name"]
+
+
+def test_failed_saves_are_not_recorded(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    import pipeline_main
+    from data_processing import loader
+    from data_processing.dup_index import DuplicateIndex
+    from routers import ingest
+
+    ledger = UploadLedger(tmp_path / "ledger")
+    monkeypatch.setattr(ingest, "upload_ledger", ledger)
+    monkeypatch.setattr(main, "upload_ledger", ledger)
+    monkeypatch.setattr(main, "CLEANED_DIR", tmp_path / "cleaned")
+    monkeypatch.setattr(pipeline_main, "_dup_index", DuplicateIndex(create_engine(f"sqlite:///{tmp_path / 'dup.db'}")))
+    monkeypatch.setattr(pipeline_main, "save_to_db", lambda df, mode="append": False)
+    monkeypatch.setattr(loader, "DATABASE_URL", f"sqlite:///{tmp_path / 'properties.db'}")
+    monkeypatch.chdir(tmp_path)
+    client = TestClient(main.app)
+    listings = b"Suburb,Weekly Rent ($NZD),Days on Market,Bedrooms\nEpsom,650,3,2\nAlbany,700,5,3\n"
+
+    def pipeline():
+        res = client.post("/ingest/pipeline", files={"file": ("week1.csv", listings, "text/csv")})
+        assert res.status_code == 200, res.text
+        return res.json()
+
+    failed = pipeline()
+    assert failed["stage_counts"]["stored"] == 0 and failed["store_error"]
+    assert failed["ledger"]["recorded_at"] is None
+    monkeypatch.setattr(pipeline_main, "save_to_db", loader.save_to_db)
+    retried = pipeline()
+    assert retried["stage_counts"]["stored"] == 2 and retried["ledger"]["replayed"] is False
+    assert pipeline()["ledger"]["replayed"] is True
+
+    monkeypatch.setattr(main, "engine", create_engine(f"sqlite:///{tmp_path / 'missing' / 'api.db'}"))
+    res = client.post("/upload-dataset", files={"file": ("rent.csv", CSV.encode(), "text/csv")})
+    assert res.status_code == 500
+    assert list((tmp_path / "ledger").glob("*.json")) == [ledger._path("ingest-pipeline", content_hash(listings),
+                                                                         {"replace_table": False})]
+
+
+def test_replays_stop_when_the_stored_rows_are_gone(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    import pipeline_main
+    from data_processing import loader
+    from data_processing.dup_index import DuplicateIndex
+    from routers import ingest
+
+    api_engine = create_engine(f"sqlite:///{tmp_path / 'api.db'}")
+    ledger = UploadLedger(tmp_path / "ledger")
+    monkeypatch.setattr(main, "engine", api_engine)
+    monkeypatch.setattr(main, "CLEANED_DIR", tmp_path / "cleaned")
+    monkeypatch.setattr(main, "upload_ledger", ledger)
+    monkeypatch.setattr(ingest, "upload_ledger", ledger)
+    monkeypatch.setattr(pipeline_main, "_dup_index", DuplicateIndex(create_engine(f"sqlite:///{tmp_path / 'dup.db'}")))
+    monkeypatch.setattr(loader, "DATABASE_URL", f"sqlite:///{tmp_path / 'properties.db'}")
+    monkeypatch.chdir(tmp_path)
+    client = TestClient(main.app)
+
+    def upload(name, csv):
+        return client.post("/upload-dataset", files={"file": (name, csv.encode(), "text/csv")}).json()
+
+    assert upload("rent.csv", CSV)["rows_inserted"] == 2
+    assert upload("other.csv", "Suburb,Bedrooms,Rent\nHenderson,4,720\n")["rows_inserted"] == 1
+    assert upload("rent.csv", CSV)["ledger"]["replayed"] is True      # later rows do not matter
+    with api_engine.begin() as conn:
+        conn.exec_driver_sql("DELETE FROM uploaded_rows")
+    again = upload("rent.csv", CSV)
+    assert (again["rows_inserted"], again["ledger"]["replayed"]) == (2, False)
+
+    def pipeline(csv, **params):
+        return client.post("/ingest/pipeline", params=params, files={"file": ("l.csv", csv, "text/csv")}).json()
+
+    week1 = b"Suburb,Weekly Rent ($NZD),Days on Market,Bedrooms\nEpsom,650,3,2\n"
+    week2 = b"Suburb,Weekly Rent ($NZD),Days on Market,Bedrooms\nAlbany,700,5,3\n"
+    pipeline(week1)
+    assert pipeline(week1)["ledger"]["replayed"] is True
+    with create_engine(loader.DATABASE_URL).begin() as conn:
+        conn.exec_driver_sql("DELETE FROM properties")
+    rerun = pipeline(week1)
+    assert rerun["ledger"]["replayed"] is False and rerun["stage_counts"]["duplicates_existing"] == 1
+    assert client.post("/ingest/dup-index/rebuild").json()["keys"] == 0      # index follows properties again
+    assert pipeline(week1, force="true")["stage_counts"]["stored"] == 1
+    for _ in range(2):
+        replaced = pipeline(week2, replace_table="true")
+        assert replaced["ledger"]["replayed"] is False and replaced["stage_counts"]["stored"] == 1
+    assert pipeline(week1)["ledger"]["replayed"] is False
+
+
+def test_incremental_upload_replays_while_its_batch_is_kept(monkeypatch):
+    from types import SimpleNamespace
+    import main
+
+    job = {"job_id": "j1", "status": "running"}
+    batches = {"base": None}
+    monkeypatch.setattr(main, "retrain_jobs", SimpleNamespace(get=lambda job_id: job if job_id == "j1" else None))
+    monkeypatch.setattr(main.IncrementalTrainer, "load", classmethod(lambda cls: SimpleNamespace(batches=batches)))
+    entry = {"result": {"job_id": "j1"}, "state": {"filename": "week1.csv"}}
+
+    assert main._upload_still_applies(entry, incremental=True)          # still queued/running
+    job.update(status="succeeded", metrics={"incremental": {"batches": [
+        {"batch_id": "b1", "source": "week1.csv"}, {"batch_id": "b2", "source": "week2.csv"}]}})
+    batches["b1"] = None
+    assert main._upload_still_applies(entry, incremental=True)
+    del batches["b1"]                                                     # DELETE /training-batches/b1
+    assert not main._upload_still_applies(entry, incremental=True)
+    assert not main._upload_still_applies({**entry, "result": {"job_id": "pruned"}}, incremental=True)
@@ -0,0 +1,95 @@
+import random
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from data_processing.validate_properties import _validate_dataframe_reference, validate_dataframe
+
+DATA_VALIDATION = Path(__file__).resolve().parents[1] / "data_processing" / "DataValidation.xlsx"
+
+
+def _assert_same(df):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)   # the row-wise engine upcasts columns cell by cell
+        ref_df, ref_issues, ref_summary = _validate_dataframe_reference(df)
+    new_df, new_issues, new_summary = validate_dataframe(df)
+    assert new_issues == ref_issues
+    assert new_summary == ref_summary
+    assert_frame_equal(new_df, ref_df, check_exact=True)
+    return new_issues
+
+
+@pytest.mark.skipif(not DATA_VALIDATION.exists(), reason="DataValidation.xlsx not present")
+def test_matches_row_wise_engine_on_data_validation_sheet():
+    _assert_same(pd.read_excel(DATA_VALIDATION))
+
+
+def test_matches_row_wise_engine_on_awkward_values():
+    df = pd.DataFrame({
+        "Suburb": ["Epsom", None, "Epsom", pd.NaT, "Albany", "Epsom"],
+        "Weekly Rent ($NZD)": ["1,200", " 650 ", "abc", np.nan, 120000, "1,200"],
+        "Days on Market": [3, np.int64(4), "", np.nan, True, 3],
+        "Bedrooms": [2, "2.5", "nan", np.nan, 3.0, 2],
+        "Garage": [True, False, True, None, True, True],
+        "Floor Area": [80.0, 95.5, 70.0, np.nan, 60.0, 80.0],
+    })
+    issues = _assert_same(df)
+    codes = {(i.row, i.code) for i in issues}
+    assert (3, "invalid_number") in codes         # np.int64 is not treated as a number
+    assert (4, "invalid_integer") in codes        # "nan" parses to NaN in a mixed-dtype frame
+    # a row of only NaT/None/NaN is read as datetimes: its blanks are NaT, not missing
+    assert (5, "missing_required") not in codes
+    assert any(i.row == 5 and i.message == "Cannot parse number from 'NaT'" for i in issues)
+    assert (7, "duplicate") in codes
+
+    # Shifted labels number issues by label
+    _assert_same(df.iloc[:5].set_axis(range(10, 15)))
+
+    # Same values in a single-dtype frame: rows are views and see the written-back NaN
+    _assert_same(df.astype(object))
+
+
+def test_matches_row_wise_engine_on_random_frames():
+    rng = random.Random(7)
+    pool = ["650", "1,200", " 7 ", "", "abc", "nan", "inf", "1_000", None, np.nan, 3, 3.5, True,
+            np.int64(4), "4.5", pd.NaT, -0.0, 120000, pd.Timestamp("2024-01-01")]
+    for _ in range(150):
+        n = rng.randint(0, 12)
+        columns = {}
+        for col in ["Suburb", "Weekly Rent ($NZD)", "Days on Market", "Bedrooms", "Notes"]:
+            kind = rng.choice(["pool", "int", "float", "bool"])
+            if kind == "pool":
+                columns[col] = [rng.choice(pool) for _ in range(n)]
+            elif kind == "int":
+                columns[col] = np.array([rng.randint(0, 20) for _ in range(n)], dtype="int64")
+            elif kind == "float":
+                columns[col] = [rng.choice([1.0, 2.5, np.nan, 700.0]) for _ in range(n)]
+            else:
+                columns[col] = [rng.random() < 0.5 for _ in range(n)]
+        _assert_same(pd.DataFrame(columns))
+
+
+def test_parallel_chunks_match_single_process(monkeypatch):
+    import data_processing.validate_properties as vp
+
+    monkeypatch.setattr(vp, "PARALLEL_MIN_ROWS", 0)
+    monkeypatch.setattr(vp, "CHUNK_ROWS", 4)
+    rng = np.random.default_rng(5)
+    n = 40
+    df = pd.DataFrame({
+        "Suburb": rng.choice(["Epsom", "Albany", None], n).astype(object),
+        "Weekly Rent ($NZD)": rng.choice(["650", "1,200", "abc", 650], n).astype(object),
+        "Days on Market": rng.choice([3.0, np.nan, 9999.0], n),
+        "Bedrooms": rng.choice([2, 3], n),
+        "Notes": [pd.NaT] + [np.nan] * (n - 1),   # an all-NA chunk keeps its NaT
+    })
+    serial = validate_dataframe(df, workers=1)
+    parallel = validate_dataframe(df, workers=2)
+    assert parallel[1] == serial[1] and parallel[2] == serial[2]
+    assert_frame_equal(parallel[0], serial[0], check_exact=True)
+    # duplicates of rows first seen in an earlier chunk are still flagged
+    assert any(i.code == "duplicate" and i.row - 2 >= 4 for i in parallel[1])
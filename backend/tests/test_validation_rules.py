@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from data_processing.upload_ledger import UploadLedger
+from data_processing.validate_properties import _validate_dataframe_reference, validate_dataframe
+from data_processing.validation_rules import RULE_SETS, RuleSet, compile_rules, get_plan, select_rule_set
+
+
+def test_plans_are_compiled_once_per_rule_content():
+    rules = {"name": "t", "required": ["a"], "ranges": {"n": [0, 5]}, "integers": ["n"], "dup_keys": ["a"]}
+    plan = compile_rules(RuleSet.from_dict(rules))
+    assert compile_rules(RuleSet.from_dict(dict(rules))) is plan
+    assert compile_rules(RuleSet.from_dict({**rules, "ranges": {"n": [0, 6]}})) is not plan
+    assert plan.number_columns == ("n",) and plan.value_columns == ("a", "n")
+
+    with pytest.raises(ValueError):
+        compile_rules(RuleSet.from_dict({**rules, "ranges": {"n": [5, 0]}}))
+    with pytest.raises(ValueError):
+        compile_rules(RuleSet.from_dict({**rules, "nullable": ["a"]}))
+
+
+def test_rule_set_is_picked_from_the_header():
+    assert select_rule_set([" Suburb", "Weekly Rent ($NZD)", "Days on Market", "Bedrooms", "Agency"]).name == "rental_listings"
+    assert select_rule_set(["register_type", "month_code", "count"]).name == "msd_registers"
+    assert select_rule_set(RULE_SETS["linz_titles"].required + ("issue_date",)).name == "linz_titles"
+    assert select_rule_set(["Suburb", "Bedrooms"]) is None
+
+
+def test_provider_records_plan():
+    plan = get_plan("provider_records")
+    df = pd.DataFrame({
+        "external_id": ["a1", "a2", "a3", "a1", "a5"],
+        "address": ["1 Queen St", "2 King St", None, "1 Queen St", "5 Main Rd"],
+        "suburb": ["Epsom"] * 5,
+        "bedrooms": [2, 0, 3, 2, "2.5"],
+        "bathrooms": [1, 1, 1, 1, 1],
+        "floor_area": [80.0, np.nan, "n/a", 80.0, 95.0],
+        "rent_weekly": [650, None, 700, 650, 20000],
+    })
+    accepted, issues, summary = validate_dataframe(df, plan=plan)
+    ref = _validate_dataframe_reference(df, plan)
+    assert issues == ref[1] and summary == ref[2]
+    assert_frame_equal(accepted, ref[0], check_exact=True)
+
+    assert [(i.row, i.code, i.field) for i in issues] == [
+        (3, "out_of_range", "bedrooms"),
+        (4, "missing_required", "address"),
+        (4, "invalid_number", "floor_area"),        # blank floor_area / rent_weekly (row 3) are allowed
+        (6, "out_of_range", "rent_weekly"),
+        (6, "invalid_integer", "bedrooms"),
+        (5, "duplicate", "external_id"),
+    ]
+    assert summary.accepted == 1 and accepted["external_id"].tolist() == ["a1"]
+
+
+def test_ingest_file_uses_the_plan_for_the_header(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    import main
+    from routers import ingest
+
+    monkeypatch.setattr(ingest, "REPORTS_DIR", tmp_path / "reports")
+    monkeypatch.setattr(ingest, "upload_ledger", UploadLedger(tmp_path / "ledger"))
+    client = TestClient(main.app)
+    csv = b"register_type,month_code,count\nHousing Register,2024M01,100\nHousing Register,2024M01,100\nTransfer,2024M01,x\n"
+
+    body = client.post("/ingest/file", files={"file": ("msd.csv", csv, "text/csv")}).json()
+    assert body["rule_set"] == "msd_registers"
+    assert body["issue_counts"] == {"invalid_number": 1, "duplicate": 1}
+
+    forced = client.post("/ingest/file", params={"rule_set": "rental_listings"},
+                         files={"file": ("msd.csv", csv, "text/csv")}).json()
+    assert forced["rule_set"] == "rental_listings" and forced["issue_counts"] == {"missing_column": 4}
+    assert client.post("/ingest/file", params={"rule_set": "nope"},
+                       files={"file": ("msd.csv", csv, "text/csv")}).status_code == 400
+    assert {r["name"] for r in client.get("/ingest/rule-sets").json()["rule_sets"]} == set(RULE_SETS)